@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 """
 Create publication-quality figure for FnCas12a vs SpCas9 comparison.
+Metrics come from the TM-align record (results/struct/tmalign_stats.json).
 """
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.patches import FancyBboxPatch, Rectangle
 import numpy as np
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "workflow", "scripts"))
+from tmalign_result import load as load_result
+
+tm = load_result("results/struct/tmalign_stats.txt")
 
 # Create output directory
 output_dir = "results/pymol/annotated"
@@ -73,8 +80,8 @@ ax2.set_title('Sequence Alignment Overview', fontsize=14, weight='bold')
 seq_height = 0.3
 y_positions = [2, 1]
 colors = ['salmon', 'lightblue']
-names = ['FnCas12a\n(1282 aa)', 'SpCas9\n(1362 aa)']
-lengths = [1282, 1362]
+lengths = [tm.length_1, tm.length_2]
+names = [f'FnCas12a\n({tm.length_1} aa)', f'SpCas9\n({tm.length_2} aa)']
 
 for i, (y, color, name, length) in enumerate(zip(y_positions, colors, names, lengths)):
     ax2.add_patch(Rectangle((0, y), length, seq_height, 
@@ -83,7 +90,7 @@ for i, (y, color, name, length) in enumerate(zip(y_positions, colors, names, len
              ha='right', weight='bold')
 
 # Add identity label
-ax2.text(700, 2.8, 'Sequence Identity: 7.0%', fontsize=14, ha='center',
+ax2.text(700, 2.8, f'Sequence Identity: {tm.seq_id:.1%}',fontsize=14, ha='center',
          bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.8))
 
 # Add conservation regions (minimal for convergent evolution)
@@ -108,12 +115,12 @@ ax3 = fig.add_subplot(gs[1, 1])
 ax3.axis('off')
 ax3.set_title('Quantitative Analysis', fontsize=14, weight='bold')
 
-metrics_text = """STRUCTURAL METRICS
+metrics_text = f"""STRUCTURAL METRICS
 ━━━━━━━━━━━━━━━━━
-RMSD: 10.23 Å
-TM-score: 0.227/0.217
-Seq Identity: 7.0%
-Aligned: 472 residues
+RMSD: {tm.rmsd:.2f} Å
+TM-score: {tm.tm_score_1:.3f}/{tm.tm_score_2:.3f}
+Seq Identity: {tm.seq_id:.1%}
+Aligned: {tm.aligned_length} residues
 
 EVOLUTIONARY PATTERN
 ━━━━━━━━━━━━━━━━━
@@ -173,7 +180,7 @@ ax.text(5, 9, 'SpCas9', fontsize=14, weight='bold', color='darkblue',
         bbox=dict(boxstyle="round,pad=0.3", facecolor='white', alpha=0.8))
 
 # Add annotation
-ax.text(5, 0.5, 'No structural alignment\nRMSD: 10.23 Å', 
+ax.text(5, 0.5, f'No structural alignment\nRMSD: {tm.rmsd:.2f} Å',
         fontsize=12, ha='center', style='italic')
 
 ax.axis('off')
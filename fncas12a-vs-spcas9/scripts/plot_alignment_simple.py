@@ -2,12 +2,18 @@
 """
 Create alignment visualization for FnCas12a vs SpCas9.
 """
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from matplotlib.patches import Rectangle
 import numpy as np
 from Bio import AlignIO
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "workflow", "scripts"))
+from tmalign_result import load as load_result
+
 # Read alignment
 alignment = AlignIO.read("results/alignment/cas_dual_mafft.fasta", "fasta")
 
@@ -16,7 +22,7 @@ seq1 = str(alignment[0].seq)
 seq2 = str(alignment[1].seq)
 
 # Use TM-align result for accurate identity
-identity = 7.0  # From TM-align structural alignment
+identity = load_result("results/struct/tmalign_stats.txt").seq_id * 100
 
 # Create figure
 fig, ax = plt.subplots(figsize=(16, 8))
@@ -20,44 +20,24 @@ fi
 echo ""
 echo "Step 1: Running core Snakemake pipeline..."
 echo "=========================================="
-snakemake -j 8 --use-conda --conda-frontend $CONDA_FRONTEND
+# Cores and memory of this machine (see ../workflow/scripts/machine_resources.py);
+# jobs are packed by the threads and memory each rule declares
+PROFILE=$(python ../workflow/scripts/machine_resources.py profile)
+snakemake --profile "$PROFILE" --use-conda --conda-frontend $CONDA_FRONTEND
 
 echo ""
-echo "Step 2: Generating additional visualizations..."
+echo "Step 2: Checking additional visualizations..."
 echo "=============================================="
 
-# Check if all outputs already exist
+# Movie, annotated figures and the PyMOL script are rules of the shared
+# pipeline (../workflow/Snakefile), so step 1 already built or refreshed them
 if [ -f "results/pymol/rotation.gif" ] && \
    [ -f "results/pymol/annotated/publication_figure.png" ] && \
    [ -f "results/pymol/color_overlay.pml" ] && \
    [ -d "results/pymol/views" ]; then
-    echo "✓ All additional outputs already exist!"
+    echo "✓ All additional outputs exist!"
 else
-    echo "Running additional analysis scripts..."
-    
-    # Generate movie frames if needed
-    if [ ! -d "results/pymol/movie_frames" ]; then
-        echo "  - Generating movie frames (this may take 5-10 minutes)..."
-        python scripts/generate_movie_frames.py
-    fi
-    
-    # Create rotation GIF
-    if [ ! -f "results/pymol/rotation.gif" ]; then
-        echo "  - Creating rotation GIF..."
-        python scripts/create_movie.py
-    fi
-    
-    # Generate annotated figures
-    if [ ! -f "results/pymol/annotated/publication_figure.png" ]; then
-        echo "  - Creating annotated figures..."
-        python scripts/create_annotated_figures.py
-    fi
-    
-    # Create PyMOL script
-    if [ ! -f "results/pymol/color_overlay.pml" ]; then
-        echo "  - Creating PyMOL color overlay script..."
-        python scripts/create_colored_overlay.py
-    fi
+    echo "⚠ Some additional outputs are missing; rerun step 1 to rebuild them"
 fi
 
 echo ""
@@ -72,7 +52,7 @@ echo ""
 # Display key statistics
 if [ -f "results/struct/tmalign_stats.txt" ]; then
     echo "Structural alignment statistics:"
-    grep -E "(RMSD|TM-score|Seq_ID)" results/struct/tmalign_stats.txt | head -3
+    python ../workflow/scripts/tmalign_result.py results/struct/tmalign_stats.txt --summary
 fi
 
 echo ""
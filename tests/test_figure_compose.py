@@ -0,0 +1,49 @@
+"""Annotated views keep every annotation inside the saved image."""
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "workflow", "scripts"))
+import figure_compose  # noqa: E402
+
+# Layout of create_annotated_figures.py's front view: four highlight lines
+# run past the bottom of a 1200-pixel render
+FRONT_ANNOTATIONS = [
+    {"type": "text", "x": 100, "y": 100, "text": "FnCas9 vs SpCas9 Structural Overlay",
+     "fontsize": 20, "weight": "bold"},
+    {"type": "text", "x": 100, "y": 1100, "text": "Key Similarities:", "fontsize": 16},
+] + [
+    {"type": "text", "x": 100, "y": 1140 + 30 * i, "text": f"• Highlight line {i}", "fontsize": 14}
+    for i in range(4)
+] + [
+    {"type": "arrow", "x1": -20, "y1": 330, "x2": 400, "y2": 380},
+]
+
+
+@pytest.fixture(params=[(1600, 1200), (640, 480)], ids=["standard", "draft"])
+def view(request, tmp_path):
+    path = tmp_path / "front_view.png"
+    Image.new("RGB", request.param, "red").save(path)
+    return path, request.param
+
+
+def test_annotation_boxes_inside_image(view):
+    path, size = view
+    figure = figure_compose.annotate(str(path), FRONT_ANNOTATIONS)
+    canvas, offset, boxes = figure_compose.annotation_layout(size, FRONT_ANNOTATIONS)
+    assert figure.size == canvas
+    for box in boxes:
+        left, top, right, bottom = box
+        assert left >= 0 and top >= 0, box
+        assert right <= figure.width and bottom <= figure.height, box
+    # The canvas grew for the text below the view and the arrow left of it
+    assert figure.height > size[1] and offset[0] > 0
+
+
+def test_view_pasted_unchanged(view):
+    path, size = view
+    figure = figure_compose.annotate(str(path), [])
+    assert figure.size == size
+    assert figure.convert("RGB").getpixel((size[0] // 2, size[1] // 2)) == (255, 0, 0)
@@ -0,0 +1,81 @@
+"""
+Vectorized per-column statistics for multiple sequence alignments.
+
+The alignment is held as a 2-D uint8 array (sequences x columns) so that
+identity, gap fraction, Shannon entropy and majority-residue frequency are
+computed for every column in a single NumPy pass instead of a Python loop.
+Large alignments can be processed in column blocks from an MSAReader.
+"""
+import numpy as np
+
+from msa_reader import MSAReader
+
+GAP_CHARS = b"-."
+
+# Residue letters map to 0-25, gaps to 26; anything else is treated as 'X'.
+_ALPHABET_SIZE = 27
+_GAP_INDEX = 26
+_LOOKUP = np.full(256, ord("X") - ord("A"), dtype=np.uint8)
+for _c in range(26):
+    _LOOKUP[ord("A") + _c] = _c
+    _LOOKUP[ord("a") + _c] = _c
+for _c in GAP_CHARS:
+    _LOOKUP[_c] = _GAP_INDEX
+
+
+def load_alignment(path, fmt=None):
+    """Read a whole alignment into (names, uint8 array of shape N x L)."""
+    with MSAReader(path, fmt) as reader:
+        return reader.names, np.array(reader.block(0, reader.n_cols))
+
+
+def residue_counts(msa):
+    """Return per-column residue counts with shape (L, 27); the last slot counts gaps."""
+    codes = _LOOKUP[msa]
+    n_cols = codes.shape[1]
+    flat = codes.astype(np.intp) + np.arange(n_cols, dtype=np.intp) * _ALPHABET_SIZE
+    counts = np.bincount(flat.ravel(), minlength=n_cols * _ALPHABET_SIZE)
+    return counts.reshape(n_cols, _ALPHABET_SIZE)
+
+
+def column_stats(msa):
+    """
+    Compute conservation statistics for every alignment column.
+
+    Returns a dict of 1-D float arrays of length L:
+      identity        fraction of all sequences carrying the majority residue
+                      (1.0 means gap-free and fully identical)
+      gap_fraction    fraction of sequences with a gap
+      entropy         Shannon entropy (bits) of the non-gap residues
+      majority_freq   frequency of the majority residue among non-gap residues
+      conservation    0 for all-gap, 1 for a single residue type, else 0.5
+    """
+    n_seqs = msa.shape[0]
+    counts = residue_counts(msa)
+    residues = counts[:, :_GAP_INDEX]
+    gaps = counts[:, _GAP_INDEX]
+    n_residues = n_seqs - gaps
+
+    majority = residues.max(axis=1)
+    n_types = np.count_nonzero(residues, axis=1)
+
+    freqs = residues / np.maximum(n_residues, 1)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plogp = np.where(freqs > 0, freqs * np.log2(freqs), 0.0)
+    entropy = 0.0 - plogp.sum(axis=1)
+
+    conservation = np.where(n_residues == 0, 0.0, np.where(n_types == 1, 1.0, 0.5))
+
+    return {
+        "identity": majority / n_seqs,
+        "gap_fraction": gaps / n_seqs,
+        "entropy": entropy,
+        "majority_freq": majority / np.maximum(n_residues, 1),
+        "conservation": conservation,
+    }
+
+
+def stream_column_stats(reader, block_width=4096):
+    """Compute column_stats block by block, keeping at most N x block_width residues in memory."""
+    parts = [column_stats(block) for _, block in reader.blocks(block_width)]
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Assemble the all-vs-all comparison matrix from per-pair TM-align outputs.
+
+Each {A}_vs_{B}.json is the record of one TM-align run (A as Chain_1, see
+tmalign_result.py; the .txt report is accepted too). The script writes a
+long table with every metric per pair plus square TM-score and RMSD
+matrices. In tm_score.tsv row i, column j is the TM-score of the
+pair normalized by the length of structure i.
+
+Usage:
+  python workflow/scripts/comparison_matrix.py --out-dir results/matrix
+      [--ids 5B2O 5F9R ...] [--labels 5B2O=FnCas9 ...] -- store/tmalign/*.json
+"""
+import argparse
+import csv
+import os
+import re
+
+import numpy as np
+
+from tmalign_result import load as load_result
+
+_PAIR_FILE = re.compile(r"(?P<pdb1>[^/]+)_vs_(?P<pdb2>[^/]+)\.(txt|json)$")
+_METRICS = ["length_1", "length_2", "aligned_length", "rmsd", "seq_id", "tm_score_1", "tm_score_2"]
+PAIR_COLUMNS = ["pdb_1", "pdb_2", "label_1", "label_2"] + _METRICS
+
+
+def read_pair(path):
+    """Summary metrics of one TM-align run (text report or JSON record)."""
+    match = _PAIR_FILE.search(path)
+    if not match:
+        raise ValueError(f"Pair file name must look like A_vs_B.txt or A_vs_B.json: {path}")
+    result = load_result(path)
+    row = {"pdb_1": match["pdb1"], "pdb_2": match["pdb2"]}
+    row.update((field, getattr(result, field)) for field in _METRICS)
+    return row
+
+
+def build_matrices(rows, ids):
+    """Square TM-score (row-normalized) and RMSD matrices over ids."""
+    index = {pdb: i for i, pdb in enumerate(ids)}
+    n = len(ids)
+    tm = np.eye(n)
+    rmsd = np.zeros((n, n))
+    for row in rows:
+        i, j = index[row["pdb_1"]], index[row["pdb_2"]]
+        tm[i, j] = row["tm_score_1"]
+        tm[j, i] = row["tm_score_2"]
+        rmsd[i, j] = rmsd[j, i] = row["rmsd"]
+    return tm, rmsd
+
+
+def write_square(path, matrix, names, fmt):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f, delimiter="\t")
+        writer.writerow([""] + names)
+        for name, values in zip(names, matrix):
+            writer.writerow([name] + [fmt.format(v) for v in values])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the all-vs-all TM-align matrix")
+    parser.add_argument("pair_files", nargs="+")
+    parser.add_argument("--out-dir", default="results/matrix")
+    parser.add_argument("--ids", nargs="*", help="matrix order (default: ids found in pair files)")
+    parser.add_argument("--labels", nargs="*", default=[], help="PDB=name display labels")
+    args = parser.parse_args()
+
+    labels = dict(item.split("=", 1) for item in args.labels)
+    rows = [read_pair(path) for path in args.pair_files]
+    ids = args.ids or sorted({pdb for row in rows for pdb in (row["pdb_1"], row["pdb_2"])})
+    for row in rows:
+        row["label_1"] = labels.get(row["pdb_1"], row["pdb_1"])
+        row["label_2"] = labels.get(row["pdb_2"], row["pdb_2"])
+
+    missing = len(ids) * (len(ids) - 1) // 2 - len(rows)
+    if missing:
+        print(f"Warning: {missing} pair(s) missing; their matrix cells are reported as 0")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    with open(os.path.join(args.out_dir, "pairs.tsv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=PAIR_COLUMNS, delimiter="\t")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    names = [labels.get(pdb, pdb) for pdb in ids]
+    tm, rmsd = build_matrices(rows, ids)
+    write_square(os.path.join(args.out_dir, "tm_score.tsv"), tm, names, "{:.4f}")
+    write_square(os.path.join(args.out_dir, "rmsd.tsv"), rmsd, names, "{:.2f}")
+
+    print(f"Wrote {len(rows)} pair(s) over {len(ids)} structures to {args.out_dir}/")
+
+
+if __name__ == "__main__":
+    main()
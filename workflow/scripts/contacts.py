@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Contact and interface engine for multi-chain complexes.
+
+Heavy atoms (waters and hydrogens dropped) from the structure cache are
+binned into a cell list with cells one cutoff wide. Each cell is compared
+with itself and its 13 forward neighbours, so every atom pair within the
+cutoff is found once in near-linear time, with array operations only. The
+atom pairs are reduced to residue-residue contacts (number of atom pairs,
+minimum distance). Contact tables are cached per structure and cutoff
+next to the structure arrays (STRUCT_CACHE_DIR), so a structure shared
+by several comparisons, or a panel rerun, is only searched once.
+
+Derived tables, written per structure:
+  <name>_residue_contacts.tsv  residue pairs in contact; pairs in the same
+                               chain fewer than MIN_SEQ_SEP residues apart
+                               are chain neighbours and left out
+  <name>_residue_counts.tsv    per residue: contact partners in protein,
+                               DNA, RNA and ligand residues, plus the
+                               residue's config domains. Protein residues
+                               with DNA partners include the PAM-interacting
+                               ones; those with RNA partners bind the guide
+  <name>_interfaces.tsv        chain-chain interfaces (residue and atom
+                               contacts, interface residues on each side)
+                               and contacts between the config domains of
+                               the first protein chain
+
+Usage:
+  python workflow/scripts/contacts.py --structure store/pdb/5B2O.pdb FnCas9
+      [--structure ...] [--domain FnCas9 REC 1-500 ...] [--cutoff 4.5]
+      [--out-dir results/contacts]
+  python workflow/scripts/contacts.py store/pdb/*.pdb   # panel summary only
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+from render_cache import file_digest
+from structure_cache import AMINO_ACIDS, DEFAULT_CACHE_DIR, DNA_BASES, RNA_BASES, WATERS, cached_structure
+
+DEFAULT_CUTOFF = 4.5
+MIN_SEQ_SEP = 3
+ENGINE_VERSION = 1
+
+CLASSES = ("protein", "dna", "rna", "ligand")
+
+# 13 forward neighbour offsets: with the cell itself, every cell pair once
+_FORWARD = [off for off in itertools.product((-1, 0, 1), repeat=3) if off > (0, 0, 0)]
+
+
+# ───────────────────────── neighbour search ─────────────────────────
+def atom_pairs(coords, cutoff=DEFAULT_CUTOFF):
+    """Index pairs (i < j) and distances of all points within cutoff (cell list)."""
+    coords = np.asarray(coords, dtype=np.float64)
+    cell = np.floor((coords - coords.min(axis=0)) / cutoff).astype(np.int64) + 1
+    dims = cell.max(axis=0) + 2
+    key = (cell[:, 0] * dims[1] + cell[:, 1]) * dims[2] + cell[:, 2]
+    order = np.argsort(key, kind="stable")
+    key_sorted = key[order]
+    cells, starts, counts = np.unique(key_sorted, return_index=True, return_counts=True)
+
+    found_i, found_j = [], []
+    for off in [(0, 0, 0)] + _FORWARD:
+        shift = (off[0] * dims[1] + off[1]) * dims[2] + off[2]
+        slot = np.searchsorted(cells, key_sorted + shift)
+        slot = np.minimum(slot, len(cells) - 1)
+        hit = cells[slot] == key_sorted + shift
+        a = np.flatnonzero(hit)
+        n = counts[slot[a]]
+        # Every sorted atom a against every atom of its neighbour cell
+        first = np.repeat(starts[slot[a]] - np.cumsum(n) + n, n) + np.arange(n.sum())
+        ia = np.repeat(a, n)
+        if off == (0, 0, 0):
+            keep = first > ia
+            ia, first = ia[keep], first[keep]
+        i, j = order[ia], order[first]
+        d = np.linalg.norm(coords[i] - coords[j], axis=1)
+        close = d <= cutoff
+        found_i.append(np.minimum(i, j)[close])
+        found_j.append(np.maximum(i, j)[close])
+    i, j = np.concatenate(found_i), np.concatenate(found_j)
+    return i, j, np.linalg.norm(coords[i] - coords[j], axis=1)
+
+
+# ───────────────────────── residues ─────────────────────────
+def _residue_class(resn, hetatm):
+    cls = np.full(len(resn), CLASSES.index("ligand"), dtype=np.int8)
+    cls[np.isin(resn, list(AMINO_ACIDS)) & ~hetatm] = CLASSES.index("protein")
+    cls[np.isin(resn, list(DNA_BASES))] = CLASSES.index("dna")
+    cls[np.isin(resn, list(RNA_BASES))] = CLASSES.index("rna")
+    return cls
+
+
+def residue_contacts(data, cutoff=DEFAULT_CUTOFF, min_seq_sep=MIN_SEQ_SEP):
+    """
+    Residue table and residue-residue contacts of one structure's arrays.
+    Returns a dict of flat arrays: res_* per residue, pair_* per contact.
+    """
+    heavy = ~np.isin(data["resn"], list(WATERS)) & (data["element"] != b"H") & (data["element"] != b"D")
+    chain, resi, icode = data["chain"][heavy], data["resi"][heavy], data["icode"][heavy]
+    # Residue index of every atom (residues are contiguous in PDB order)
+    new = np.ones(len(resi), dtype=bool)
+    new[1:] = (chain[1:] != chain[:-1]) | (resi[1:] != resi[:-1]) | (icode[1:] != icode[:-1])
+    atom_res = np.cumsum(new) - 1
+    first = np.flatnonzero(new)
+    table = {
+        "res_chain": chain[first], "res_resi": resi[first], "res_icode": icode[first],
+        "res_resn": data["resn"][heavy][first],
+        "res_class": _residue_class(data["resn"][heavy][first], data["hetatm"][heavy][first]),
+    }
+
+    i, j, d = atom_pairs(data["coords"][heavy], cutoff)
+    ri, rj = atom_res[i], atom_res[j]
+    same_chain = table["res_chain"][ri] == table["res_chain"][rj]
+    near = same_chain & (np.abs(table["res_resi"][ri] - table["res_resi"][rj]) < min_seq_sep)
+    keep = (ri != rj) & ~near
+    ri, rj, d = ri[keep], rj[keep], d[keep]
+    # ri < rj already holds (atoms are in residue order); group atom pairs per residue pair
+    pair_key = ri.astype(np.int64) * len(first) + rj
+    order = np.argsort(pair_key, kind="stable")
+    pair_key, d = pair_key[order], d[order]
+    unique, starts, counts = np.unique(pair_key, return_index=True, return_counts=True)
+    table.update({
+        "pair_i": (unique // len(first)).astype(np.int32),
+        "pair_j": (unique % len(first)).astype(np.int32),
+        "pair_atoms": counts.astype(np.int32),
+        "pair_min_dist": (np.minimum.reduceat(d, starts) if len(d) else d).astype(np.float32),
+    })
+    return table
+
+
+def cache_path(pdb_path, cutoff=DEFAULT_CUTOFF, cache_dir=None):
+    """Content-addressed contact table location for a PDB file and cutoff."""
+    cache_dir = cache_dir or os.environ.get("STRUCT_CACHE_DIR", DEFAULT_CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(pdb_path))[0]
+    key = hashlib.sha256(
+        f"{file_digest(pdb_path)}:{cutoff}:{MIN_SEQ_SEP}:{ENGINE_VERSION}".encode()
+    ).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{stem}-contacts-{cutoff:g}-{key}.npz")
+
+
+def structure_contacts(pdb_path, cutoff=DEFAULT_CUTOFF, cache_dir=None):
+    """Contact tables of a PDB file, computed into the cache on first use."""
+    path = cache_path(pdb_path, cutoff, cache_dir)
+    if os.path.exists(path):
+        with np.load(path, allow_pickle=False) as npz:
+            return {field: npz[field] for field in npz.files}
+    table = residue_contacts(cached_structure(pdb_path), cutoff)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"  # store is shared across runs
+    np.savez(tmp, **table)
+    os.replace(tmp, path)
+    return table
+
+
+# ───────────────────────── derived tables ─────────────────────────
+def _resi_mask(resi, ranges):
+    """Residues inside PyMOL-style ranges, e.g. '1-200+500-800'."""
+    mask = np.zeros(len(resi), dtype=bool)
+    for part in str(ranges).split("+"):
+        start, _, stop = part.partition("-")
+        mask |= (resi >= int(start)) & (resi <= int(stop or start))
+    return mask
+
+
+def domain_masks(table, domains):
+    """Per config domain, the residues of the first protein chain inside it."""
+    protein = table["res_class"] == CLASSES.index("protein")
+    if not protein.any():
+        return {}
+    chain = table["res_chain"][protein][0]
+    in_chain = protein & (table["res_chain"] == chain)
+    return {name: in_chain & _resi_mask(table["res_resi"], ranges)
+            for name, ranges in (domains or {}).items()}
+
+
+def residue_counts(table):
+    """(n_residues, len(CLASSES)) contact partner counts by partner class."""
+    counts = np.zeros((len(table["res_chain"]), len(CLASSES)), dtype=np.int32)
+    i, j = table["pair_i"], table["pair_j"]
+    np.add.at(counts, (i, table["res_class"][j]), 1)
+    np.add.at(counts, (j, table["res_class"][i]), 1)
+    return counts
+
+
+def interfaces(table, domains=None):
+    """Rows of chain-chain interfaces and config-domain contacts."""
+    rows = []
+    i, j = table["pair_i"], table["pair_j"]
+    chain_i, chain_j = table["res_chain"][i], table["res_chain"][j]
+    inter = chain_i != chain_j
+    lo = np.where(chain_i < chain_j, chain_i, chain_j)
+    hi = np.where(chain_i < chain_j, chain_j, chain_i)
+    for a, b in sorted(set(zip(lo[inter].tolist(), hi[inter].tolist()))):
+        sel = inter & (lo == a) & (hi == b)
+        side_a = np.where(chain_i[sel] == a, i[sel], j[sel])
+        side_b = np.where(chain_i[sel] == a, j[sel], i[sel])
+        rows.append(["chain", a.decode(), b.decode(), int(sel.sum()),
+                     int(table["pair_atoms"][sel].sum()), len(np.unique(side_a)), len(np.unique(side_b))])
+    masks = domain_masks(table, domains)
+    for (name_a, mask_a), (name_b, mask_b) in itertools.combinations(masks.items(), 2):
+        # Residues in both (nested) domains count for neither side
+        only_a, only_b = mask_a & ~mask_b, mask_b & ~mask_a
+        ab, ba = only_a[i] & only_b[j], only_b[i] & only_a[j]
+        sel = ab | ba
+        side_a = np.where(ab, i, j)[sel]
+        side_b = np.where(ab, j, i)[sel]
+        rows.append(["domain", name_a, name_b, int(sel.sum()), int(table["pair_atoms"][sel].sum()),
+                     len(np.unique(side_a)), len(np.unique(side_b))])
+    return rows
+
+
+def _residue_label(table, k):
+    return (table["res_chain"][k].decode(), f"{table['res_resi'][k]}{table['res_icode'][k].decode()}",
+            table["res_resn"][k].decode(), CLASSES[table["res_class"][k]])
+
+
+def write_tables(table, out_dir, name, domains=None):
+    """Write the three TSV tables of one structure; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, f"{name}_{kind}.tsv")
+             for kind in ("residue_contacts", "residue_counts", "interfaces")]
+
+    with open(paths[0], "w", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(["chain_1", "resi_1", "resn_1", "class_1",
+                         "chain_2", "resi_2", "resn_2", "class_2", "atom_pairs", "min_distance"])
+        for i, j, n, d in zip(table["pair_i"].tolist(), table["pair_j"].tolist(),
+                              table["pair_atoms"].tolist(), table["pair_min_dist"].tolist()):
+            writer.writerow([*_residue_label(table, i), *_residue_label(table, j), n, f"{d:.2f}"])
+
+    counts = residue_counts(table)
+    masks = domain_masks(table, domains)
+    with open(paths[1], "w", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(["chain", "resi", "resn", "class", *CLASSES, "domains"])
+        for k in np.flatnonzero(counts.sum(axis=1)).tolist():
+            in_domains = "+".join(name for name, mask in masks.items() if mask[k])
+            writer.writerow([*_residue_label(table, k), *counts[k].tolist(), in_domains])
+
+    with open(paths[2], "w", newline="") as f:
+        writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+        writer.writerow(["level", "side_1", "side_2", "residue_contacts", "atom_contacts",
+                         "residues_1", "residues_2"])
+        writer.writerows(interfaces(table, domains))
+    return paths
+
+
+def summary(table):
+    """Headline numbers of one structure's contacts."""
+    counts = residue_counts(table)
+    protein = table["res_class"] == CLASSES.index("protein")
+    return {
+        "residues": int(len(table["res_chain"])),
+        "contacts": int(len(table["pair_i"])),
+        "chains": int(len(np.unique(table["res_chain"]))),
+        "dna_binding": int((protein & (counts[:, CLASSES.index("dna")] > 0)).sum()),
+        "rna_binding": int((protein & (counts[:, CLASSES.index("rna")] > 0)).sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Residue contacts and interfaces of PDB structures")
+    parser.add_argument("pdb", nargs="*", help="Structures to summarise (panel mode)")
+    parser.add_argument("--structure", nargs=2, action="append", default=[], metavar=("PDB", "NAME"),
+                        help="Structure whose tables are written, named NAME")
+    parser.add_argument("--domain", nargs=3, action="append", default=[], metavar=("NAME", "DOMAIN", "RANGES"),
+                        help="Domain of structure NAME, e.g. FnCas9 REC 1-500")
+    parser.add_argument("--cutoff", type=float, default=DEFAULT_CUTOFF, help="Heavy-atom contact distance (A)")
+    parser.add_argument("--out-dir", help="Directory for the per-structure TSV tables")
+    args = parser.parse_args()
+    if not args.pdb and not args.structure:
+        parser.error("give PDB files and/or --structure PDB NAME")
+    if args.structure and not args.out_dir:
+        parser.error("--structure needs --out-dir")
+
+    domains = {}
+    for name, domain, ranges in args.domain:
+        domains.setdefault(name, {})[domain] = ranges
+    structures = [(path, os.path.splitext(os.path.basename(path))[0], False) for path in args.pdb]
+    structures += [(path, name, True) for path, name in args.structure]
+
+    start = time.perf_counter()
+    for path, name, write in structures:
+        table = structure_contacts(path, args.cutoff)
+        s = summary(table)
+        print(f"{name:<16} {s['chains']:>3} chains {s['residues']:>6} residues {s['contacts']:>7} contacts "
+              f"{s['dna_binding']:>5} DNA-binding {s['rna_binding']:>5} RNA-binding residues")
+        if write:
+            write_tables(table, args.out_dir, name, domains.get(name))
+    print(f"{len(structures)} structures in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
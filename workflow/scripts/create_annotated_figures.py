@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Create annotated figures with domain labels for a structure-pair comparison.
+Labels and protein descriptions come from config/config.yaml.
+Annotation positions are given for 1600x1200 renders and scaled to the
+actual view size, so draft renders (render_quality.py) line up as well.
+
+The four figures are independent: each is described as a spec and drawn
+straight onto the render buffers by figure_compose.py, in parallel worker
+processes (one per figure, up to the rule's threads).
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import os
+
+from figure_compose import build
+from render_quality import figure_dpi
+
+# Resolution stored in the saved figures follows the render quality tier
+FIGURE_DPI = figure_dpi()
+
+# Create output directory
+output_dir = os.path.dirname(snakemake.output[0])
+views_dir = os.path.dirname(snakemake.input.views[0])
+os.makedirs(output_dir, exist_ok=True)
+
+label_1, label_2 = snakemake.params.labels
+protein_1, protein_2 = snakemake.params.proteins
+same_system = protein_1.get("system") == protein_2.get("system")
+
+
+def part_name(protein):
+    """Bilobed proteins have lobes, the others domains."""
+    return "lobe" if protein.get("architecture") == "Bilobed" else "domain"
+
+def figure(kind, name, **args):
+    return {"kind": kind, "output": f"{output_dir}/{name}", "dpi": FIGURE_DPI, "args": args}
+
+figures = []
+
+# Annotate domain-colored view
+domain_annotations = [
+    {'type': 'text', 'x': 200, 'y': 100, 'text': label_1, 'fontsize': 18, 'color': 'darkred'},
+    {'type': 'text', 'x': 1200, 'y': 100, 'text': label_2, 'fontsize': 18, 'color': 'darkblue'},
+    {'type': 'text', 'x': 300, 'y': 300, 'text': f'REC {part_name(protein_1)}', 'fontsize': 14, 'color': 'black', 'bgcolor': 'salmon'},
+    {'type': 'text', 'x': 400, 'y': 500, 'text': f'NUC {part_name(protein_1)}', 'fontsize': 14, 'color': 'white', 'bgcolor': 'darkred'},
+    {'type': 'text', 'x': 1000, 'y': 300, 'text': f'REC {part_name(protein_2)}', 'fontsize': 14, 'color': 'black', 'bgcolor': 'lightblue'},
+    {'type': 'text', 'x': 900, 'y': 500, 'text': f'NUC {part_name(protein_2)}', 'fontsize': 14, 'color': 'white', 'bgcolor': 'darkblue'},
+    {'type': 'arrow', 'x1': 350, 'y1': 330, 'x2': 400, 'y2': 380, 'color': 'black'},
+    {'type': 'arrow', 'x1': 450, 'y1': 530, 'x2': 500, 'y2': 580, 'color': 'black'},
+]
+
+if os.path.exists(f"{views_dir}/domains_colored.png"):
+    figures.append(figure("annotate", "domains_annotated.png",
+                          image=f"{views_dir}/domains_colored.png",
+                          annotations=domain_annotations))
+
+# Annotate front view with key differences
+front_annotations = [
+    {'type': 'text', 'x': 100, 'y': 100, 'text': f'{label_1} vs {label_2} Structural Overlay',
+     'fontsize': 20, 'weight': 'bold'},
+    {'type': 'text', 'x': 100, 'y': 1100, 'text': 'Key Similarities:' if same_system else 'Key Differences:',
+     'fontsize': 16, 'weight': 'bold'},
+]
+highlights = [(label, line) for label, protein in ((label_1, protein_1), (label_2, protein_2))
+              for line in protein.get("highlights", [])]
+for i, (label, line) in enumerate(highlights):
+    front_annotations.append({'type': 'text', 'x': 100, 'y': 1140 + 30 * i,
+                              'text': f'• {label}: {line}', 'fontsize': 14})
+
+if os.path.exists(f"{views_dir}/front_view.png"):
+    figures.append(figure("annotate", "front_annotated.png",
+                          image=f"{views_dir}/front_view.png",
+                          annotations=front_annotations))
+
+# Composite panel combining the four views
+panels = [
+    ("A. Front View", f"{views_dir}/front_view.png"),
+    ("B. Side View (90° rotation)", f"{views_dir}/side_view.png"),
+    ("C. Domain Architecture", f"{views_dir}/domains_colored.png"),
+    ("D. Active Site Residues", f"{views_dir}/active_site_zoom.png"),
+]
+if all(os.path.exists(path) for _, path in panels):
+    figures.append(figure("panel_grid", "composite_panel.png", panels=panels,
+                          title=f"Structural Comparison of {label_1} and {label_2}",
+                          footer=f"{label_1} (red) | {label_2} (blue)"))
+else:
+    print("Warning: Not all view files exist")
+
+# Closing notes of the publication figure text panel
+DIVERGENT_FOLD_NOTES = [
+    "Overall fold divergence",
+    "Different domain organization",
+    "Distinct PAM recognition",
+    "Alternative cleavage mechanisms",
+]
+SHARED_FOLD_NOTES = [
+    "Conserved bilobed fold",
+    "Same domain organization",
+    "Species-specific PAM recognition",
+    "Same cleavage mechanism",
+]
+
+# Publication-ready figure: domain view beside the structured annotations
+annotations_text = "\nSTRUCTURAL COMPARISON\n\n"
+for label, protein in ((label_1, protein_1), (label_2, protein_2)):
+    annotations_text += f"{protein.get('name', label)} ({label})\n"
+    for line in protein.get("summary", []):
+        annotations_text += f"  {line}\n" if line.startswith(" ") else f"• {line}\n"
+    annotations_text += "\n"
+annotations_text += "Key Structural Similarities\n" if same_system else "Key Structural Differences\n"
+for line in SHARED_FOLD_NOTES if same_system else DIVERGENT_FOLD_NOTES:
+    annotations_text += f"• {line}\n"
+
+figures.append(figure("text_panel", "publication_figure.png",
+                      image=f"{views_dir}/domains_colored.png", text=annotations_text.rstrip("\n"),
+                      title=f"{label_1} vs {label_2}: Structural and Functional Comparison"))
+
+# ───────────────────────── build ─────────────────────────
+workers = max(1, min(snakemake.threads, len(figures)))
+if workers == 1:
+    created = [build(spec) for spec in figures]
+else:
+    # fork: Snakemake runs this file as __main__, which spawned workers would re-run
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("fork")) as pool:
+        created = list(pool.map(build, figures))
+
+print(f"\nAll annotated figures created in {output_dir}/")
+print("Files created:")
+for path in created:
+    print(f"  - {os.path.basename(path)}")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Create a properly colored overlay visualization using the original PDB files
+and TM-align transformation matrix.
+"""
+import os
+
+label_1, label_2 = snakemake.params.labels
+protein_1, protein_2 = snakemake.params.proteins
+pdb_1, pdb_2 = snakemake.input.pdb1, snakemake.input.pdb2
+results = os.path.dirname(os.path.dirname(snakemake.output[0]))
+
+# Domain selections and REC/NUC colors from config/config.yaml
+domain_colors = [{"REC": "salmon", "NUC": "tv_red"}, {"REC": "lightblue", "NUC": "tv_blue"}]
+domain_lines = []
+for label, protein in ((label_1, protein_1), (label_2, protein_2)):
+    domain_lines.append(f"# {label} domains")
+    for domain, residues in protein.get("domains", {}).items():
+        domain_lines.append(f"select {label}_{domain}, {label} and resi {residues}")
+    domain_lines.append("")
+domain_lines.append("# Color domains")
+for label, protein, colors in zip((label_1, label_2), (protein_1, protein_2), domain_colors):
+    for domain, color in colors.items():
+        if domain in protein.get("domains", {}):
+            domain_lines.append(f"color {color}, {label}_{domain}")
+domain_commands = "\n".join(domain_lines)
+
+catalytic_1 = f"{label_1} and resi {protein_1.get('catalytic', '0')}"
+catalytic_2 = f"{label_2} and resi {protein_2.get('catalytic', '0')}"
+
+# Create a PyMOL script
+pymol_script = f"""
+# Load original structures
+load {pdb_1}, {label_1}
+load {pdb_2}, {label_2}
+
+# Apply colors
+color firebrick, {label_1}
+color marine, {label_2}
+
+# Display settings
+hide everything
+show cartoon
+set cartoon_fancy_helices, 1
+set cartoon_transparency, 0.0
+bg_color white
+set ray_shadows, 0
+
+# Orient and center
+orient
+zoom all, buffer=5
+
+# Create views directory
+import os
+os.makedirs("{results}/pymol/views", exist_ok=True)
+
+# View 1: Front
+ray 1600, 1200
+png {results}/pymol/views/overlay_front.png, dpi=300
+
+# View 2: Side  
+turn y, 90
+ray 1600, 1200
+png {results}/pymol/views/overlay_side.png, dpi=300
+
+# View 3: Top
+turn y, -90
+turn x, 90
+ray 1600, 1200
+png {results}/pymol/views/overlay_top.png, dpi=300
+
+# Reset view
+orient
+
+# Highlight domains with different colors
+{domain_commands}
+
+# Domain view
+ray 1600, 1200
+png {results}/pymol/views/overlay_domains.png, dpi=300
+
+# Active site focus
+# Reset colors
+color firebrick, {label_1}
+color marine, {label_2}
+
+# Zoom on catalytic residues
+zoom ({catalytic_1}) or ({catalytic_2}), buffer=15
+show sticks, ({catalytic_1}) or ({catalytic_2})
+color yellow, ({catalytic_1} and elem C)
+color cyan, ({catalytic_2} and elem C)
+ray 1600, 1200
+png {results}/pymol/views/overlay_active_site.png, dpi=300
+
+# Save session
+orient
+zoom all, buffer=5
+save {results}/pymol/views/colored_overlay.pse
+
+# Create main output
+ray 1600, 1200
+png {results}/pymol/Fn_overlay_colored.png, dpi=300
+
+quit
+"""
+
+# Write PyMOL script
+script_path = snakemake.output[0]
+os.makedirs(os.path.dirname(script_path), exist_ok=True)
+
+with open(script_path, "w") as f:
+    f.write(pymol_script)
+
+print(f"Created PyMOL script: {script_path}")
+print(f"To run (from the repository root): pymol -c {script_path}")
+print("\nOr run interactively:")
+print("  pymol")
+print(f"  @{script_path}")
\ No newline at end of file
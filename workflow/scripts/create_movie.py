@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Create an animated GIF, WebP or MP4 from PyMOL movie frames.
+
+Frames are streamed: only the current (and, for GIF, the previous) frame
+is held in memory, so long high-resolution rotations encode in constant
+memory. The output format follows the file extension:
+
+  .gif   one global palette computed from a sample of frames; every frame
+         after the first stores only the rectangle that changed, with
+         unchanged pixels inside it transparent, and identical frames are
+         merged into one longer frame
+  .webp  libwebp animation (Pillow); sub-frame rectangles are chosen by
+         the encoder
+  .mp4   H.264 through an ffmpeg pipe
+
+write_movies encodes one frame stream into several formats at once (one
+encoder thread per output, each fed through a bounded queue); the render
+daemon uses it to encode frames straight from PyMOL without PNG files.
+
+Requires: pip install pillow numpy (and ffmpeg on PATH for .mp4)
+"""
+import argparse
+import glob
+import io
+import itertools
+import os
+import queue
+import struct
+import subprocess
+import sys
+import threading
+
+import numpy as np
+from PIL import Image
+
+PALETTE_COLORS = 255     # index 255 is reserved for transparency
+TRANSPARENT = 255
+PALETTE_SAMPLE = 16      # frames sampled for the global palette
+_SAMPLE_SIDE = 256       # sampled frames are downscaled to this size
+
+
+def frame_files(frames_dir):
+    return sorted(glob.glob(os.path.join(frames_dir, "frame_*.png")))
+
+
+def load_frame(path):
+    """Read one frame as RGB and release the file handle."""
+    with Image.open(path) as img:
+        return img.convert("RGB")
+
+
+# ───────────────────────── palette ─────────────────────────
+def build_palette(samples, colors=PALETTE_COLORS):
+    """Global palette image from a few representative frames."""
+    thumbs = []
+    for img in samples:
+        thumb = img.convert("RGB")
+        thumb.thumbnail((_SAMPLE_SIDE, _SAMPLE_SIDE))
+        thumbs.append(thumb)
+    mosaic = Image.new("RGB", (sum(t.width for t in thumbs), max(t.height for t in thumbs)))
+    x = 0
+    for thumb in thumbs:
+        mosaic.paste(thumb, (x, 0))
+        x += thumb.width
+    quantized = mosaic.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
+    rgb = quantized.getpalette()[:colors * 3]
+    rgb += rgb[-3:] * (colors - len(rgb) // 3)   # pad by repeating the last colour
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(rgb)
+    return palette
+
+
+def sample_frames(paths, n=PALETTE_SAMPLE):
+    """Evenly spaced frames across the rotation, downscaled for build_palette."""
+    picks = np.linspace(0, len(paths) - 1, num=min(n, len(paths))).round().astype(int)
+    samples = []
+    for i in sorted(set(picks)):
+        frame = load_frame(paths[i])
+        frame.thumbnail((_SAMPLE_SIDE, _SAMPLE_SIDE))
+        samples.append(frame)
+    return samples
+
+
+def to_indices(img, palette):
+    """Map an RGB frame onto the global palette (no dithering: stable pixels between frames)."""
+    return np.asarray(img.convert("RGB").quantize(palette=palette, dither=Image.Dither.NONE))
+
+
+# ───────────────────────── GIF ─────────────────────────
+def _lzw_blocks(indices, palette):
+    """LZW-compressed image data (min code size + sub-blocks) of an index array, via Pillow."""
+    img = Image.fromarray(indices, mode="P")
+    img.putpalette(palette.getpalette())
+    buf = io.BytesIO()
+    img.save(buf, format="GIF", optimize=False, interlace=False)
+    data = buf.getvalue()
+    pos = 13
+    if data[10] & 0x80:                      # skip Pillow's global colour table
+        pos += 3 << ((data[10] & 7) + 1)
+    while data[pos] == 0x21:                 # skip extensions
+        pos += 2
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    if data[pos] != 0x2C:
+        raise ValueError("Unexpected GIF layout from Pillow")
+    flags = data[pos + 9]
+    pos += 10
+    if flags & 0xC0:
+        raise ValueError("Pillow wrote a local colour table or interlaced data")
+    start = pos
+    pos += 1                                 # LZW minimum code size
+    while data[pos]:
+        pos += data[pos] + 1
+    return data[start:pos + 1]
+
+
+class GifWriter:
+    """Streaming GIF89a writer with a global palette and changed-region frames."""
+
+    def __init__(self, path, size, palette, duration=100, loop=0):
+        self.palette = palette
+        self.duration = duration
+        self._fp = open(path, "wb")
+        self._prev = None
+        self._pending = None   # (x, y, indices, transparent, delay_ms) not yet written
+        self.frames_written = 0
+        width, height = size
+        rgb = bytes(palette.getpalette()[:768]).ljust(768, b"\0")
+        self._fp.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF7, 0, 0) + rgb)
+        self._fp.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\0")
+
+    def add(self, img):
+        indices = to_indices(img, self.palette)
+        if self._prev is None:
+            self._queue(0, 0, indices, False)
+        else:
+            changed = indices != self._prev
+            if not changed.any():
+                self._pending = self._pending[:4] + (self._pending[4] + self.duration,)
+                return
+            rows = np.flatnonzero(changed.any(axis=1))
+            cols = np.flatnonzero(changed.any(axis=0))
+            y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+            region = indices[y0:y1, x0:x1].copy()
+            region[~changed[y0:y1, x0:x1]] = TRANSPARENT
+            self._queue(int(x0), int(y0), region, True)
+        self._prev = indices
+
+    def _queue(self, x, y, indices, transparent):
+        if self._pending is not None:
+            self._write(*self._pending)
+        self._pending = (x, y, indices, transparent, self.duration)
+
+    def _write(self, x, y, indices, transparent, delay_ms):
+        height, width = indices.shape
+        packed = (1 << 2) | int(transparent)          # disposal 1: keep the frame
+        self._fp.write(b"\x21\xF9\x04" + struct.pack("<BHB", packed, round(delay_ms / 10), TRANSPARENT) + b"\0")
+        self._fp.write(b"\x2C" + struct.pack("<HHHHB", x, y, width, height, 0))
+        self._fp.write(_lzw_blocks(indices, self.palette))
+        self.frames_written += 1
+
+    def close(self):
+        if self._pending is not None:
+            self._write(*self._pending)
+            self._pending = None
+        self._fp.write(b"\x3B")
+        self._fp.close()
+
+
+# ───────────────────────── WebP / MP4 ─────────────────────────
+class _FrameStream(Image.Image):
+    """
+    Multi-frame image whose frames are pulled from an iterator on seek(), so
+    Pillow's animated WebP writer sees one frame at a time.
+    """
+
+    def __init__(self, frames, n_frames, first):
+        super().__init__()
+        self._frames = frames
+        self.n_frames = n_frames
+        self.is_animated = n_frames > 1
+        self._index = 0
+        self._show(first)
+
+    def _show(self, frame):
+        frame = frame.convert("RGB")
+        self.im = frame.im
+        self._size = frame.size
+        try:
+            self.mode = frame.mode
+        except AttributeError:  # read-only property since Pillow 10.1
+            self._mode = frame.mode
+
+    def seek(self, frame):
+        if frame == self._index + 1:
+            self._show(next(self._frames))
+        elif frame > self._index:
+            raise EOFError("Frames can only be read in order")
+        # Seeking back only happens when the writer restores its start
+        # position after encoding; the pixels are no longer needed then
+        self._index = frame
+
+    def tell(self):
+        return self._index
+
+
+def write_webp(frames, n_frames, path, duration=100, quality=80, lossless=False):
+    frames = iter(frames)
+    stream = _FrameStream(frames, n_frames, next(frames))
+    stream.save(path, format="WEBP", save_all=True, duration=duration, loop=0,
+                quality=quality, lossless=lossless, minimize_size=True)
+
+
+def write_mp4(frames, size, path, duration=100, crf=20):
+    width, height = size
+    cmd = ["ffmpeg", "-loglevel", "error", "-y",
+           "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+           "-framerate", f"{1000 / duration:g}", "-i", "-",
+           "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",   # yuv420p needs even sizes
+           "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", str(crf),
+           "-movflags", "+faststart", path]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    try:
+        for frame in frames:
+            proc.stdin.write(frame.convert("RGB").tobytes())
+    finally:
+        proc.stdin.close()
+        if proc.wait():
+            raise RuntimeError(f"ffmpeg failed with exit code {proc.returncode}")
+
+
+# ───────────────────────── entry points ─────────────────────────
+def write_movie(frames, n_frames, output_path, duration=100, palette_samples=None,
+                quality=80):
+    """
+    Encode an iterator of frames (PIL images, all the same size) to
+    output_path; the format follows its extension. The GIF palette comes
+    from palette_samples or, when none are given, from the first
+    PALETTE_SAMPLE frames of the stream (read ahead).
+    """
+    frames = iter(frames)
+    first = next(frames)
+    ext = os.path.splitext(output_path)[1].lower()
+    if ext == ".gif" and not palette_samples:
+        head = list(itertools.islice(frames, PALETTE_SAMPLE - 1))
+        palette_samples = [first, *head]
+        frames = itertools.chain(head, frames)
+
+    def stream():
+        yield first
+        yield from frames
+
+    if ext == ".gif":
+        writer = GifWriter(output_path, first.size, build_palette(palette_samples), duration)
+        try:
+            for frame in stream():
+                writer.add(frame)
+        finally:
+            writer.close()
+        return writer.frames_written
+    if ext == ".webp":
+        write_webp(stream(), n_frames, output_path, duration, quality)
+    elif ext == ".mp4":
+        write_mp4(stream(), first.size, output_path, duration)
+    else:
+        raise ValueError(f"Unsupported movie format: {ext} (expected .gif, .webp or .mp4)")
+    return n_frames
+
+
+_END = object()
+
+
+def write_movies(frames, n_frames, outputs, duration=100, quality=80, queue_size=4):
+    """
+    Encode one iterator of frames into every path in outputs. Each output
+    gets an encoder thread reading from a bounded queue, so the frames are
+    produced once and the producer is held back when an encoder falls behind.
+    Returns the number of stored frames per output.
+    """
+    if len(outputs) == 1:
+        return [write_movie(frames, n_frames, outputs[0], duration, quality=quality)]
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in outputs]
+    written, errors = [0] * len(outputs), []
+
+    def encode(k):
+        ended = False
+
+        def received():
+            nonlocal ended
+            while True:
+                frame = queues[k].get()
+                if frame is _END:
+                    ended = True
+                    return
+                yield frame
+
+        try:
+            written[k] = write_movie(received(), n_frames, outputs[k], duration, quality=quality)
+        except Exception as exc:
+            errors.append(exc)
+            while not ended and queues[k].get() is not _END:   # keep the producer moving
+                pass
+
+    threads = [threading.Thread(target=encode, args=(k,), daemon=True) for k in range(len(outputs))]
+    for thread in threads:
+        thread.start()
+    try:
+        for frame in frames:
+            for q in queues:
+                q.put(frame)
+    finally:
+        for q in queues:
+            q.put(_END)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return written
+
+
+def create_movie(frames_dir, output_path, duration=100, quality=80):
+    """Encode frame_*.png in frames_dir to output_path, streaming frame by frame."""
+    paths = frame_files(frames_dir)
+    if not paths:
+        print(f"No frames found in {frames_dir}")
+        return False
+    samples = sample_frames(paths) if output_path.lower().endswith(".gif") else None
+    written = write_movie((load_frame(p) for p in paths), len(paths), output_path,
+                          duration, samples, quality)
+
+    print(f"Created {os.path.splitext(output_path)[1][1:].upper()}: {output_path}")
+    print(f"Frames: {len(paths)} ({written} stored)")
+    print(f"Duration: {duration}ms per frame")
+    print(f"Size: {os.path.getsize(output_path) / 1024:.0f} KiB")
+    return True
+
+
+def create_gif(frames_dir, output_path, duration=100):
+    """Create animated GIF from PNG frames."""
+    return create_movie(frames_dir, output_path, duration)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Encode PyMOL movie frames as GIF, WebP or MP4")
+    parser.add_argument("frames_dir", nargs="?", default="results/pymol/movie_frames")
+    parser.add_argument("output", nargs="?", default="results/pymol/Fn_overlay_rotation.gif",
+                        help="Output file; .gif, .webp or .mp4")
+    parser.add_argument("--duration", type=int, default=100, help="Milliseconds per frame")
+    parser.add_argument("--quality", type=int, default=80, help="WebP quality (0-100)")
+    args = parser.parse_args()
+
+    if not create_movie(args.frames_dir, args.output, args.duration, args.quality):
+        sys.exit(1)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+PIL-native compositing for the annotated figures.
+
+Labels, arrows, panel titles and text panels are drawn straight onto the
+render buffers, so every pixel of a view reaches the figure unresampled and
+a figure costs little more than decoding its views and encoding the result.
+Each figure is a plain-data spec (see build()) and independent of the
+others, so create_annotated_figures.py builds them in parallel processes.
+
+Annotations may reach past their view (the front view lists its highlights
+below the render); the view is then placed on a white canvas large enough
+for all of them, as matplotlib's bbox_inches="tight" used to do.
+
+Sizes (positions, font sizes in points, padding) are given for 1600-pixel
+wide views, as with the previous matplotlib figures, and scaled to the
+actual view width so draft renders (render_quality.py) line up as well.
+
+Fonts are DejaVu Sans (bold) and DejaVu Sans Mono: from FIGURE_FONT_DIR,
+matplotlib's bundled copies or the system font directory.
+
+Environment:
+  FIGURE_FONT_DIR   directory containing DejaVuSans*.ttf (optional)
+"""
+import functools
+import glob
+import importlib.util
+import math
+import os
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+# View width the spec coordinates refer to
+VIEW_WIDTH = 1600
+# Font pixels per point at VIEW_WIDTH (the matplotlib figures showed a
+# 1600-pixel view about 3400 pixels wide at 300 dpi: ~2 view pixels per point)
+PX_PER_PT = 2.0
+BACKGROUND = "white"
+
+_FONT_FILES = {
+    ("sans", "normal"): "DejaVuSans.ttf",
+    ("sans", "bold"): "DejaVuSans-Bold.ttf",
+    ("mono", "normal"): "DejaVuSansMono.ttf",
+    ("mono", "bold"): "DejaVuSansMono-Bold.ttf",
+}
+
+
+# ───────────────────────── fonts and colours ─────────────────────────
+def _font_dirs():
+    dirs = [os.environ.get("FIGURE_FONT_DIR")]
+    spec = importlib.util.find_spec("matplotlib")
+    if spec and spec.submodule_search_locations:
+        dirs += [os.path.join(path, "mpl-data", "fonts", "ttf")
+                 for path in spec.submodule_search_locations]
+    dirs += glob.glob("/usr/share/fonts/truetype/dejavu") + glob.glob("/usr/share/fonts/**/dejavu", recursive=True)
+    return [d for d in dirs if d and os.path.isdir(d)]
+
+
+@functools.lru_cache(maxsize=None)
+def font(size_px, family="sans", weight="bold"):
+    """TrueType font of size_px pixels (PIL's bitmap font if none is found)."""
+    name = _FONT_FILES[(family, "bold" if weight == "bold" else "normal")]
+    for directory in _font_dirs():
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return ImageFont.truetype(path, max(1, round(size_px)))
+    return ImageFont.load_default()
+
+
+def rgba(color, alpha=1.0):
+    """PIL colour tuple for a matplotlib-style colour name with an alpha."""
+    return ImageColor.getrgb(color)[:3] + (round(255 * alpha),)
+
+
+# ───────────────────────── primitives ─────────────────────────
+def text_box_bounds(draw, xy, text, size_px, weight="bold", family="sans", pad=0.3, anchor="ls"):
+    """(left, top, right, bottom) of the box text_box draws for these arguments."""
+    face = font(size_px, family, weight)
+    left, top, right, bottom = draw.multiline_textbbox(xy, text, font=face, anchor=anchor)
+    margin = pad * size_px
+    return (left - margin, top - margin, right + margin, bottom + margin)
+
+
+def text_box(draw, xy, text, size_px, color="black", bgcolor="white", weight="bold",
+             family="sans", alpha=0.8, pad=0.3, edgecolor="black", anchor="ls"):
+    """
+    Text with a rounded, semi-transparent box (matplotlib's
+    boxstyle="round,pad=..."; pad is in font sizes). Draw on an RGBA overlay.
+    """
+    face = font(size_px, family, weight)
+    box = text_box_bounds(draw, xy, text, size_px, weight, family, pad, anchor)
+    margin = pad * size_px
+    if bgcolor:
+        draw.rounded_rectangle(box, radius=margin, fill=rgba(bgcolor, alpha),
+                               outline=rgba(edgecolor) if edgecolor else None,
+                               width=max(1, round(size_px / 16)))
+    draw.multiline_text(xy, text, font=face, fill=rgba(color), anchor=anchor)
+    return box
+
+
+def _arrow_heads(start, end, width, head=None):
+    head = head or 6 * width
+    angle = math.atan2(end[1] - start[1], end[0] - start[0])
+    return [(end[0] + head * math.cos(a), end[1] + head * math.sin(a))
+            for a in (angle + math.pi + side * math.radians(25) for side in (-1, 1))]
+
+
+def arrow_bounds(start, end, width=2, head=None):
+    """(left, top, right, bottom) of the pixels arrow draws for these arguments."""
+    points = [start, end] + _arrow_heads(start, end, width, head)
+    xs, ys = [x for x, _ in points], [y for _, y in points]
+    return (min(xs) - width, min(ys) - width, max(xs) + width, max(ys) + width)
+
+
+def arrow(draw, start, end, color="black", width=2, head=None):
+    """Line from start to end with an open '->' head at end."""
+    draw.line([start, end], fill=rgba(color), width=width)
+    for tip in _arrow_heads(start, end, width, head):
+        draw.line([end, tip], fill=rgba(color), width=width)
+
+
+def _open(path):
+    img = Image.open(path)
+    img.load()
+    return img.convert("RGBA")
+
+
+def _scale(img):
+    return img.width / VIEW_WIDTH
+
+
+def _canvas(width, height):
+    return Image.new("RGBA", (round(width), round(height)), rgba(BACKGROUND))
+
+
+# ───────────────────────── figures ─────────────────────────
+def _annotation_args(ann, scale, offset=(0, 0)):
+    """Positional and keyword arguments of the primitive drawing one annotation."""
+    dx, dy = offset
+    if ann["type"] == "text":
+        # matplotlib anchors text at its left baseline, as does "ls"
+        return ((ann["x"] * scale + dx, ann["y"] * scale + dy), ann["text"],
+                ann.get("fontsize", 14) * PX_PER_PT * scale), {"weight": ann.get("weight", "bold")}
+    if ann["type"] == "arrow":
+        return (((ann["x1"] * scale + dx, ann["y1"] * scale + dy),
+                 (ann["x2"] * scale + dx, ann["y2"] * scale + dy)),
+                {"width": max(1, round(2 * PX_PER_PT * scale))})
+    raise ValueError(f"Unknown annotation type {ann['type']!r}")
+
+
+def annotation_layout(size, annotations):
+    """
+    Layout of an annotated view of `size` (width, height): (canvas size, view
+    offset on the canvas, [box of each annotation on the canvas]). The canvas
+    is the view grown to hold every annotation, plus a margin where text or
+    arrows reach past the view (the matplotlib figures were saved with
+    bbox_inches="tight" and grew the same way).
+    """
+    width, height = size
+    scale = width / VIEW_WIDTH
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    boxes = []
+    for ann in annotations:
+        args, kwargs = _annotation_args(ann, scale)
+        if ann["type"] == "text":
+            boxes.append(text_box_bounds(measure, *args, **kwargs))
+        else:
+            boxes.append(arrow_bounds(*args, **kwargs))
+    margin = 10 * scale
+    left = math.floor(min([0] + [box[0] - margin for box in boxes]))
+    top = math.floor(min([0] + [box[1] - margin for box in boxes]))
+    right = math.ceil(max([width] + [box[2] + margin for box in boxes]))
+    bottom = math.ceil(max([height] + [box[3] + margin for box in boxes]))
+    offset = (-left, -top)
+    boxes = [(l + offset[0], t + offset[1], r + offset[0], b + offset[1]) for l, t, r, b in boxes]
+    return (right - left, bottom - top), offset, boxes
+
+
+def annotate(image, annotations):
+    """View with text-box and arrow annotations, on a canvas large enough for all of them."""
+    img = _open(image)
+    scale = _scale(img)
+    size, offset, _ = annotation_layout(img.size, annotations)
+    figure = _canvas(*size)
+    figure.paste(img, offset)
+    overlay = Image.new("RGBA", figure.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    for ann in annotations:
+        args, kwargs = _annotation_args(ann, scale, offset)
+        if ann["type"] == "text":
+            text_box(draw, *args, color=ann.get("color", "black"),
+                     bgcolor=ann.get("bgcolor", "white"), **kwargs)
+        else:
+            arrow(draw, *args, color=ann.get("color", "black"), **kwargs)
+    return Image.alpha_composite(figure, overlay)
+
+
+def panel_grid(panels, title, footer, columns=2):
+    """
+    Grid of (title, view) panels under a figure title, with a footer line.
+    Views are pasted at their native size, centred in equal cells.
+    """
+    images = [_open(path) for _, path in panels]
+    scale = _scale(images[0])
+    cell_w = max(img.width for img in images)
+    cell_h = max(img.height for img in images)
+    title_px, panel_px, footer_px = 20 * PX_PER_PT * scale, 16 * PX_PER_PT * scale, 14 * PX_PER_PT * scale
+    gap = round(0.6 * panel_px)
+    head = round(2 * panel_px)        # panel title strip
+    top = round(2.2 * title_px)       # figure title strip
+    rows = math.ceil(len(images) / columns)
+    width = columns * cell_w + (columns + 1) * gap
+    height = top + rows * (head + cell_h + gap) + round(2.5 * footer_px)
+
+    figure = _canvas(width, height)
+    draw = ImageDraw.Draw(figure)
+    draw.text((width / 2, top / 2), title, font=font(title_px), fill=rgba("black"), anchor="mm")
+    for k, ((label, _), img) in enumerate(zip(panels, images)):
+        row, col = divmod(k, columns)
+        x = gap + col * (cell_w + gap)
+        y = top + row * (head + cell_h + gap)
+        draw.text((x, y + head - 0.4 * panel_px), label, font=font(panel_px),
+                  fill=rgba("black"), anchor="ls")
+        figure.paste(img, (x + (cell_w - img.width) // 2, y + head + (cell_h - img.height) // 2))
+    draw.text((width / 2, height - 1.25 * footer_px), footer, font=font(footer_px, weight="normal"),
+              fill=rgba("black"), anchor="mm")
+    return figure
+
+
+def text_panel(image, text, title):
+    """A view beside a monospaced text panel in a grey box, under a title."""
+    img = _open(image) if image and os.path.exists(image) else None
+    scale = _scale(img) if img else 1.0
+    view_w, view_h = (img.width, img.height) if img else (VIEW_WIDTH, round(0.75 * VIEW_WIDTH))
+    title_px, text_px = 18 * PX_PER_PT * scale, 12 * PX_PER_PT * scale
+    top = round(2.2 * title_px)
+    gap = round(text_px)
+    origin = (0.05 * view_w, 0.05 * view_h)
+    # Long annotation text makes the figure taller rather than being clipped
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    text_bottom = measure.multiline_textbbox(origin, text, font=font(text_px, "mono", "normal"),
+                                             anchor="la")[3] + text_px
+
+    figure = _canvas(2 * view_w + 3 * gap, top + max(view_h, text_bottom) + gap)
+    draw = ImageDraw.Draw(figure)
+    draw.text((figure.width / 2, top / 2), title, font=font(title_px), fill=rgba("black"), anchor="mm")
+    if img:
+        figure.paste(img, (gap, top))
+    overlay = Image.new("RGBA", figure.size, (0, 0, 0, 0))
+    text_box(ImageDraw.Draw(overlay), (2 * gap + view_w + origin[0], top + origin[1]), text,
+             text_px, weight="normal", family="mono", bgcolor="lightgray", pad=0.5,
+             edgecolor=None, anchor="la")
+    return Image.alpha_composite(figure, overlay)
+
+
+KINDS = {"annotate": annotate, "panel_grid": panel_grid, "text_panel": text_panel}
+
+
+def build(spec):
+    """
+    Build and save one figure. spec: {"kind": one of KINDS, "output": path,
+    "dpi": resolution stored in the PNG, "args": keyword arguments}.
+    """
+    figure = KINDS[spec["kind"]](**spec["args"])
+    dpi = spec.get("dpi")
+    figure.convert("RGB").save(spec["output"], dpi=(dpi, dpi) if dpi else None)
+    return spec["output"]
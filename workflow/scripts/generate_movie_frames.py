@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Generate rotation movie frames for a structure-pair overlay
+
+This is the one stage that renders the rotation: a full turn about --axis in
+--step degree increments. Every animation (GIF, WebP, MP4) is encoded from
+this frame set.
+
+The view matrix for every rotation angle is computed up front, then the
+frames are ray-traced by a pool of independent headless PyMOL processes.
+Each worker builds the aligned scene once and renders its share of the
+angles. Output naming matches the serial version (frame_000.png, ...).
+Frames already present in the render cache are copied instead of re-rendered.
+Scene setup and the worker pool live in the render daemon when one is
+configured, so repeated runs do not reload the structures.
+
+With --movie the pixels go from the PyMOL workers through a bounded queue
+into the GIF/WebP/MP4 encoders, which encode each frame while the next ones
+are ray-traced. With --output-dir as well (the Snakefile passes both), the
+same frames are also written as PNGs and stored in the render cache, so a
+new movie format later is encoded without ray-tracing again.
+
+Usage:
+  python workflow/scripts/generate_movie_frames.py --structure PDB LABEL
+      --structure PDB LABEL [--axis y] [--step 10] [--width 800] [--height 600]
+      [--workers N] [--output-dir results/pymol/movie_frames]
+      [--movie results/pymol/rotation.gif [rotation.webp ...]] [--duration 100]
+      [--usage benchmarks/rotation_movie/NAME.daemon.json]
+"""
+import argparse
+import os
+
+from machine_resources import available_cores
+from render_daemon import connect
+
+# Colours in --structure order; later structures are aligned onto the first
+COLORS = ["firebrick", "marine", "forest", "orange"]
+
+
+def setup_scene(renderer, structures):
+    """Load, align, colour and orient [(pdb_path, name), ...]."""
+    cmd = renderer.cmd
+
+    # Load and align structures
+    renderer.scene(structures)
+
+    # Apply colors
+    for (_, name), color in zip(structures, COLORS):
+        cmd.color(color, name)
+
+    # Display settings
+    cmd.hide("everything")
+    cmd.show("cartoon")
+    cmd.set("cartoon_fancy_helices", 1)
+    cmd.bg_color("white")
+    cmd.set("ray_shadows", 0)
+
+    # Orient and zoom
+    cmd.orient()
+    cmd.zoom("all", buffer=5)
+
+
+def frame_count(step):
+    """Frames per full turn in steps of about `step` degrees."""
+    if step <= 0:
+        raise ValueError(f"Rotation step must be positive, got {step}")
+    return max(1, round(360.0 / step))
+
+
+def rotation_views(cmd, n_frames, axis="y"):
+    """Return the view matrix of every frame of a full turn about `axis`."""
+    base = cmd.get_view()
+    step = 360.0 / n_frames
+    views = []
+    for i in range(n_frames):
+        cmd.set_view(base)
+        cmd.turn(axis, step * (i + 1))
+        views.append(cmd.get_view())
+    cmd.set_view(base)
+    return views
+
+
+def generate_frames(output_dir, structures, n_frames=36, width=800, height=600, workers=None,
+                    axis="y", usage=None):
+    """Render a full rotation into output_dir/frame_XXX.png using a process pool."""
+    os.makedirs(output_dir, exist_ok=True)
+    threads = workers or available_cores()
+    workers = max(1, min(threads, n_frames))
+
+    renderer = connect(threads=threads, usage=usage)
+    setup_scene(renderer, structures)
+    views = rotation_views(renderer.cmd, n_frames, axis)
+    paths = [f"{output_dir}/frame_{i:03d}.png" for i in range(n_frames)]
+
+    print(f"Generating {n_frames} movie frames in {output_dir} with up to {workers} worker(s)...")
+    result = renderer.render_frames(views, paths, width, height, workers)
+    print(f"  {result['rendered']} rendered, {result['cached']} from the render cache")
+    renderer.close()
+    return paths
+
+
+def render_movie(outputs, structures, n_frames=36, width=800, height=600, workers=None,
+                 frames_dir=None, duration=100, axis="y", usage=None):
+    """Encode a full rotation straight into the movie files in outputs."""
+    threads = workers or available_cores()
+    workers = max(1, min(threads, n_frames))
+    for path in outputs:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    renderer = connect(threads=threads, usage=usage)
+    setup_scene(renderer, structures)
+    views = rotation_views(renderer.cmd, n_frames, axis)
+
+    print(f"Encoding {n_frames} frames into {', '.join(outputs)} with up to {workers} worker(s)...")
+    result = renderer.render_movie(views, outputs, width, height, workers, frames_dir, duration)
+    print(f"  {result['rendered']} rendered, {result['cached']} from the render cache")
+    renderer.close()
+    return outputs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--structure", nargs=2, action="append", required=True,
+                        metavar=("PDB", "LABEL"), help="structure to show (repeat; first is the reference)")
+    parser.add_argument("--output-dir", help="write frame_XXX.png here (default without "
+                        "--movie: results/pymol/movie_frames)")
+    parser.add_argument("--movie", nargs="+", default=[], metavar="OUTPUT",
+                        help="encode the frames directly into these .gif/.webp/.mp4 files")
+    parser.add_argument("--duration", type=int, default=100, help="movie milliseconds per frame")
+    parser.add_argument("--axis", choices=["x", "y", "z"], default="y", help="rotation axis")
+    parser.add_argument("--step", type=float, default=10.0,
+                        help="degrees per frame (360/step frames per full turn)")
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=600)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="PyMOL worker processes; also the total ray-tracing threads "
+                             "they share (default: available cores)")
+    parser.add_argument("--usage", help="write the render daemon's CPU time and peak RSS "
+                        "for this run to this JSON file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    structures = [tuple(s) for s in args.structure]
+    n_frames = frame_count(args.step)
+    if args.movie:
+        render_movie(args.movie, structures, n_frames, args.width, args.height,
+                     args.workers, args.output_dir, args.duration, args.axis, args.usage)
+    else:
+        args.output_dir = args.output_dir or "results/pymol/movie_frames"
+        generate_frames(args.output_dir, structures, n_frames, args.width, args.height,
+                        args.workers, args.axis, args.usage)
+
+        print(f"\nGenerated {n_frames} frames in {args.output_dir}/")
+        print("Now you can create the GIF with:")
+        print(f"  python3 workflow/scripts/create_movie.py {args.output_dir} "
+              f"{os.path.dirname(args.output_dir)}/rotation.gif")
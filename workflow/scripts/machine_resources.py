@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Cores and memory this machine (or container) can give the pipeline.
+
+Every rule declares its threads and mem_mb (see `resources` in
+config/config.yaml); Snakemake runs jobs side by side while their sum fits in
+--cores and --resources mem_mb. This script detects both limits, honouring
+CPU affinity and cgroup (v1/v2) CPU and memory limits, and writes them into
+a Snakemake profile on top of the workflow profile
+(workflow/profiles/default/config.yaml):
+
+  snakemake --profile "$(python workflow/scripts/machine_resources.py profile)"
+
+A share of the available memory (--reserve, default 15%) is left to the
+operating system and to idle render daemon slots; a slot serving a render
+job runs within that job's mem_mb.
+
+Usage:
+  python workflow/scripts/machine_resources.py                 # show the budget
+  python workflow/scripts/machine_resources.py profile [DIR]   # write DIR/config.yaml
+      [--reserve 0.15] [--cores N] [--mem-mb M]
+"""
+import argparse
+import json
+import math
+import os
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+WORKFLOW_PROFILE = os.path.join(os.path.dirname(SCRIPTS), "profiles", "default", "config.yaml")
+DEFAULT_PROFILE_DIR = ".cache/profile"
+DEFAULT_RESERVE = 0.15
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_cpus():
+    """CPU limit of the cgroup (None without a quota)."""
+    quota = _read("/sys/fs/cgroup/cpu.max")                           # v2: "max 100000"
+    if quota:
+        limit, _, period = quota.partition(" ")
+        if limit != "max":
+            return int(limit) / int(period or 100000)
+        return None
+    limit = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")               # v1
+    period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if limit and period and int(limit) > 0:
+        return int(limit) / int(period)
+    return None
+
+
+def available_cores():
+    """Cores this process may run on, within the cgroup CPU quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    quota = _cgroup_cpus()
+    if quota:
+        cores = min(cores, max(1, math.floor(quota)))
+    return cores
+
+
+def _cgroup_free_mb():
+    """Memory left under the cgroup limit in MiB (None without a limit)."""
+    for limit_path, usage_path in (("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+                                   ("/sys/fs/cgroup/memory/memory.limit_in_bytes",
+                                    "/sys/fs/cgroup/memory/memory.usage_in_bytes")):
+        limit = _read(limit_path)
+        if limit is None:
+            continue
+        # v1 reports "no limit" as a huge number
+        if limit == "max" or int(limit) >= 2**60:
+            return None
+        return (int(limit) - int(_read(usage_path) or 0)) // 2**20
+    return None
+
+
+def available_memory_mb():
+    """Memory available to new processes in MiB (MemAvailable, within the cgroup limit)."""
+    meminfo = _read("/proc/meminfo") or ""
+    fields = dict(line.split(":", 1) for line in meminfo.splitlines() if ":" in line)
+    if "MemAvailable" in fields:
+        memory = int(fields["MemAvailable"].split()[0]) // 1024
+    else:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+    cgroup = _cgroup_free_mb()
+    return min(memory, cgroup) if cgroup is not None else memory
+
+
+def budget(reserve=DEFAULT_RESERVE, cores=None, mem_mb=None):
+    """{"cores", "mem_mb"} for the pipeline's jobs."""
+    return {"cores": cores or available_cores(),
+            "mem_mb": mem_mb or int(available_memory_mb() * (1 - reserve))}
+
+
+def write_profile(profile_dir, resources):
+    """Write the workflow profile with the detected cores and memory to profile_dir."""
+    import yaml
+
+    with open(WORKFLOW_PROFILE) as f:
+        profile = yaml.safe_load(f) or {}
+    profile["cores"] = resources["cores"]
+    profile["resources"] = [f"mem_mb={resources['mem_mb']}"]
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, "config.yaml")
+    with open(path, "w") as f:
+        f.write("# Written by workflow/scripts/machine_resources.py; rerun it to refresh\n")
+        yaml.safe_dump(profile, f, sort_keys=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cores and memory available to the pipeline")
+    parser.add_argument("action", nargs="?", choices=["show", "profile"], default="show")
+    parser.add_argument("profile_dir", nargs="?", default=DEFAULT_PROFILE_DIR)
+    parser.add_argument("--reserve", type=float, default=DEFAULT_RESERVE,
+                        help="Share of the available memory left out of the budget")
+    parser.add_argument("--cores", type=int, help="Use this many cores instead of detecting them")
+    parser.add_argument("--mem-mb", type=int, help="Use this much memory instead of detecting it")
+    args = parser.parse_args()
+
+    resources = budget(args.reserve, args.cores, args.mem_mb)
+    if args.action == "profile":
+        write_profile(args.profile_dir, resources)
+        print(os.path.abspath(args.profile_dir))
+    else:
+        print(json.dumps(resources))
+
+
+if __name__ == "__main__":
+    main()
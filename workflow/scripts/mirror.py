@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Local content-addressed mirror and bulk fetcher for UniProt/RCSB downloads.
+
+Every downloaded file is stored once under objects/<sha256[:2]>/<sha256> and
+named by a ref such as "pdb:5B2O" in refs.json. A fetch serves refs from the
+mirror and downloads only the missing ones: concurrently, over one keep-alive
+connection per host and worker, with retries and HTTP Range resume of partial
+transfers. Objects are re-hashed against their address whenever they are
+served, so a corrupted mirror entry is dropped and fetched again instead of
+being copied into the store. In offline mode nothing is downloaded and a ref
+missing from the mirror is an error.
+
+Environment:
+  FETCH_MIRROR       mirror location (default: .cache/mirror)
+  FETCH_OFFLINE=1    serve from the mirror only
+  FETCH_PDB_URL      URL template for PDB entries, e.g. a local HTTP stand-in
+  FETCH_FASTA_URL    URL template for UniProt sequences ({id} is substituted)
+
+Usage:
+  python workflow/scripts/mirror.py fetch pdb:5B2O fasta:A0Q5Y3 --dest store
+  python workflow/scripts/mirror.py import store/pdb/*.pdb store/fasta/*.fasta
+  python workflow/scripts/mirror.py verify
+  python workflow/scripts/mirror.py stats
+"""
+import argparse
+import contextlib
+import fcntl
+import hashlib
+import http.client
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+DEFAULT_MIRROR_DIR = ".cache/mirror"
+
+# kind -> (default URL template, file suffix in the store)
+SOURCES = {
+    "pdb": ("https://files.rcsb.org/download/{id}.pdb", ".pdb"),
+    "fasta": ("https://rest.uniprot.org/uniprotkb/{id}.fasta", ".fasta"),
+}
+
+# Statuses worth retrying; any other non-2xx response fails immediately
+_TRANSIENT = {408, 425, 429, 500, 502, 503, 504}
+_MAX_REDIRECTS = 5
+_CHUNK = 1 << 16
+
+
+class FetchError(Exception):
+    """A ref could not be served from the mirror or downloaded."""
+
+
+def parse_ref(ref):
+    """'pdb:5B2O' -> ('pdb', '5B2O')."""
+    kind, sep, accession = ref.partition(":")
+    if not sep or kind not in SOURCES or not accession:
+        raise ValueError(f"Bad ref {ref!r}: expected one of "
+                         f"{', '.join(k + ':<id>' for k in SOURCES)}")
+    return kind, accession
+
+
+def source_url(ref):
+    kind, accession = parse_ref(ref)
+    template = os.environ.get(f"FETCH_{kind.upper()}_URL", SOURCES[kind][0])
+    return template.format(id=accession)
+
+
+def store_path(dest, ref):
+    """Where a ref lives in the pipeline store: {dest}/{kind}/{id}{suffix}."""
+    kind, accession = parse_ref(ref)
+    return os.path.join(dest, kind, accession + SOURCES[kind][1])
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Mirror:
+    """Content-addressed object store with a ref -> digest index."""
+
+    def __init__(self, root=None):
+        self.root = root or os.environ.get("FETCH_MIRROR", DEFAULT_MIRROR_DIR)
+        self._objects = os.path.join(self.root, "objects")
+        self._partial = os.path.join(self.root, "partial")
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._partial, exist_ok=True)
+
+    # ───────────────────────── bookkeeping ─────────────────────────
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(os.path.join(self.root, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refs_path(self):
+        return os.path.join(self.root, "refs.json")
+
+    def refs(self):
+        try:
+            with open(self._refs_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_refs(self, refs):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(refs, f, indent=1, sort_keys=True)
+        os.replace(tmp, self._refs_path())
+
+    def object_path(self, digest):
+        return os.path.join(self._objects, digest[:2], digest)
+
+    def partial_path(self, ref):
+        """Resumable download location of a ref (kept across failed attempts)."""
+        return os.path.join(self._partial, ref.replace(":", "_").replace("/", "_"))
+
+    # ───────────────────────── mirror operations ─────────────────────────
+    def get(self, ref):
+        """Verified object path for ref, or None if missing or corrupt."""
+        entry = self.refs().get(ref)
+        if entry is None:
+            return None
+        path = self.object_path(entry["sha256"])
+        try:
+            digest = sha256_file(path)
+        except FileNotFoundError:
+            return None
+        if digest != entry["sha256"]:
+            print(f"  Mirror object for {ref} is corrupt; discarding", file=sys.stderr)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        return path
+
+    def add(self, ref, path, url=None):
+        """Move a downloaded file into the mirror under ref; return its digest."""
+        digest = sha256_file(path)
+        obj = self.object_path(digest)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        if os.path.exists(obj):
+            os.remove(path)
+        else:
+            os.replace(path, obj)
+        with self._locked():
+            refs = self.refs()
+            refs[ref] = {"sha256": digest, "size": os.path.getsize(obj), "url": url}
+            self._write_refs(refs)
+        return digest
+
+    def import_file(self, ref, path):
+        """Copy an existing file into the mirror (e.g. to seed an offline mirror)."""
+        fd, tmp = tempfile.mkstemp(dir=self._partial, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(path, tmp)
+        return self.add(ref, tmp, url=None)
+
+    def verify(self):
+        """Re-hash every referenced object; return the refs that failed."""
+        return [ref for ref in sorted(self.refs()) if self.get(ref) is None]
+
+    def stats(self):
+        refs = self.refs()
+        objects = {entry["sha256"]: entry["size"] for entry in refs.values()}
+        return {"root": self.root, "refs": len(refs),
+                "objects": len(objects), "bytes": sum(objects.values())}
+
+
+class Fetcher:
+    """Concurrent HTTP(S) downloader feeding a Mirror."""
+
+    def __init__(self, mirror, workers=8, retries=4, backoff=1.0, timeout=60, offline=None):
+        self.mirror = mirror
+        self.workers = max(1, int(workers))
+        self.retries = int(retries)
+        self.backoff = backoff
+        self.timeout = timeout
+        if offline is None:
+            offline = os.environ.get("FETCH_OFFLINE", "0") not in ("", "0")
+        self.offline = offline
+        self._local = threading.local()
+        self._opened = []
+        self._opened_lock = threading.Lock()
+
+    # ───────────────────────── connections ─────────────────────────
+    def _connection(self, scheme, netloc):
+        """Keep-alive connection of this worker thread to (scheme, netloc)."""
+        pool = self._local.__dict__.setdefault("pool", {})
+        conn = pool.get((scheme, netloc))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = pool[(scheme, netloc)] = cls(netloc, timeout=self.timeout)
+            with self._opened_lock:
+                self._opened.append(conn)
+        return conn
+
+    def _drop_connection(self, scheme, netloc):
+        conn = self._local.__dict__.get("pool", {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        """Close every connection opened by the worker threads."""
+        with self._opened_lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+        self._local = threading.local()
+
+    # ───────────────────────── transfers ─────────────────────────
+    def _download(self, url, part):
+        """One attempt: GET url into part, resuming from its current size."""
+        for _ in range(_MAX_REDIRECTS + 1):
+            split = urlsplit(url)
+            target = split.path + (f"?{split.query}" if split.query else "")
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            headers = {"User-Agent": "cas-mirror/1.0", "Accept-Encoding": "identity"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+            conn = self._connection(split.scheme, split.netloc)
+            try:
+                conn.request("GET", target or "/", headers=headers)
+                resp = conn.getresponse()
+                if resp.status in (301, 302, 303, 307, 308):
+                    resp.read()
+                    url = urljoin(url, resp.getheader("Location"))
+                    continue
+                if resp.status == 416 and offset:
+                    # The partial file is already complete (or stale): start over
+                    resp.read()
+                    os.remove(part)
+                    continue
+                if resp.status not in (200, 206):
+                    resp.read()
+                    raise _HTTPStatus(resp.status, url)
+                mode = "ab" if resp.status == 206 else "wb"
+                expected = resp.getheader("Content-Length")
+                received = 0
+                with open(part, mode) as f:
+                    for chunk in iter(lambda: resp.read(_CHUNK), b""):
+                        f.write(chunk)
+                        received += len(chunk)
+                if expected is not None and received != int(expected):
+                    raise http.client.IncompleteRead(b"", int(expected) - received)
+                if resp.will_close:
+                    self._drop_connection(split.scheme, split.netloc)
+                return url
+            except (OSError, http.client.HTTPException):
+                self._drop_connection(split.scheme, split.netloc)
+                raise
+        raise FetchError(f"Too many redirects for {url}")
+
+    def _fetch_one(self, ref):
+        path = self.mirror.get(ref)
+        if path is not None:
+            return path, False
+        if self.offline:
+            raise FetchError(f"{ref} is not in the mirror {self.mirror.root} (offline mode)")
+        url = source_url(ref)
+        part = self.mirror.partial_path(ref)
+        for attempt in range(self.retries + 1):
+            try:
+                final_url = self._download(url, part)
+                break
+            except _HTTPStatus as exc:
+                if exc.status not in _TRANSIENT or attempt == self.retries:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(part)
+                    raise FetchError(f"{ref}: {exc}") from None
+            except (OSError, http.client.HTTPException) as exc:
+                if attempt == self.retries:
+                    raise FetchError(f"{ref}: {exc!r} after {attempt + 1} attempts") from None
+            delay = self.backoff * 2 ** attempt
+            print(f"  Retrying {ref} in {delay:.1f}s (attempt {attempt + 2})", file=sys.stderr)
+            time.sleep(delay)
+        if os.path.getsize(part) == 0:
+            os.remove(part)
+            raise FetchError(f"{ref}: empty response from {final_url}")
+        digest = self.mirror.add(ref, part, url=final_url)
+        return self.mirror.object_path(digest), True
+
+    def fetch(self, refs):
+        """Serve or download refs concurrently; return {ref: (object path, downloaded)}."""
+        refs = list(dict.fromkeys(refs))
+        for ref in refs:
+            parse_ref(ref)
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(refs) or 1)) as pool:
+                futures = {ref: pool.submit(self._fetch_one, ref) for ref in refs}
+        finally:
+            self.close()
+        results, errors = {}, []
+        for ref, future in futures.items():
+            try:
+                results[ref] = future.result()
+            except FetchError as exc:
+                errors.append(str(exc))
+        if errors:
+            raise FetchError("\n".join(errors))
+        return results
+
+
+class _HTTPStatus(Exception):
+    def __init__(self, status, url):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+
+
+def place(obj, output_path):
+    """Copy a mirror object to its store path atomically."""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=".tmp")
+    os.close(fd)
+    shutil.copyfile(obj, tmp)
+    os.replace(tmp, output_path)
+
+
+def fetch_to_store(refs, dest, mirror=None, **kwargs):
+    """Fetch refs through the mirror and copy them to their store paths."""
+    mirror = mirror or Mirror()
+    fetcher = Fetcher(mirror, **kwargs)
+    results = fetcher.fetch(refs)
+    for ref, (obj, downloaded) in results.items():
+        place(obj, store_path(dest, ref))
+        print(f"  {'Downloaded' if downloaded else 'Mirror hit'}: {ref}")
+    return results
+
+
+def _ref_from_path(path):
+    """store/pdb/5B2O.pdb -> 'pdb:5B2O'."""
+    kind = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    stem, suffix = os.path.splitext(os.path.basename(path))
+    if kind not in SOURCES or suffix != SOURCES[kind][1]:
+        raise ValueError(f"Cannot infer a ref from {path}: expected <dir>/{{{','.join(SOURCES)}}}/<id><suffix>")
+    return f"{kind}:{stem}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mirror", help=f"Mirror directory (default: $FETCH_MIRROR or {DEFAULT_MIRROR_DIR})")
+    sub = parser.add_subparsers(dest="action", required=True)
+
+    p_fetch = sub.add_parser("fetch", help="Fetch refs into the store through the mirror")
+    p_fetch.add_argument("refs", nargs="+", help="Refs such as pdb:5B2O or fasta:A0Q5Y3")
+    p_fetch.add_argument("--dest", default="store", help="Store directory (default: store)")
+    p_fetch.add_argument("--workers", type=int, default=8, help="Concurrent downloads")
+    p_fetch.add_argument("--retries", type=int, default=4, help="Retries per ref on transient errors")
+    p_fetch.add_argument("--offline", action="store_true", help="Serve from the mirror only")
+
+    p_import = sub.add_parser("import", help="Seed the mirror from existing store files")
+    p_import.add_argument("paths", nargs="+", help="Files named <dir>/<kind>/<id><suffix>")
+
+    sub.add_parser("verify", help="Re-hash every mirror object")
+    sub.add_parser("stats", help="Show mirror size")
+    args = parser.parse_args()
+
+    mirror = Mirror(args.mirror)
+    if args.action == "fetch":
+        try:
+            fetch_to_store(args.refs, args.dest, mirror, workers=args.workers,
+                           retries=args.retries, offline=args.offline or None)
+        except (FetchError, ValueError) as exc:
+            sys.exit(f"Fetch failed:\n{exc}")
+    elif args.action == "import":
+        for path in args.paths:
+            ref = _ref_from_path(path)
+            print(f"  {ref}: {mirror.import_file(ref, path)[:16]}")
+    elif args.action == "verify":
+        bad = mirror.verify()
+        if bad:
+            sys.exit(f"Corrupt or missing objects: {', '.join(bad)}")
+        print(f"All {len(mirror.refs())} refs verified")
+    else:
+        for field, value in mirror.stats().items():
+            print(f"{field:>8}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Size-aware MSA with an incremental, content-addressed alignment cache.
+
+The strategy is chosen from the number of sequences and their total length
+(see STRATEGIES / choose_strategy; thresholds are measured with
+msa_benchmark.py): in-process pairwise alignment, MAFFT L-INS-i, FFT-NS-i
+or FFT-NS-2. The thread count follows the available cores and the amount
+of parallel work the strategy has; the choice is logged.
+
+Alignments are cached under a key built from the sorted digests of the
+input records (name + sequence) and the MAFFT options, so the same
+sequence set hits the cache whatever the order of the input FASTA. When
+there is no exact hit but a cached alignment (same options) covers a subset
+of the input, only the new sequences are added to it with `mafft --add`
+instead of realigning everything. --full (or MSA_FULL_REALIGN=1) forces a
+full realignment; the result replaces the cached one for that set.
+
+Environment:
+  MSA_CACHE_DIR        cache location (default: .cache/msa)
+  MSA_FULL_REALIGN=1   always realign from scratch
+
+Usage:
+  python workflow/scripts/msa_align.py work/combined.fasta -o results/alignment/cas_dual_mafft.fasta
+      [--strategy auto|pairwise|linsi|fftnsi|fftns2] [--threads 8] [--full] [--no-incremental]
+"""
+import argparse
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+
+from machine_resources import available_cores
+
+DEFAULT_CACHE_DIR = ".cache/msa"
+
+# Strategy -> MAFFT options (None: aligned in-process by pairwise_align.py)
+STRATEGIES = {
+    "pairwise": None,
+    "linsi": ["--localpair", "--maxiterate", "1000"],
+    "fftnsi": ["--retree", "2", "--maxiterate", "2"],
+    "fftns2": ["--retree", "2", "--maxiterate", "0"],
+}
+
+# Upper bounds (sequences, total residues) under which `auto` picks each
+# strategy, tried in order; anything larger gets FFT-NS-2. L-INS-i is
+# O(N^2) pairwise local alignments, FFT-NS-i a few refinement passes over a
+# guide tree. Pairwise is off by default (0 sequences) so existing results
+# keep their MAFFT alignment; set it to 2 to align pairs without MAFFT.
+DEFAULT_THRESHOLDS = {
+    "pairwise": (0, 100_000),
+    "linsi": (200, 400_000),
+    "fftnsi": (2_000, 4_000_000),
+}
+
+
+# ───────────────────────── FASTA records ─────────────────────────
+def read_fasta(path):
+    """Return [(header, sequence)] in file order (sequence without line breaks)."""
+    records, header, chunks = [], None, []
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith(">"):
+                if header is not None:
+                    records.append((header, "".join(chunks)))
+                header, chunks = line[1:], []
+            elif header is not None:
+                chunks.append(line.strip())
+    if header is not None:
+        records.append((header, "".join(chunks)))
+    return records
+
+
+def write_fasta(records, path, width=60):
+    with open(path, "w") as f:
+        for header, seq in records:
+            f.write(f">{header}\n")
+            for i in range(0, len(seq), width):
+                f.write(seq[i:i + width] + "\n")
+
+
+def record_digest(header, seq):
+    """Identity of one input record; gaps are ignored so aligned rows match their input."""
+    return hashlib.sha256(f"{header}\n{seq.replace('-', '').upper()}".encode()).hexdigest()
+
+
+def set_key(digests, options):
+    """Order-independent cache key of a sequence set aligned with `options`."""
+    payload = json.dumps([sorted(digests), list(options)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# ───────────────────────── cache ─────────────────────────
+class AlignmentCache:
+    """Cached alignments plus an index of the record digests each one covers."""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.environ.get("MSA_CACHE_DIR", DEFAULT_CACHE_DIR)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(os.path.join(self.cache_dir, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, "index.json")
+
+    def index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.fasta")
+
+    def get(self, key):
+        path = self.path(key)
+        return path if key in self.index() and os.path.exists(path) else None
+
+    def best_subset(self, digests, options):
+        """Key of the largest cached alignment (same options) covering a subset of digests."""
+        wanted = set(digests)
+        best, best_size = None, 0
+        for key, entry in self.index().items():
+            members = set(entry["members"])
+            if (entry["options"] == list(options) and len(members) > best_size
+                    and members < wanted and os.path.exists(self.path(key))):
+                best, best_size = key, len(members)
+        return best
+
+    def put(self, key, digests, options, aligned_path):
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        with open(aligned_path) as src, open(tmp, "w") as dst:
+            dst.write(src.read())
+        os.replace(tmp, self.path(key))
+        with self._locked():
+            index = self.index()
+            index[key] = {"members": sorted(digests), "options": list(options)}
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(index, f, indent=1)
+            os.replace(tmp, self._index_path())
+
+
+# ───────────────────────── strategy ─────────────────────────
+def choose_strategy(n_seqs, total_length, thresholds=None):
+    """Cheapest-adequate strategy for an input of n_seqs sequences / total_length residues."""
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    for name in ("pairwise", "linsi", "fftnsi"):
+        max_seqs, max_length = thresholds[name]
+        if n_seqs <= max_seqs and total_length <= max_length:
+            if name == "pairwise" and n_seqs != 2:
+                continue
+            return name
+    return "fftns2"
+
+
+def choose_threads(strategy, n_seqs, max_threads):
+    """Threads worth using: no more than the independent work units of the strategy."""
+    if strategy == "pairwise":
+        return 1
+    if strategy == "linsi":
+        work = n_seqs * (n_seqs - 1) // 2   # all-pairs local alignments
+    else:
+        work = max(1, n_seqs // 50)         # guide-tree and refinement stages
+    return max(1, min(max_threads, work))
+
+
+def run_pairwise(input_path, output_path):
+    from pairwise_align import global_align
+
+    (name_a, seq_a), (name_b, seq_b) = read_fasta(input_path)
+    aligned_a, aligned_b, _ = global_align(seq_a, seq_b)
+    write_fasta([(name_a, aligned_a), (name_b, aligned_b)], output_path)
+
+
+# ───────────────────────── alignment ─────────────────────────
+def run_mafft(args, output_path):
+    """Run mafft with args, writing the alignment to output_path."""
+    print(f"  mafft {' '.join(shlex.quote(a) for a in args)}", file=sys.stderr)
+    with open(output_path, "w") as out:
+        subprocess.run(["mafft", *args], stdout=out, check=True)
+
+
+def run_strategy(strategy, input_path, output_path, threads=1):
+    """Align input_path from scratch with one strategy (no cache)."""
+    options = STRATEGIES[strategy]
+    if options is None:
+        run_pairwise(input_path, output_path)
+    else:
+        run_mafft(["--thread", str(threads), *options, input_path], output_path)
+
+
+def in_input_order(aligned, digests):
+    """Reorder aligned records to follow the input records' digests."""
+    by_digest = {record_digest(h, s): (h, s) for h, s in aligned}
+    return [by_digest[d] for d in digests]
+
+
+def align(input_path, output_path, strategy="auto", threads=None,
+          incremental=True, full=False, cache=None, thresholds=None):
+    """
+    Align input_path into output_path; return how the result was obtained:
+    'cached', 'incremental' or 'full'.
+    """
+    cache = cache or AlignmentCache()
+    records = read_fasta(input_path)
+    if not records:
+        raise ValueError(f"No sequences in {input_path}")
+    digests = [record_digest(h, s) for h, s in records]
+    if len(set(digests)) != len(digests):
+        raise ValueError(f"Duplicate records in {input_path}")
+
+    total_length = sum(len(seq) for _, seq in records)
+    if strategy == "auto":
+        strategy = choose_strategy(len(records), total_length, thresholds)
+    if strategy == "pairwise" and len(records) != 2:
+        raise ValueError(f"The pairwise strategy needs exactly 2 sequences, got {len(records)}")
+    threads = choose_threads(strategy, len(records), threads or available_cores())
+    print(f"  MSA strategy: {strategy} ({len(records)} sequences, {total_length} residues, "
+          f"{threads} thread(s))", file=sys.stderr)
+    options = STRATEGIES[strategy]
+    key = set_key(digests, options if options is not None else ["pairwise"])
+    full = full or os.environ.get("MSA_FULL_REALIGN", "0") not in ("", "0")
+
+    cached = None if full else cache.get(key)
+    if cached is not None:
+        write_fasta(in_input_order(read_fasta(cached), digests), output_path)
+        return "cached"
+
+    incremental = incremental and options is not None
+    base = cache.best_subset(digests, options) if incremental and not full else None
+    with tempfile.TemporaryDirectory() as tmp:
+        raw = os.path.join(tmp, "aligned.fasta")
+        if base is not None:
+            members = set(cache.index()[base]["members"])
+            new = os.path.join(tmp, "new.fasta")
+            write_fasta([r for r, d in zip(records, digests) if d not in members], new)
+            print(f"  Adding {len(records) - len(members)} sequence(s) to a cached "
+                  f"alignment of {len(members)}", file=sys.stderr)
+            run_mafft(["--thread", str(threads), "--add", new, cache.path(base)], raw)
+            mode = "incremental"
+        else:
+            run_strategy(strategy, input_path, raw, threads)
+            mode = "full"
+        cache.put(key, digests, options if options is not None else ["pairwise"], raw)
+        write_fasta(in_input_order(read_fasta(raw), digests), output_path)
+    return mode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size-aware MSA with an incremental alignment cache")
+    parser.add_argument("input", help="Unaligned FASTA")
+    parser.add_argument("-o", "--output", required=True, help="Aligned FASTA")
+    parser.add_argument("--strategy", default="auto", choices=["auto", *STRATEGIES])
+    parser.add_argument("--threads", type=int, help="Thread cap (default: available cores)")
+    parser.add_argument("--full", action="store_true", help="Force a full realignment")
+    parser.add_argument("--no-incremental", action="store_true",
+                        help="Realign from scratch instead of extending a cached subset")
+    parser.add_argument("--cache-dir", help=f"Cache location (default: $MSA_CACHE_DIR or {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--threshold", action="append", default=[], metavar="STRATEGY=SEQS,RESIDUES",
+                        help="Override an auto-selection bound, e.g. linsi=100,200000")
+    args = parser.parse_args()
+
+    thresholds = {}
+    for item in args.threshold:
+        name, _, bounds = item.partition("=")
+        max_seqs, max_length = (int(v) for v in bounds.split(","))
+        thresholds[name] = (max_seqs, max_length)
+    mode = align(args.input, args.output, strategy=args.strategy, threads=args.threads,
+                 incremental=not args.no_incremental, full=args.full,
+                 cache=AlignmentCache(args.cache_dir), thresholds=thresholds)
+    print(f"Alignment ({mode}): {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Benchmark the MSA strategies of msa_align.py to set its size thresholds.
+
+Every strategy is run (uncached) on synthetic and/or real inputs and scored
+for wall time and alignment quality:
+
+  q_score   fraction of true homologous residue pairs recovered (synthetic
+            inputs only: sequences are evolved from a random ancestor with
+            substitutions and indels, so the true alignment is known)
+  sp_score  mean BLOSUM62 sum-of-pairs score per sequence pair with affine
+            gaps, a reference-free proxy that also applies to real inputs
+
+For each input the report names the cheapest strategy whose quality is within
+--tolerance of the best; the crossover sizes are the thresholds to put in
+msa_align.DEFAULT_THRESHOLDS (or pass with --threshold). Strategies that
+need MAFFT are skipped when it is not on PATH.
+
+Usage:
+  python workflow/scripts/msa_benchmark.py --synthetic 2x1300 20x500 200x300
+      [--fasta work/combined.fasta ...] [--strategies pairwise linsi fftnsi fftns2]
+      [--repeats 3] [--threads 8] [-o msa_benchmark.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from msa_align import STRATEGIES, available_cores, choose_threads, read_fasta, run_strategy, write_fasta
+from pairwise_align import BLOSUM62, GAP_EXTEND, GAP_OPEN, encode
+
+_AMINO = "ARNDCQEGHILKMFPSTWYV"
+# Background amino-acid frequencies (UniProt), order of _AMINO
+_FREQ = np.array([8.25, 5.53, 4.06, 5.45, 1.37, 3.93, 6.75, 7.07, 2.27, 5.96,
+                  9.66, 5.84, 2.42, 3.86, 4.70, 6.56, 5.34, 1.08, 2.92, 6.87])
+_FREQ /= _FREQ.sum()
+
+
+# ───────────────────────── synthetic inputs ─────────────────────────
+def simulate(n_seqs, length, identity=0.4, indel_rate=0.03, seed=0):
+    """
+    Evolve n_seqs sequences from a random ancestor of `length` residues.
+    Returns records and, per sequence, the ancestor position of every
+    residue (-1 for inserted residues) - the true alignment.
+    """
+    rng = np.random.default_rng(seed)
+    ancestor = rng.choice(20, size=length, p=_FREQ)
+    records, origins = [], []
+    for k in range(n_seqs):
+        residues, origin = [], []
+        for pos, aa in enumerate(ancestor):
+            if rng.random() < indel_rate / 2:
+                continue  # deletion
+            residues.append(aa if rng.random() < identity else rng.choice(20, p=_FREQ))
+            origin.append(pos)
+            if rng.random() < indel_rate / 2:
+                extra = rng.geometric(0.3)
+                residues.extend(rng.choice(20, size=extra, p=_FREQ))
+                origin.extend([-1] * extra)
+        records.append((f"synthetic_{k}", "".join(_AMINO[i] for i in residues)))
+        origins.append(np.array(origin))
+    return records, origins
+
+
+def residue_columns(aligned_seq):
+    """Alignment column of every residue of an aligned sequence."""
+    row = np.frombuffer(aligned_seq.encode(), dtype="S1")
+    return np.flatnonzero(row != b"-")
+
+
+def q_score(aligned, origins):
+    """Fraction of true homologous residue pairs placed in the same column."""
+    columns = [residue_columns(seq) for _, seq in aligned]
+    correct = total = 0
+    for i, j in itertools.combinations(range(len(aligned)), 2):
+        oi, oj = origins[i], origins[j]
+        total += len(np.intersect1d(oi[oi >= 0], oj[oj >= 0]))
+        # Residues of j by column, then compare ancestors of residues sharing a column
+        col_to_j = np.full(max(columns[i].max(initial=0), columns[j].max(initial=0)) + 1, -1)
+        col_to_j[columns[j]] = np.arange(len(columns[j]))
+        partner = col_to_j[columns[i]]
+        paired = partner >= 0
+        same = oi[paired] == oj[partner[paired]]
+        correct += int((same & (oi[paired] >= 0)).sum())
+    return correct / total if total else 1.0
+
+
+def sp_score(aligned):
+    """Mean pairwise BLOSUM62 score with affine gaps (gap-gap columns ignored)."""
+    rows = [np.frombuffer(seq.encode(), dtype="S1") for _, seq in aligned]
+    codes = [encode(seq.replace("-", "X")) for _, seq in aligned]
+    scores = []
+    for i, j in itertools.combinations(range(len(aligned)), 2):
+        gap_i, gap_j = rows[i] == b"-", rows[j] == b"-"
+        keep = ~(gap_i & gap_j)
+        gi, gj = gap_i[keep], gap_j[keep]
+        match = ~(gi | gj)
+        score = int(BLOSUM62[codes[i][keep][match], codes[j][keep][match]].sum())
+        for gap in (gi & ~gj, gj & ~gi):
+            opens = int(gap[0]) + int((gap[1:] & ~gap[:-1]).sum()) if len(gap) else 0
+            score -= opens * GAP_OPEN + (int(gap.sum()) - opens) * GAP_EXTEND
+        scores.append(score)
+    return float(np.mean(scores)) if scores else 0.0
+
+
+# ───────────────────────── harness ─────────────────────────
+def run_case(name, records, origins, strategies, repeats, max_threads, workdir):
+    """Time and score every strategy on one input; return result rows."""
+    input_path = os.path.join(workdir, f"{name}.fasta")
+    write_fasta(records, input_path)
+    total_length = sum(len(seq) for _, seq in records)
+    rows = []
+    for strategy in strategies:
+        row = {"input": name, "n_seqs": len(records), "total_length": total_length,
+               "strategy": strategy}
+        if strategy == "pairwise" and len(records) != 2:
+            rows.append({**row, "skipped": "pairwise needs exactly 2 sequences"})
+            continue
+        if STRATEGIES[strategy] is not None and shutil.which("mafft") is None:
+            rows.append({**row, "skipped": "mafft not on PATH"})
+            continue
+        threads = choose_threads(strategy, len(records), max_threads)
+        output_path = os.path.join(workdir, f"{name}.{strategy}.fasta")
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run_strategy(strategy, input_path, output_path, threads)
+            times.append(time.perf_counter() - start)
+        aligned = read_fasta(output_path)
+        order = {header: k for k, (header, _) in enumerate(records)}
+        aligned.sort(key=lambda rec: order[rec[0]])
+        row.update(threads=threads, seconds=min(times), sp_score=sp_score(aligned),
+                   q_score=q_score(aligned, origins) if origins is not None else None)
+        rows.append(row)
+        print(f"  {name:<24} {strategy:<9} {row['seconds']:8.2f}s  "
+              f"Q={row['q_score'] if row['q_score'] is not None else float('nan'):.3f}  "
+              f"SP={row['sp_score']:.1f}", file=sys.stderr)
+    return rows
+
+
+def recommend(rows, tolerance):
+    """Per input: the fastest strategy within `tolerance` (relative) of the best quality."""
+    picks = {}
+    for name, group in itertools.groupby(rows, key=lambda r: r["input"]):
+        done = [r for r in group if "seconds" in r]
+        if not done:
+            continue
+        metric = "q_score" if done[0]["q_score"] is not None else "sp_score"
+        best = max(r[metric] for r in done)
+        floor = best - abs(best) * tolerance
+        adequate = [r for r in done if r[metric] >= floor]
+        pick = min(adequate, key=lambda r: r["seconds"])
+        picks[name] = {"strategy": pick["strategy"], "metric": metric,
+                       "n_seqs": pick["n_seqs"], "total_length": pick["total_length"]}
+    return picks
+
+
+def _size(spec):
+    n_seqs, _, length = spec.lower().partition("x")
+    return int(n_seqs), int(length)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MSA strategies")
+    parser.add_argument("--synthetic", nargs="*", default=[], metavar="NxL",
+                        help="Synthetic inputs: N sequences of ~L residues")
+    parser.add_argument("--fasta", nargs="*", default=[], help="Real (unaligned) inputs")
+    parser.add_argument("--strategies", nargs="*", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per case (minimum time is kept)")
+    parser.add_argument("--threads", type=int, default=available_cores(), help="Thread cap")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="Relative quality loss accepted for a faster strategy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="msa_benchmark.json")
+    args = parser.parse_args()
+    if not args.synthetic and not args.fasta:
+        parser.error("give --synthetic sizes and/or --fasta inputs")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for spec in args.synthetic:
+            n_seqs, length = _size(spec)
+            records, origins = simulate(n_seqs, length, seed=args.seed)
+            rows += run_case(f"synthetic_{n_seqs}x{length}", records, origins,
+                             args.strategies, args.repeats, args.threads, workdir)
+        for path in args.fasta:
+            name = os.path.splitext(os.path.basename(path))[0]
+            rows += run_case(name, read_fasta(path), None,
+                             args.strategies, args.repeats, args.threads, workdir)
+
+    picks = recommend(rows, args.tolerance)
+    with open(args.output, "w") as f:
+        json.dump({"cores": args.threads, "tolerance": args.tolerance,
+                   "results": rows, "recommended": picks}, f, indent=1)
+    print("\nRecommended strategy per input:")
+    for name, pick in picks.items():
+        print(f"  {name:<24} {pick['n_seqs']:>6} seqs {pick['total_length']:>9} aa -> "
+              f"{pick['strategy']} (by {pick['metric']})")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
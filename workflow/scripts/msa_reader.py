@@ -0,0 +1,260 @@
+"""
+Memory-mapped multiple sequence alignment reader.
+
+The alignment file is memory-mapped and indexed once (byte offset of every
+record), after which fixed-width column blocks can be handed out with
+bounded memory, so conservation can be computed chunk by chunk even for
+alignments with thousands of sequences and tens of thousands of columns.
+
+Supported inputs: aligned FASTA, A3M and Stockholm.
+"""
+import mmap
+import os
+import tempfile
+
+import numpy as np
+
+_A3M_DELETE = bytes(range(ord("a"), ord("z") + 1)) + b"."
+
+
+def detect_format(path):
+    """Guess the alignment format from the file extension or first line."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".a3m":
+        return "a3m"
+    if ext in (".sto", ".stk", ".sth", ".stockholm"):
+        return "stockholm"
+    with open(path, "rb") as f:
+        first = f.readline()
+    if first.startswith(b"# STOCKHOLM"):
+        return "stockholm"
+    return "fasta"
+
+
+class MSAReader:
+    """
+    Column-block access to an alignment without loading it into Python strings.
+
+    Attributes:
+      names    record names in file order
+      offsets  byte offset of each record in the file (int64 array)
+      n_seqs   number of sequences
+      n_cols   number of alignment columns
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.fmt = fmt or detect_format(path)
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.close()
+            raise ValueError(f"No sequences found in {path}")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data = np.frombuffer(self._mm, dtype=np.uint8)
+        self._matrix = None
+
+        try:
+            if self.fmt == "fasta":
+                self._index_fasta()
+            elif self.fmt == "a3m":
+                self._index_fasta()
+                self._materialize_a3m()
+            elif self.fmt == "stockholm":
+                self._index_stockholm()
+            else:
+                raise ValueError(f"Unsupported alignment format: {self.fmt}")
+        except Exception:
+            self.close()
+            raise
+
+    # ───────────────────────── indexing ─────────────────────────
+    def _record_bounds(self):
+        """Yield (header_start, seq_start, seq_end) for every FASTA/A3M record."""
+        mm = self._mm
+        pos = 0 if mm[:1] == b">" else mm.find(b"\n>")
+        if pos < 0:
+            raise ValueError(f"No sequences found in {self.path}")
+        if pos > 0:
+            pos += 1
+        size = len(mm)
+        while pos >= 0:
+            header_end = mm.find(b"\n", pos)
+            if header_end < 0:
+                header_end = size
+            nxt = mm.find(b"\n>", header_end)
+            seq_end = size if nxt < 0 else nxt
+            yield pos, header_end + 1, seq_end
+            pos = nxt + 1 if nxt >= 0 else -1
+
+    def _index_fasta(self):
+        names, offsets, starts, ends, widths, strides, lengths = [], [], [], [], [], [], []
+        regular = True
+        for header_start, seq_start, seq_end in self._record_bounds():
+            names.append(bytes(self._mm[header_start + 1:seq_start - 1]).strip().decode())
+            offsets.append(header_start)
+            while seq_end > seq_start and self._data[seq_end - 1] in b"\r\n \t":
+                seq_end -= 1
+            region = self._data[seq_start:seq_end]
+            newlines = np.flatnonzero(region == 10)
+            eol = 2 if len(newlines) and region[newlines[0] - 1] == 13 else 1
+
+            # Content length of every line; all but the last must share one width
+            line_starts = np.concatenate(([0], newlines + 1))
+            line_ends = np.concatenate((newlines - (eol - 1), [len(region)]))
+            line_lengths = line_ends - line_starts
+            width = int(line_lengths[0])
+            if len(line_lengths) > 1 and (
+                np.any(line_lengths[:-1] != width) or line_lengths[-1] > width
+            ):
+                regular = False
+
+            starts.append(seq_start)
+            ends.append(seq_end)
+            widths.append(max(width, 1))
+            strides.append(width + eol)
+            lengths.append(int(line_lengths.sum()))
+
+        self.names = names
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.n_seqs = len(names)
+        self._seq_start = np.asarray(starts, dtype=np.int64)
+        self._seq_end = np.asarray(ends, dtype=np.int64)
+        self._width = np.asarray(widths, dtype=np.int64)
+        self._stride = np.asarray(strides, dtype=np.int64)
+        self._lengths = np.asarray(lengths, dtype=np.int64)
+
+        if self.fmt != "fasta":
+            return
+        if len(set(lengths)) != 1:
+            raise ValueError(
+                f"Sequences in {self.path} have different lengths: {sorted(set(lengths))}"
+            )
+        self.n_cols = lengths[0]
+
+        if not regular:
+            self._materialize_fasta()
+        elif np.all(self._width >= self.n_cols) and self.n_seqs > 1:
+            # Unwrapped records at a constant spacing map onto a strided view
+            spacing = np.diff(self._seq_start)
+            if np.all(spacing == spacing[0]):
+                self._matrix = np.lib.stride_tricks.as_strided(
+                    self._data[self._seq_start[0]:],
+                    shape=(self.n_seqs, self.n_cols),
+                    strides=(int(spacing[0]), 1),
+                    writeable=False,
+                )
+
+    def _new_matrix(self, n_rows, n_cols):
+        """Allocate a disk-backed N x L scratch matrix for formats needing conversion."""
+        return np.memmap(tempfile.TemporaryFile(), dtype=np.uint8, mode="w+",
+                         shape=(n_rows, n_cols))
+
+    def _record_row(self, i):
+        raw = self._mm[self._seq_start[i]:self._seq_end[i]]
+        return raw.translate(None, b"\r\n \t")
+
+    def _materialize_fasta(self):
+        self._matrix = self._new_matrix(self.n_seqs, self.n_cols)
+        for i in range(self.n_seqs):
+            self._matrix[i] = np.frombuffer(self._record_row(i)[:self.n_cols], dtype=np.uint8)
+
+    def _materialize_a3m(self):
+        """Drop A3M insertions (lower case and '.') so every row has the match-state width."""
+        first = self._record_row(0).translate(None, _A3M_DELETE)
+        self.n_cols = len(first)
+        self._matrix = self._new_matrix(self.n_seqs, self.n_cols)
+        for i in range(self.n_seqs):
+            row = first if i == 0 else self._record_row(i).translate(None, _A3M_DELETE)
+            if len(row) != self.n_cols:
+                raise ValueError(
+                    f"A3M record {self.names[i]} has {len(row)} match columns, "
+                    f"expected {self.n_cols}"
+                )
+            self._matrix[i] = np.frombuffer(row, dtype=np.uint8)
+
+    def _stockholm_lines(self):
+        """Yield (offset, name, segment) for every sequence line of a Stockholm file."""
+        mm = self._mm
+        mm.seek(0)
+        while True:
+            offset = mm.tell()
+            line = mm.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line or line.startswith(b"#"):
+                continue
+            if line == b"//":
+                break
+            parts = line.split()
+            if len(parts) != 2:
+                raise ValueError(f"Malformed Stockholm line at byte {offset} in {self.path}")
+            yield offset, parts[0].decode(), parts[1]
+
+    def _index_stockholm(self):
+        # Pass 1: record order, first offsets and total aligned length per record
+        rows = {}
+        offsets = []
+        lengths = []
+        for offset, name, segment in self._stockholm_lines():
+            if name not in rows:
+                rows[name] = len(offsets)
+                offsets.append(offset)
+                lengths.append(0)
+            lengths[rows[name]] += len(segment)
+        if not rows:
+            raise ValueError(f"No sequences found in {self.path}")
+        if len(set(lengths)) != 1:
+            raise ValueError(
+                f"Sequences in {self.path} have different lengths: {sorted(set(lengths))}"
+            )
+
+        self.names = list(rows)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.n_seqs = len(self.names)
+        self.n_cols = lengths[0]
+
+        # Pass 2: copy interleaved blocks into their columns
+        self._matrix = self._new_matrix(self.n_seqs, self.n_cols)
+        cursor = np.zeros(self.n_seqs, dtype=np.int64)
+        for _, name, segment in self._stockholm_lines():
+            i = rows[name]
+            self._matrix[i, cursor[i]:cursor[i] + len(segment)] = np.frombuffer(segment, dtype=np.uint8)
+            cursor[i] += len(segment)
+
+    # ───────────────────────── access ─────────────────────────
+    def block(self, start, stop):
+        """Return columns [start, stop) of every sequence as an N x w uint8 array."""
+        stop = min(stop, self.n_cols)
+        if self._matrix is not None:
+            return self._matrix[:, start:stop]
+        cols = np.arange(start, stop, dtype=np.int64)
+        if np.all(self._width == self._width[0]) and np.all(self._stride == self._stride[0]):
+            line_offsets = (cols // self._width[0]) * self._stride[0] + cols % self._width[0]
+            positions = self._seq_start[:, None] + line_offsets[None, :]
+        else:
+            positions = (self._seq_start[:, None]
+                         + (cols[None, :] // self._width[:, None]) * self._stride[:, None]
+                         + cols[None, :] % self._width[:, None])
+        return self._data[positions]
+
+    def blocks(self, width=4096):
+        """Yield (start_column, block) pairs covering the whole alignment."""
+        for start in range(0, self.n_cols, width):
+            yield start, self.block(start, start + width)
+
+    def close(self):
+        self._matrix = None
+        self._data = None
+        try:
+            self._mm.close()
+        except BufferError:
+            # A caller still holds a view into the map; let GC release it
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Benchmark every pipeline stage on fixed reference inputs and flag regressions.
+
+Each stage runs as a child process on the inputs of one comparison
+(default: fncas12a-vs-spcas9) taken from the store, in a scratch directory
+with cold caches. The child's wall time, CPU time (user + system, its own
+subprocesses included) and peak RSS go to a JSON report:
+
+  download      mirror.py fetch of the reference PDB/FASTA files from a
+                local HTTP stand-in, into an empty mirror
+  concat        the concat_fasta step
+  mafft         msa_align.py without its cache
+  tmalign       TMalign plus tmalign_result.py
+  render_overview  render_overlay.py (RENDER_CACHE=0, in-process PyMOL)
+  render_view:<view>  render_multiview.py for one view, as its Snakemake job
+                (front_view, side_view, ..., overview); each view has its
+                own baseline row and tolerances
+  frames        generate_movie_frames.py
+  gif           create_movie.py on those frames
+  conservation  plot_alignment.py on the committed reference alignment
+  figures       create_annotated_figures.py on the rendered views
+
+Stages whose tool is missing (mafft, TMalign, PyMOL, matplotlib, Pillow) or
+whose input stage did not run are reported as skipped. With --baseline,
+every metric is compared against a stored report. A stage regresses when a metric
+grows by more than its relative tolerance and also by more than a noise
+floor. Tolerances come from --tolerance, then the baseline's "tolerances"
+(global or per stage), then DEFAULT_TOLERANCES. The exit status is 1 when
+anything regressed.
+
+Usage:
+  python workflow/scripts/pipeline_benchmark.py [-o pipeline_benchmark.json]
+      [--stages download concat ...] [--repeats 3] [--quality standard]
+      [--baseline workflow/benchmarks/baseline.json] [--tolerance wall_s=0.3]
+      [--save-baseline]
+"""
+import argparse
+import csv
+import datetime
+import functools
+import http.server
+import importlib.util
+import json
+import os
+import platform
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+
+SCRIPTS = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(os.path.dirname(SCRIPTS))
+DEFAULT_BASELINE = os.path.join(REPO, "workflow", "benchmarks", "baseline.json")
+DEFAULT_COMPARISON = "fncas12a-vs-spcas9"
+
+# Views rendered by render_multiview.py (MULTIVIEWS in the Snakefile)
+MULTIVIEWS = ["front_view", "side_view", "top_view", "domains_colored",
+              "active_site_zoom", "structural_flexibility"]
+ANNOTATED_VIEWS = ["front_view", "side_view", "domains_colored", "active_site_zoom"]
+
+METRICS = ["wall_s", "cpu_s", "max_rss_mb"]
+# Allowed relative growth per metric
+DEFAULT_TOLERANCES = {"wall_s": 0.25, "cpu_s": 0.25, "max_rss_mb": 0.20}
+# Absolute growth below which a change is noise, whatever the ratio
+NOISE_FLOOR = {"wall_s": 0.5, "cpu_s": 0.5, "max_rss_mb": 25.0}
+
+
+class Skip(Exception):
+    """A stage cannot run here; the message says why."""
+
+
+# ───────────────────────── reference inputs ─────────────────────────
+class Reference:
+    """Inputs of the reference comparison and the scratch layout of a run."""
+
+    def __init__(self, comparison, workdir, quality, workers):
+        with open(os.path.join(REPO, "config", "comparisons.tsv")) as f:
+            rows = {row["comparison"]: row for row in csv.DictReader(f, delimiter="\t")}
+        if comparison not in rows:
+            raise SystemExit(f"Unknown comparison {comparison!r} (expected one of {', '.join(rows)})")
+        import yaml
+        with open(os.path.join(REPO, "config", "config.yaml")) as f:
+            config = yaml.safe_load(f)
+
+        row = rows[comparison]
+        self.comparison = comparison
+        self.workdir = workdir
+        self.quality = quality
+        self.workers = workers
+        self.movie = config["movie"]
+        self.load_filter = config.get("load_filter") or {}
+        self.deviation = {"measure": "distance", "window": 9, "max": 5.0, **config.get("deviation", {})}
+        self.labels = [row["label_1"], row["label_2"]]
+        self.proteins = [config["proteins"].get(label, {}) for label in self.labels]
+        store = os.path.join(REPO, config["store"])
+        self.pdbs = [os.path.join(store, "pdb", f"{row[k]}.pdb") for k in ("pdb_1", "pdb_2")]
+        self.fastas = [os.path.join(store, "fasta", f"{row[k]}.fasta") for k in ("uniprot_1", "uniprot_2")]
+        self.refs = [f"pdb:{row['pdb_1']}", f"pdb:{row['pdb_2']}",
+                     f"fasta:{row['uniprot_1']}", f"fasta:{row['uniprot_2']}"]
+        self.alignment = os.path.join(REPO, comparison, "results", "alignment", "cas_dual_mafft.fasta")
+        self.done = set()
+        self.server_url = None
+
+    def stage_dir(self, stage):
+        return os.path.join(self.workdir, stage)
+
+    def env(self, stage):
+        """Child environment: in-process, uncached rendering and stage-local caches."""
+        env = dict(os.environ)
+        env.pop("RENDER_DAEMON_SOCKET", None)
+        env.update(
+            RENDER_CACHE="0",
+            RENDER_QUALITY=self.quality,
+            LOAD_FILTER=json.dumps(self.load_filter),
+            STRUCT_CACHE_DIR=os.path.join(self.stage_dir(stage), "struct-cache"),
+            MSA_CACHE_DIR=os.path.join(self.stage_dir(stage), "msa-cache"),
+            FETCH_MIRROR=os.path.join(self.stage_dir(stage), "mirror"),
+            PYTHONPATH=os.pathsep.join(filter(None, [SCRIPTS, env.get("PYTHONPATH")])),
+        )
+        if self.server_url:
+            env["FETCH_PDB_URL"] = self.server_url + "/pdb/{id}.pdb"
+            env["FETCH_FASTA_URL"] = self.server_url + "/fasta/{id}.fasta"
+        return env
+
+
+def _needs_program(name):
+    if shutil.which(name) is None:
+        raise Skip(f"{name} not on PATH")
+
+
+def _needs_module(name):
+    if importlib.util.find_spec(name) is None:
+        raise Skip(f"Python module {name} not installed")
+
+
+def _needs_stage(ref, stage):
+    if stage not in ref.done:
+        raise Skip(f"needs the {stage} stage")
+
+
+def _snakemake_script(ref, stage, script, **spec):
+    """Command running a Snakemake `script:` file with the given input/output/params."""
+    spec_path = os.path.join(ref.stage_dir(stage), "snakemake.json")
+    with open(spec_path, "w") as f:
+        json.dump(spec, f, indent=1)
+    return [sys.executable, os.path.abspath(__file__), "--run-script",
+            os.path.join(SCRIPTS, script), spec_path]
+
+
+# ───────────────────────── stages ─────────────────────────
+def stage_download(ref, out):
+    return [sys.executable, os.path.join(SCRIPTS, "mirror.py"), "fetch", *ref.refs,
+            "--dest", os.path.join(out, "store"), "--workers", str(ref.workers)]
+
+
+def stage_concat(ref, out):
+    return ["sh", "-c", 'cat "$@" > combined.fasta', "concat", *ref.fastas]
+
+
+def stage_mafft(ref, out):
+    _needs_program("mafft")
+    _needs_stage(ref, "concat")
+    return [sys.executable, os.path.join(SCRIPTS, "msa_align.py"),
+            os.path.join(ref.stage_dir("concat"), "combined.fasta"),
+            "-o", os.path.join(out, "cas_dual_mafft.fasta"), "--full"]
+
+
+def stage_tmalign(ref, out):
+    _needs_program("TMalign")
+    script = os.path.join(SCRIPTS, "tmalign_result.py")
+    return ["sh", "-c", f'TMalign "$1" "$2" -o overlay > tmalign_stats.txt && '
+                        f'"{sys.executable}" "{script}" tmalign_stats.txt',
+            "tmalign", *ref.pdbs]
+
+
+def stage_render_overview(ref, out):
+    _needs_module("pymol2")
+    return _snakemake_script(ref, "render_overview", "render_overlay.py",
+                             input={"pdb1": ref.pdbs[0], "pdb2": ref.pdbs[1]},
+                             output=[os.path.join(out, "Fn_overlay.png")],
+                             params={"labels": ref.labels, "usage": None}, threads=ref.workers)
+
+
+def view_png(ref, view):
+    """Image the render_view:<view> stage writes."""
+    return os.path.join(ref.stage_dir(f"render_view:{view}"), f"{view}.png")
+
+
+def stage_render_view(view, ref, out):
+    _needs_module("pymol2")
+    inputs = {"pdb1": ref.pdbs[0], "pdb2": ref.pdbs[1]}
+    if view == "structural_flexibility":
+        _needs_stage(ref, "tmalign")
+        inputs["stats"] = os.path.join(ref.stage_dir("tmalign"), "tmalign_stats.txt")
+    return _snakemake_script(ref, f"render_view:{view}", "render_multiview.py",
+                             input=inputs, output=[view_png(ref, view)],
+                             params={"view": view, "labels": ref.labels, "usage": None,
+                                     "settings": {"proteins": ref.proteins,
+                                                  "deviation": ref.deviation}},
+                             threads=ref.workers)
+
+
+def stage_frames(ref, out):
+    _needs_module("pymol2")
+    return [sys.executable, os.path.join(SCRIPTS, "generate_movie_frames.py"),
+            "--output-dir", os.path.join(out, "movie_frames"),
+            "--structure", ref.pdbs[0], ref.labels[0], "--structure", ref.pdbs[1], ref.labels[1],
+            "--axis", ref.movie.get("axis", "y"), "--step", str(ref.movie.get("step", 10)),
+            "--width", str(ref.movie["width"]), "--height", str(ref.movie["height"]),
+            "--workers", str(ref.workers)]
+
+
+def stage_gif(ref, out):
+    _needs_stage(ref, "frames")
+    return [sys.executable, os.path.join(SCRIPTS, "create_movie.py"),
+            os.path.join(ref.stage_dir("frames"), "movie_frames"), os.path.join(out, "rotation.gif")]
+
+
+def stage_conservation(ref, out):
+    _needs_module("matplotlib")
+    alignment = ref.alignment
+    if not os.path.exists(alignment):
+        _needs_stage(ref, "mafft")
+        alignment = os.path.join(ref.stage_dir("mafft"), "cas_dual_mafft.fasta")
+    return _snakemake_script(ref, "conservation", "plot_alignment.py",
+                             input=[alignment], output=[os.path.join(out, "cas_dual_mafft.png")],
+                             params={"labels": ref.labels})
+
+
+def stage_figures(ref, out):
+    _needs_module("PIL")
+    for view in ANNOTATED_VIEWS:
+        _needs_stage(ref, f"render_view:{view}")
+    return _snakemake_script(ref, "figures", "create_annotated_figures.py",
+                             input={"views": [view_png(ref, view) for view in ANNOTATED_VIEWS]},
+                             output=[os.path.join(out, "annotated", "publication_figure.png")],
+                             params={"labels": ref.labels, "proteins": ref.proteins})
+
+
+STAGES = {
+    "download": stage_download,
+    "concat": stage_concat,
+    "mafft": stage_mafft,
+    "tmalign": stage_tmalign,
+    "render_overview": stage_render_overview,
+    **{f"render_view:{view}": functools.partial(stage_render_view, view)
+       for view in MULTIVIEWS + ["overview"]},
+    "frames": stage_frames,
+    "gif": stage_gif,
+    "conservation": stage_conservation,
+    "figures": stage_figures,
+}
+
+
+# ───────────────────────── measurement ─────────────────────────
+def measure(argv, env, cwd, log_path):
+    """Run argv to completion; return (exit code, wall s, CPU s, peak RSS MiB)."""
+    with open(log_path, "w") as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(argv, env=env, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    rss = usage.ru_maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    return proc.returncode, wall, usage.ru_utime + usage.ru_stime, rss
+
+
+def run_stage(ref, name, repeats):
+    """Best (minimum) of each metric over repeats, or a skipped/failed row."""
+    out = ref.stage_dir(name)
+    samples = []
+    for _ in range(repeats):
+        shutil.rmtree(out, ignore_errors=True)
+        os.makedirs(out)
+        try:
+            argv = STAGES[name](ref, out)
+        except Skip as exc:
+            return {"skipped": str(exc)}
+        log_path = os.path.join(ref.workdir, f"{name}.log")
+        code, wall, cpu, rss = measure(argv, ref.env(name), out, log_path)
+        if code:
+            return {"failed": f"exit code {code}, see {log_path}"}
+        samples.append((wall, cpu, rss))
+    ref.done.add(name)
+    wall, cpu, rss = (min(values) for values in zip(*samples))
+    return {"wall_s": round(wall, 3), "cpu_s": round(cpu, 3), "max_rss_mb": round(rss, 1),
+            "repeats": repeats}
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_stand_in(ref):
+    """Serve the reference files as {url}/pdb/<id>.pdb and {url}/fasta/<id>.fasta."""
+    root = os.path.join(ref.workdir, "stand-in")
+    for kind, paths in (("pdb", ref.pdbs), ("fasta", ref.fastas)):
+        os.makedirs(os.path.join(root, kind), exist_ok=True)
+        for path in paths:
+            shutil.copy(path, os.path.join(root, kind))
+    handler = functools.partial(_QuietHandler, directory=root)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ref.server_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server
+
+
+# ───────────────────────── baseline ─────────────────────────
+def tolerance(baseline, stage, metric, overrides):
+    if metric in overrides:
+        return overrides[metric]
+    configured = baseline.get("tolerances", {})
+    return configured.get(stage, {}).get(metric, configured.get(metric, DEFAULT_TOLERANCES[metric]))
+
+
+def compare(stages, baseline, overrides=None):
+    """Regressions as (stage, metric, baseline value, current value, tolerance)."""
+    regressions = []
+    for name, row in stages.items():
+        old = baseline.get("stages", {}).get(name, {})
+        for metric in METRICS:
+            if metric not in row or metric not in old:
+                continue
+            allowed = tolerance(baseline, name, metric, overrides or {})
+            growth = row[metric] - old[metric]
+            if growth > NOISE_FLOOR[metric] and growth > old[metric] * allowed:
+                regressions.append((name, metric, old[metric], row[metric], allowed))
+    return regressions
+
+
+def print_report(stages, baseline):
+    old_stages = baseline.get("stages", {}) if baseline else {}
+    print(f"\n{'stage':<34} {'wall s':>8} {'cpu s':>8} {'rss MiB':>8}   vs baseline wall")
+    for name, row in stages.items():
+        if "wall_s" not in row:
+            print(f"{name:<34} {row.get('skipped') or row.get('failed')}")
+            continue
+        line = f"{name:<34} {row['wall_s']:8.2f} {row['cpu_s']:8.2f} {row['max_rss_mb']:8.1f}"
+        old = old_stages.get(name, {})
+        if old.get("wall_s"):
+            line += f"   {old['wall_s']:8.2f} ({(row['wall_s'] / old['wall_s'] - 1) * 100:+.0f}%)"
+        print(line)
+
+
+# ───────────────────────── Snakemake script shim ─────────────────────────
+class _Named(list):
+    """Positional plus attribute access, like Snakemake's input/output/params."""
+
+    def __init__(self, values):
+        if isinstance(values, dict):
+            super().__init__(values.values())
+            self.__dict__.update(values)
+        else:
+            super().__init__(values)
+
+
+def run_script(script, spec_path):
+    """Execute a Snakemake `script:` file with a `snakemake` object built from spec_path."""
+    with open(spec_path) as f:
+        spec = json.load(f)
+    snakemake = types.SimpleNamespace(
+        input=_Named(spec.get("input", [])), output=_Named(spec.get("output", [])),
+        params=_Named(spec.get("params", {})), threads=spec.get("threads", 1), wildcards=_Named({}), log=_Named([]))
+    for path in snakemake.output:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    sys.path.insert(0, os.path.dirname(script))
+    runpy.run_path(script, init_globals={"snakemake": snakemake}, run_name="__main__")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages")
+    parser.add_argument("--stages", nargs="*", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--comparison", default=DEFAULT_COMPARISON, help="Reference comparison")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per stage (minimum is kept)")
+    parser.add_argument("--quality", default="standard", help="Render quality tier")
+    parser.add_argument("--workers", type=int, default=4, help="Download / frame workers and render threads")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Stored report to compare with")
+    parser.add_argument("--tolerance", action="append", default=[], metavar="METRIC=FRACTION",
+                        help=f"Override a tolerance ({', '.join(METRICS)}), e.g. wall_s=0.3")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the baseline (keeping its tolerances)")
+    parser.add_argument("--keep", help="Keep the scratch directory here")
+    parser.add_argument("-o", "--output", default="pipeline_benchmark.json")
+    parser.add_argument("--run-script", nargs=2, metavar=("SCRIPT", "SPEC"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_script:
+        run_script(*args.run_script)
+        return
+    overrides = {}
+    for item in args.tolerance:
+        metric, _, value = item.partition("=")
+        if metric not in METRICS:
+            parser.error(f"unknown metric {metric!r} in --tolerance")
+        overrides[metric] = float(value)
+
+    workdir = args.keep or tempfile.mkdtemp(prefix="pipeline-benchmark-")
+    os.makedirs(workdir, exist_ok=True)
+    ref = Reference(args.comparison, os.path.abspath(workdir), args.quality, args.workers)
+    server = start_stand_in(ref)
+    stages = {}
+    try:
+        # Fixed stage order, so dependent stages find their inputs
+        for name in (s for s in STAGES if s in args.stages):
+            print(f"  {name} ...", file=sys.stderr)
+            stages[name] = run_stage(ref, name, args.repeats)
+    finally:
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "host": platform.node(), "platform": platform.platform(),
+        "cpus": os.cpu_count(), "python": platform.python_version(),
+        "comparison": args.comparison, "quality": args.quality, "stages": stages,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(stages, baseline)
+    print(f"Wrote {args.output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        saved = {**report, "tolerances": (baseline or {}).get("tolerances", DEFAULT_TOLERANCES)}
+        with open(args.baseline, "w") as f:
+            json.dump(saved, f, indent=1)
+        print(f"Saved baseline: {args.baseline}")
+        return
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    regressions = compare(stages, baseline, overrides)
+    for name, metric, old, new, allowed in regressions:
+        print(f"REGRESSION {name} {metric}: {old} -> {new} (tolerance {allowed:.0%})")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,26 +6,19 @@ import matplotlib
 matplotlib.use('Agg')  # For headless operation
 import matplotlib.pyplot as plt
 import numpy as np
-from Bio import SeqIO
+from alignment_stats import stream_column_stats
+from msa_reader import MSAReader
 
-# Read alignment
+# Read alignment (memory-mapped, processed in column blocks)
 alignment_file = snakemake.input[0]
-sequences = list(SeqIO.parse(alignment_file, "fasta"))
+label_1, label_2 = snakemake.params.labels
 
 # Calculate conservation score at each position
-alignment_length = len(sequences[0].seq)
-conservation = []
-
-for i in range(alignment_length):
-    column = [seq.seq[i] for seq in sequences]
-    # Skip gap positions
-    non_gap = [aa for aa in column if aa != '-']
-    if len(non_gap) == 0:
-        conservation.append(0)
-    elif len(set(non_gap)) == 1:
-        conservation.append(1)  # Identical
-    else:
-        conservation.append(0.5)  # Similar but not identical
+# (1 = identical, 0.5 = similar but not identical, 0 = gaps only)
+with MSAReader(alignment_file) as reader:
+    n_sequences = reader.n_seqs
+    alignment_length = reader.n_cols
+    conservation = stream_column_stats(reader)["conservation"]
 
 # Create plot
 fig, ax = plt.subplots(1, 1, figsize=(16, 6))
@@ -37,7 +30,7 @@ ax.bar(positions, conservation, width=1.0, edgecolor='none')
 # Customize plot
 ax.set_xlabel('Alignment Position', fontsize=12)
 ax.set_ylabel('Conservation Score', fontsize=12)
-ax.set_title(f'SpCas9 vs FnCas9 Sequence Conservation\n{len(sequences)} sequences, {alignment_length} positions', fontsize=14)
+ax.set_title(f'{label_1} vs {label_2} Sequence Conservation\n{n_sequences} sequences, {alignment_length} positions', fontsize=14)
 ax.set_ylim(0, 1.1)
 ax.set_xlim(0, len(conservation))
 
@@ -4,34 +4,26 @@ Quick alignment visualization without Snakemake/conda dependencies.
 Generates a simple conservation plot.
 """
 import sys
+import numpy as np
+from alignment_stats import stream_column_stats
+from msa_reader import MSAReader
+
+alignment_file = "results/alignment/cas_dual_mafft.fasta"
 
 # Check if we have matplotlib
 try:
     import matplotlib
     matplotlib.use('Agg')
     import matplotlib.pyplot as plt
-    import numpy as np
 except ImportError:
     print("Error: matplotlib not installed. Creating a text summary instead.")
     # Create a simple text summary
-    with open("results/alignment/cas_dual_mafft.fasta", "r") as f:
-        lines = f.readlines()
-    
-    seqs = []
-    current_seq = ""
-    for line in lines:
-        if line.startswith(">"):
-            if current_seq:
-                seqs.append(current_seq)
-            current_seq = ""
-        else:
-            current_seq += line.strip()
-    if current_seq:
-        seqs.append(current_seq)
+    with MSAReader(alignment_file) as reader:
+        stats = stream_column_stats(reader)
     
     # Simple conservation analysis
-    total_pos = len(seqs[0])
-    identical = sum(1 for i in range(total_pos) if all(s[i] == seqs[0][i] for s in seqs))
+    total_pos = len(stats["identity"])
+    identical = int(np.count_nonzero(stats["identity"] == 1.0))
     
     with open("results/alignment/cas_dual_mafft.png.txt", "w") as out:
         out.write("Alignment Conservation Summary\n")
@@ -45,35 +37,11 @@ except ImportError:
     sys.exit(0)
 
 # If matplotlib is available, create the plot
-alignment_file = "results/alignment/cas_dual_mafft.fasta"
-
-# Read sequences
-sequences = []
-current_seq = ""
-with open(alignment_file, "r") as f:
-    for line in f:
-        if line.startswith(">"):
-            if current_seq:
-                sequences.append(current_seq)
-            current_seq = ""
-        else:
-            current_seq += line.strip()
-if current_seq:
-    sequences.append(current_seq)
-
-# Calculate conservation
-alignment_length = len(sequences[0])
-conservation = []
-
-for i in range(alignment_length):
-    column = [seq[i] for seq in sequences]
-    non_gap = [aa for aa in column if aa != '-']
-    if len(non_gap) == 0:
-        conservation.append(0)
-    elif len(set(non_gap)) == 1:
-        conservation.append(1)
-    else:
-        conservation.append(0.5)
+# Calculate conservation in column blocks from the memory-mapped alignment
+with MSAReader(alignment_file) as reader:
+    n_sequences = reader.n_seqs
+    alignment_length = reader.n_cols
+    conservation = stream_column_stats(reader)["conservation"]
 
 # Create plot
 fig, ax = plt.subplots(figsize=(16, 6))
@@ -82,7 +50,7 @@ ax.bar(positions, conservation, width=1.0, edgecolor='none', color='steelblue')
 
 ax.set_xlabel('Alignment Position', fontsize=12)
 ax.set_ylabel('Conservation Score', fontsize=12)
-ax.set_title(f'FnCas9 vs FnCas12a Sequence Conservation\n{len(sequences)} sequences, {alignment_length} positions', fontsize=14)
+ax.set_title(f'FnCas9 vs FnCas12a Sequence Conservation\n{n_sequences} sequences, {alignment_length} positions', fontsize=14)
 ax.set_ylim(0, 1.1)
 ax.set_xlim(0, len(conservation))
 ax.grid(True, alpha=0.3, axis='y')
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache for PyMOL ray-traced images.
+
+A render is keyed on a hash of the input structure files, the PyMOL
+settings, the per-atom colour/representation/label state, the atom
+coordinates, the view matrix and the output size. A cache hit copies the
+stored PNG to the requested path without calling cmd.ray; a miss renders,
+then stores the result. The cache is capped in size with least-recently-
+used eviction and keeps hit/miss counters.
+
+Environment:
+  RENDER_CACHE_DIR     cache location (default: .cache/render)
+  RENDER_CACHE_MAX_MB  size cap in megabytes (default: 2048)
+  RENDER_CACHE=0       disable the cache entirely
+
+Usage:
+  python scripts/render_cache.py stats
+  python scripts/render_cache.py clear
+"""
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import render_quality
+
+DEFAULT_CACHE_DIR = ".cache/render"
+DEFAULT_MAX_MB = 2048
+
+# Settings that do not change the rendered image
+_IGNORED_SETTINGS = {"max_threads", "logging", "suspend_updates", "internal_gui"}
+
+_file_digests = {}
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, memoized on (path, size, mtime)."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _file_digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _file_digests[memo_key] = h.hexdigest()
+    return _file_digests[memo_key]
+
+
+def scene_digest(cmd, inputs=()):
+    """Hash everything that determines the image except the view and output size."""
+    from pymol import setting
+
+    h = hashlib.sha256()
+    h.update(repr(cmd.get_version()[0]).encode())
+    for path in inputs:
+        h.update(file_digest(path).encode())
+
+    settings = [(name, cmd.get(name)) for name in setting.get_name_list()
+                if name not in _IGNORED_SETTINGS]
+    h.update(repr(settings).encode())
+    h.update(repr(cmd.get_names("objects", enabled_only=1)).encode())
+
+    atoms = []
+    # b: putty cartoons are sized by it (e.g. residue_deviation.inject)
+    cmd.iterate("all", "atoms.append((model, color, reps, cartoon, ss, label, b))",
+                space={"atoms": atoms})
+    h.update(repr(atoms).encode())
+
+    coords = cmd.get_coords("all")
+    if coords is not None:
+        h.update(coords.round(3).tobytes())
+    return h.hexdigest()
+
+
+def render_key(scene, view, width, height, dpi=None):
+    """Combine a scene digest with the view matrix and output size."""
+    view = tuple(round(v, 4) for v in view)
+    payload = repr((scene, view, int(width), int(height), dpi))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RenderCache:
+    """Size-capped LRU store of rendered PNGs addressed by render key."""
+
+    def __init__(self, cache_dir=None, max_bytes=None, inputs=()):
+        self.cache_dir = cache_dir or os.environ.get("RENDER_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get("RENDER_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 2**20)
+        self.max_bytes = max_bytes
+        self.inputs = list(inputs)
+        self.enabled = os.environ.get("RENDER_CACHE", "1") != "0"
+        self._objects = os.path.join(self.cache_dir, "objects")
+        os.makedirs(self._objects, exist_ok=True)
+
+    # ───────────────────────── bookkeeping ─────────────────────────
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(os.path.join(self.cache_dir, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _stats_path(self):
+        return os.path.join(self.cache_dir, "stats.json")
+
+    def _read_counters(self):
+        try:
+            with open(self._stats_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _count(self, field, n=1):
+        with self._locked():
+            counters = self._read_counters()
+            counters[field] = counters.get(field, 0) + n
+            with open(self._stats_path(), "w") as f:
+                json.dump(counters, f)
+
+    def _entry_path(self, key):
+        return os.path.join(self._objects, key[:2], f"{key}.png")
+
+    def _entries(self):
+        for sub in os.listdir(self._objects):
+            subdir = os.path.join(self._objects, sub)
+            for name in os.listdir(subdir):
+                path = os.path.join(subdir, name)
+                st = os.stat(path)
+                yield path, st.st_size, st.st_mtime
+
+    # ───────────────────────── cache operations ─────────────────────────
+    def lookup(self, key):
+        """Path of the cached image for key, marked as most recently used; None on a miss."""
+        if not self.enabled:
+            return None
+        entry = self._entry_path(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry
+
+    def fetch(self, key, output_path):
+        """Copy the cached image for key to output_path; return True on a hit."""
+        entry = self.lookup(key)
+        if entry is None:
+            return False
+        try:
+            shutil.copyfile(entry, output_path)
+        except FileNotFoundError:  # evicted in the meantime
+            return False
+        return True
+
+    def store(self, key, png_path):
+        """Add a rendered PNG to the cache and evict old entries over the size cap."""
+        if not self.enabled:
+            return
+        entry = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(entry), suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(png_path, tmp)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def evict(self):
+        """Remove least-recently-used entries until the cache fits in max_bytes."""
+        with self._locked():
+            entries = sorted(self._entries(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            evicted = 0
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+                total -= size
+                evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    def stats(self):
+        """Return hit/miss counters plus current entry count and size."""
+        counters = self._read_counters()
+        entries = list(self._entries())
+        counters["entries"] = len(entries)
+        counters["bytes"] = sum(size for _, size, _ in entries)
+        counters["max_bytes"] = self.max_bytes
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        return counters
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self._objects, exist_ok=True)
+
+    # ───────────────────────── PyMOL integration ─────────────────────────
+    def render(self, cmd, output_path, width, height, dpi=None, scene=None, tier=None):
+        """
+        Drop-in replacement for cmd.ray(width, height) + cmd.png(output_path, dpi=dpi).
+
+        The request is mapped through the render quality tier (tier or
+        $RENDER_QUALITY, see render_quality.py). `scene` may be a precomputed
+        scene_digest when only the view changes between renders (e.g.
+        rotation frames). Returns True on a cache hit.
+        """
+        tier = render_quality.tier_name(tier)
+        render_quality.apply(cmd, tier)
+        width, height, dpi = render_quality.output_size(tier, width, height, dpi)
+        if scene is None:
+            scene = scene_digest(cmd, self.inputs)
+        key = render_key(scene, cmd.get_view(), width, height, dpi)
+        if self.fetch(key, output_path):
+            print(f"  Render cache hit: {output_path}")
+            return True
+        render_quality.capture(cmd, tier, width, height)
+        if dpi is None:
+            cmd.png(output_path)
+        else:
+            cmd.png(output_path, dpi=dpi)
+        self.store(key, output_path)
+        return False
+
+
+if __name__ == "__main__":
+    cache = RenderCache()
+    action = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if action == "stats":
+        for field, value in cache.stats().items():
+            print(f"{field:>10}: {value}")
+    elif action == "clear":
+        cache.clear()
+        print(f"Cleared render cache: {cache.cache_dir}")
+    else:
+        sys.exit(f"Unknown action: {action} (expected 'stats' or 'clear')")
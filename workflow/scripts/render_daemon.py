@@ -0,0 +1,891 @@
+#!/usr/bin/env python3
+"""
+Long-lived PyMOL render service shared by all render rules.
+
+The daemon keeps a pool of resident PyMOL engine processes ("slots", at most
+--slots or $RENDER_DAEMON_SLOTS, started on demand). Each client connection
+holds one slot for its lifetime, so render jobs running side by side trace
+in parallel, each in its own PyMOL. In every slot a structure pair is loaded
+and superposed once; later requests for the same pair restore the aligned
+scene from memory instead of re-parsing the PDB files, and a connection is
+preferably given an idle slot that already holds its scene. Render scripts
+are thin clients that send scene, command and render requests over a Unix
+socket, so interpreter startup and structure parsing happen once per slot
+instead of once per rule.
+
+Each engine keeps at most $RENDER_SESSIONS (default 4) aligned scenes as
+in-memory sessions; the least recently used one is evicted beyond that, so
+a slot's memory stays within its job's budget however many comparisons,
+views and load filters the daemon has served.
+
+Rotation movies can skip the PNG frames entirely: render_movie streams the
+ray-traced pixels of each view through a bounded queue into the movie
+encoders (create_movie.py), so encoding frame k overlaps with ray-tracing
+the frames after it.
+
+Scripts obtain a renderer with connect(). When RENDER_DAEMON_SOCKET is set
+(the Snakefile does this) the client connects to the daemon, starting it on
+first use; otherwise an in-process RenderEngine with the same interface is
+returned, so every script still runs standalone.
+
+Ray tracing uses the threads of the job that asked for the render:
+connect(threads=snakemake.threads) makes every render of that client run
+with PyMOL's max_threads set to the job's slot, and frame worker pools split
+the slot between their workers. The daemon itself owns no cores.
+
+The ray-tracing CPU time and memory are spent in the daemon, not in the job.
+Every response carries the CPU seconds and peak RSS its slot (engine and
+frame workers) used for the request; connect(usage=PATH) sums them over the
+client's requests and writes them to PATH when the client closes. The
+Snakefile points PATH next to the job's benchmark file, where run_report.py
+merges it into the job.
+
+Usage:
+  python scripts/render_daemon.py serve  [--socket PATH] [--idle-timeout S] [--slots N]
+  python scripts/render_daemon.py status [--socket PATH]
+  python scripts/render_daemon.py stop   [--socket PATH]
+"""
+import argparse
+import collections
+import contextlib
+import fcntl
+import functools
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import queue
+import resource
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import render_quality
+from machine_resources import available_cores
+from render_cache import RenderCache, file_digest, render_key, scene_digest
+from structure_cache import cached_structure, filter_atoms, load_filter, load_into_pymol
+
+DEFAULT_SOCKET = ".cache/render.sock"
+DEFAULT_IDLE_TIMEOUT = 900
+DEFAULT_QUEUE_SIZE = 4   # streamed frames buffered ahead of the encoder
+DEFAULT_SLOTS = 4        # engine processes, i.e. render jobs served at once
+DEFAULT_SESSIONS = 4     # resident aligned scenes per engine
+
+# Streamed frames pass through RAM-backed scratch files where available
+_SCRATCH = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# PyMOL commands clients may run on the resident scene
+ALLOWED_COMMANDS = {
+    "align", "alter", "bg_color", "cartoon", "color", "create", "delete", "disable",
+    "enable", "frame", "get_chains", "get_coords", "get_names", "get_object_list",
+    "get_view", "hide", "label", "mset", "orient", "pseudoatom", "save",
+    "select", "set", "set_name", "set_view", "show", "spectrum",
+    "split_states", "turn", "zoom",
+}
+
+# Commands that do not change the scene and need not be replayed in workers
+_QUERY_COMMANDS = {"get_chains", "get_coords", "get_names", "get_object_list",
+                   "get_view", "save"}
+
+
+def start_pymol():
+    """
+    Start an independent headless PyMOL instance. Keep the returned session
+    referenced: its cmd API only holds a weak reference to it.
+    """
+    import pymol2
+    session = pymol2.PyMOL()
+    session.start()
+    return session
+
+
+def _jsonable(obj):
+    return obj.tolist() if hasattr(obj, "tolist") else str(obj)
+
+
+def _read_pixels(path):
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return np.array(img.convert("RGB"))
+
+
+def ray_pixels(cmd, width, height, png_path=None, tier=None):
+    """
+    Render the current view (see render_quality.capture) and return its
+    pixels as an RGB array.
+
+    The image leaves PyMOL as an uncompressed PPM in scratch memory, which
+    costs a copy instead of a PNG encode and decode. With png_path the same
+    image is also saved as a PNG.
+    """
+    render_quality.capture(cmd, tier, width, height)
+    fd, scratch = tempfile.mkstemp(suffix=".png", dir=_SCRATCH)
+    os.close(fd)
+    try:
+        try:
+            cmd.png(scratch, format=1)   # 1: PPM
+        except TypeError:                # PyMOL without the format argument
+            cmd.png(scratch)
+        pixels = _read_pixels(scratch)
+    finally:
+        os.remove(scratch)
+    if png_path:
+        cmd.png(png_path)
+    return pixels
+
+
+def _cached_pixels(entry, png_path):
+    if png_path:
+        shutil.copyfile(entry, png_path)
+    return _read_pixels(entry)
+
+
+# ───────────────────────── render engine ─────────────────────────
+class RenderEngine:
+    """
+    PyMOL scene manager used by the daemon and as the in-process fallback.
+
+    Structures are loaded from the binary structure cache rather than PDB
+    text. Aligned scenes are kept as in-memory sessions keyed on the structure
+    files, so switching back to a pair costs a session restore, not a parse
+    and alignment. At most max_sessions (default: $RENDER_SESSIONS) are
+    kept, least recently used first out. Renders go through the
+    content-addressed RenderCache.
+    """
+
+    def __init__(self, cmd=None, threads=None, max_sessions=None):
+        self._pymol = None if cmd else start_pymol()
+        self.cmd = cmd or self._pymol.cmd
+        self.threads = threads
+        self.cache = RenderCache()
+        self._sessions = collections.OrderedDict()
+        self.max_sessions = max(1, max_sessions or int(os.environ.get("RENDER_SESSIONS",
+                                                                      DEFAULT_SESSIONS)))
+        self.evictions = 0
+        self._spec = None
+        self._log = []
+        self._pool = None
+        self._pool_size = 0
+
+    def scene(self, structures, align=True):
+        """
+        Activate the scene for [(pdb_path, object_name[, load_filter]), ...].
+
+        Only the atoms passing each structure's load filter (default: from
+        $LOAD_FILTER, see structure_cache.load_filter) are loaded. Every
+        structure after the first is aligned onto the first. Returns the
+        alignment results and whether the scene was already resident.
+        """
+        cmd = self.cmd
+        structures = [(path, name, rest[0] if rest else load_filter(path))
+                      for path, name, *rest in structures]
+        key = hashlib.sha256(repr(
+            ([(file_digest(path), name, json.dumps(spec, sort_keys=True))
+              for path, name, spec in structures], align)
+        ).encode()).hexdigest()
+
+        resident = key in self._sessions
+        if resident:
+            self._sessions.move_to_end(key)
+            cmd.set_session(self._sessions[key]["session"])
+        else:
+            cmd.reinitialize()
+            for path, name, spec in structures:
+                load_into_pymol(cmd, filter_atoms(cached_structure(path), **spec), name, path)
+            alignment = []
+            if align:
+                reference = structures[0][1]
+                for _, name, _ in structures[1:]:
+                    alignment.append(list(cmd.align(name, reference)))
+            self._sessions[key] = {"session": cmd.get_session(), "alignment": alignment}
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+        self._spec = {"structures": structures, "align": align}
+        self._log = []
+        self.cache.inputs = [path for path, _, _ in structures]
+        return {"alignment": self._sessions[key]["alignment"], "resident": resident}
+
+    def call(self, name, args=(), kwargs=None):
+        """Run a whitelisted PyMOL command on the active scene."""
+        if name not in ALLOWED_COMMANDS:
+            raise ValueError(f"PyMOL command not allowed: {name}")
+        result = getattr(self.cmd, name)(*args, **(kwargs or {}))
+        if name not in _QUERY_COMMANDS:
+            self._log.append([name, list(args), kwargs or {}])
+        return result
+
+    def _set_threads(self, threads):
+        """Ray-trace with `threads` (default: the engine's) PyMOL threads."""
+        threads = threads or self.threads
+        if threads:
+            self.cmd.set("max_threads", threads)
+
+    def _worker_threads(self, threads, workers):
+        """PyMOL threads of each of `workers` frame workers sharing a slot of `threads`."""
+        return max(1, (threads or self.threads or available_cores()) // workers)
+
+    def render(self, output, width, height, dpi=None, tier=None, threads=None):
+        """Ray-trace the current view to output (or copy it from the render cache)."""
+        self._set_threads(threads)
+        hit = self.cache.render(self.cmd, output, width, height, dpi, tier=tier)
+        return {"path": output, "cache_hit": hit}
+
+    def render_frames(self, views, paths, width, height, workers=1, tier=None, threads=None):
+        """
+        Render one PNG per view matrix of the current scene.
+
+        Cached frames are copied; the rest are ray-traced here or, with
+        workers > 1, on a persistent pool of worker processes that rebuild
+        the scene once and keep it for later requests. The workers share
+        `threads` ray-tracing threads. Sizes are mapped through the render
+        quality tier.
+        """
+        cmd = self.cmd
+        tier = render_quality.tier_name(tier)
+        render_quality.apply(cmd, tier)
+        width, height, _ = render_quality.output_size(tier, width, height)
+        scene = scene_digest(cmd, self.cache.inputs)
+        tasks = []
+        for view, path in zip(views, paths):
+            key = render_key(scene, view, width, height)
+            if not self.cache.fetch(key, path):
+                tasks.append((tuple(view), path, width, height, key, tier))
+
+        workers = max(1, min(workers, len(tasks)))
+        if workers == 1:
+            self._set_threads(threads)
+            current = cmd.get_view()
+            for view, path, w, h, key, _ in tasks:
+                cmd.set_view(view)
+                render_quality.capture(cmd, tier, w, h)
+                cmd.png(path)
+                self.cache.store(key, path)
+                print(f"  Frame: {path}")
+            cmd.set_view(current)
+        else:
+            spec = json.dumps({"scene": self._spec, "log": self._log}, default=_jsonable)
+            pool = self._frame_pool(workers, self._worker_threads(threads, workers))
+            jobs = [(spec,) + task for task in tasks]
+            for path in pool.imap_unordered(_render_task, jobs):
+                print(f"  Frame: {path}")
+        return {"rendered": len(tasks), "cached": len(paths) - len(tasks)}
+
+    def stream_frames(self, views, width, height, workers=1, frames_dir=None,
+                      queue_size=DEFAULT_QUEUE_SIZE, counts=None, tier=None, threads=None):
+        """
+        Yield the pixels (RGB arrays) of one frame per view matrix, in order.
+
+        Frames are ray-traced ahead of the consumer by up to queue_size
+        frames (plus one per worker), on the worker pool or, with one worker,
+        in a background thread. Cached frames are read from the render
+        cache; with frames_dir every frame is also written there as
+        frame_XXX.png, and only then are new frames added to the cache.
+        counts, when given, receives the number of rendered and cached frames.
+        """
+        counts = counts if counts is not None else {}
+        counts.update(rendered=0, cached=0)
+        tier = render_quality.tier_name(tier)
+        render_quality.apply(self.cmd, tier)
+        width, height, _ = render_quality.output_size(tier, width, height)
+        scene = scene_digest(self.cmd, self.cache.inputs)
+        tasks = []
+        for i, view in enumerate(views):
+            path = os.path.join(frames_dir, f"frame_{i:03d}.png") if frames_dir else None
+            key = render_key(scene, view, width, height)
+            tasks.append((tuple(view), width, height, key, path, tier))
+        if frames_dir:
+            os.makedirs(frames_dir, exist_ok=True)
+
+        workers = max(1, min(workers, len(tasks)))
+        if workers == 1:
+            self._set_threads(threads)
+            yield from self._stream_serial(tasks, queue_size, counts)
+            return
+        spec = json.dumps({"scene": self._spec, "log": self._log}, default=_jsonable)
+        pool = self._frame_pool(workers, self._worker_threads(threads, workers))
+        pending = collections.deque()
+        for task in tasks:
+            _, _, _, key, path, _ = task
+            entry = self.cache.lookup(key)
+            if entry is not None:
+                pending.append(functools.partial(_cached_pixels, entry, path))
+                counts["cached"] += 1
+            else:
+                pending.append(pool.apply_async(_stream_task, ((spec,) + task,)).get)
+                counts["rendered"] += 1
+            if len(pending) > workers + queue_size:
+                yield pending.popleft()()
+        while pending:
+            yield pending.popleft()()
+
+    def _stream_serial(self, tasks, queue_size, counts):
+        cmd = self.cmd
+        frames = queue.Queue(maxsize=max(1, queue_size))
+        done = object()
+
+        def produce():
+            current = cmd.get_view()
+            try:
+                for view, width, height, key, path, tier in tasks:
+                    entry = self.cache.lookup(key)
+                    if entry is not None:
+                        frames.put(_cached_pixels(entry, path))
+                        counts["cached"] += 1
+                        continue
+                    cmd.set_view(view)
+                    frames.put(ray_pixels(cmd, width, height, path, tier))
+                    if path:
+                        self.cache.store(key, path)
+                    counts["rendered"] += 1
+            except Exception as exc:
+                frames.put(exc)
+            finally:
+                cmd.set_view(current)
+                frames.put(done)
+
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            item = frames.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def render_movie(self, views, outputs, width, height, workers=1, frames_dir=None,
+                     duration=100, quality=80, queue_size=DEFAULT_QUEUE_SIZE, tier=None,
+                     threads=None):
+        """
+        Ray-trace one frame per view straight into the movie encoders for
+        outputs (.gif, .webp, .mp4); frame PNGs are written only with
+        frames_dir. quality is the WebP quality, tier the render quality tier,
+        threads the ray-tracing threads shared by the workers.
+        """
+        from PIL import Image
+        from create_movie import write_movies
+
+        counts = {}
+        frames = self.stream_frames(views, width, height, workers, frames_dir, queue_size,
+                                    counts, tier, threads)
+        write_movies((Image.fromarray(pixels) for pixels in frames), len(views), outputs,
+                     duration, quality, queue_size)
+        return {**counts, "outputs": outputs}
+
+    def _frame_pool(self, workers, max_threads):
+        if self._pool is None or self._pool_size != (workers, max_threads):
+            self.close_pool()
+            # PyMOL is not fork-safe
+            ctx = mp.get_context("spawn")
+            self._pool = ctx.Pool(workers, initializer=_init_worker, initargs=(max_threads,))
+            self._pool_size = (workers, max_threads)
+        return self._pool
+
+    def close_pool(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def stats(self):
+        return {"resident_scenes": len(self._sessions), "max_scenes": self.max_sessions,
+                "scene_evictions": self.evictions, "cache": self.cache.stats()}
+
+    def pids(self):
+        """This process and its frame workers."""
+        workers = [process.pid for process in self._pool._pool] if self._pool is not None else []
+        return [os.getpid()] + workers
+
+    def close(self):
+        self.close_pool()
+
+
+# ───────────────────────── frame worker processes ─────────────────────────
+_worker_engine = None
+_worker_threads = 1
+_worker_spec = None
+
+
+def _init_worker(max_threads):
+    global _worker_engine, _worker_threads
+    _worker_engine = RenderEngine()
+    _worker_threads = max_threads
+
+
+def _worker_scene(spec):
+    """The worker's PyMOL cmd with the scene described by spec active."""
+    global _worker_spec
+    engine = _worker_engine
+    cmd = engine.cmd
+    if spec != _worker_spec:
+        state = json.loads(spec)
+        engine.scene(state["scene"]["structures"], state["scene"]["align"])
+        for name, args, kwargs in state["log"]:
+            engine.call(name, args, kwargs)
+        cmd.set("max_threads", _worker_threads)
+        _worker_spec = spec
+    return cmd
+
+
+def _render_task(task):
+    spec, view, path, width, height, key, tier = task
+    cmd = _worker_scene(spec)
+    render_quality.apply(cmd, tier)
+    cmd.set_view(view)
+    render_quality.capture(cmd, tier, width, height)
+    cmd.png(path)
+    _worker_engine.cache.store(key, path)
+    return path
+
+
+def _stream_task(task):
+    spec, view, width, height, key, path, tier = task
+    cmd = _worker_scene(spec)
+    render_quality.apply(cmd, tier)
+    cmd.set_view(view)
+    pixels = ray_pixels(cmd, width, height, path, tier)
+    if path:
+        _worker_engine.cache.store(key, path)
+    return pixels
+
+
+# ───────────────────────── resource usage ─────────────────────────
+def _cpu_seconds(pid):
+    """User plus system CPU seconds of a live process (0 if unknown)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rpartition(")")[2].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        if pid != os.getpid():
+            return 0.0
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+
+
+def _reaped_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rss_mb(pid):
+    """Peak RSS of a process in MB since its last _reset_peak (0 if unknown)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return 0.0
+
+
+def _reset_peak(pid):
+    with contextlib.suppress(OSError):
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+
+
+def usage_start(pids):
+    """Start measuring the processes in pids (see usage_since)."""
+    for pid in pids:
+        _reset_peak(pid)
+    return {"cpu": {pid: _cpu_seconds(pid) for pid in pids}, "reaped": _reaped_cpu_seconds()}
+
+
+def usage_since(start, pids):
+    """{"cpu_time", "max_rss"} of pids (plus reaped children) since usage_start."""
+    cpu = sum(_cpu_seconds(pid) - start["cpu"].get(pid, 0.0) for pid in pids)
+    cpu += _reaped_cpu_seconds() - start["reaped"]
+    return {"cpu_time": round(cpu, 3), "max_rss": round(sum(_peak_rss_mb(pid) for pid in pids), 1)}
+
+
+# ───────────────────────── engine slots ─────────────────────────
+def dispatch(engine, request):
+    """Run one scene, command or render request on a RenderEngine."""
+    op = request.get("op")
+    if op == "scene":
+        return engine.scene(request["structures"], request.get("align", True))
+    if op == "call":
+        return engine.call(request["name"], request.get("args", ()), request.get("kwargs"))
+    if op == "render":
+        return engine.render(request["output"], request["width"], request["height"],
+                             request.get("dpi"), request.get("tier"), request.get("threads"))
+    if op == "render_frames":
+        return engine.render_frames(request["views"], request["paths"], request["width"],
+                                    request["height"], request.get("workers", 1),
+                                    request.get("tier"), request.get("threads"))
+    if op == "render_movie":
+        return engine.render_movie(request["views"], request["outputs"], request["width"],
+                                   request["height"], request.get("workers", 1),
+                                   request.get("frames_dir"), request.get("duration", 100),
+                                   request.get("quality", 80),
+                                   request.get("queue_size", DEFAULT_QUEUE_SIZE),
+                                   request.get("tier"), request.get("threads"))
+    if op == "stats":
+        return engine.stats()
+    raise ValueError(f"Unknown request: {op}")
+
+
+def _serve_slot(conn, cwd):
+    """Engine process of one slot: answer requests from the daemon until None."""
+    os.chdir(cwd)
+    engine = RenderEngine()
+    try:
+        for request in iter(conn.recv, None):
+            start = usage_start(engine.pids())
+            try:
+                response = (True, dispatch(engine, request))
+            except Exception as exc:
+                response = (False, f"{type(exc).__name__}: {exc}")
+            conn.send(response + (usage_since(start, engine.pids()),))
+    except EOFError:
+        pass
+    finally:
+        engine.close()
+
+
+class SlotError(Exception):
+    """A request failed inside an engine slot (args: original error, usage)."""
+
+
+class _Slot:
+    """One engine process with its own PyMOL and resident scenes."""
+
+    def __init__(self):
+        # PyMOL is not fork-safe; frame pools inside the slot need a non-daemonic process
+        ctx = mp.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve_slot, args=(child, os.getcwd()))
+        self.process.start()
+        child.close()
+        self.scenes = set()
+
+    def request(self, request):
+        """(result, usage) of one request; usage is the slot's CPU time and peak RSS."""
+        self._conn.send(request)
+        ok, result, usage = self._conn.recv()
+        if not ok:
+            raise SlotError(result, usage)
+        return result, usage
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def close(self):
+        with contextlib.suppress(OSError, ValueError):
+            self._conn.send(None)
+        self.process.join(timeout=30)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def _scene_key(request):
+    return json.dumps([request.get("structures"), request.get("align", True)], sort_keys=True)
+
+
+# ───────────────────────── server ─────────────────────────
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.slot = None
+        try:
+            for line in self.rfile:
+                request = json.loads(line)
+                try:
+                    result, usage = self.server.dispatch(self, request)
+                    response = {"ok": True, "result": result, "usage": usage}
+                except SlotError as exc:
+                    response = {"ok": False, "error": exc.args[0], "usage": exc.args[1]}
+                except Exception as exc:
+                    response = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+                self.wfile.write((json.dumps(response, default=_jsonable) + "\n").encode())
+                self.wfile.flush()
+        finally:
+            if self.slot is not None:
+                self.server.release(self.slot)
+
+
+class RenderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves client connections in parallel, each on an engine slot of its own.
+
+    A connection takes a slot at its first engine request and returns it when
+    it closes; with every slot busy it waits for one. Idle slots keep their
+    resident scenes for later connections.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, idle_timeout=DEFAULT_IDLE_TIMEOUT, slots=DEFAULT_SLOTS):
+        self.idle_timeout = idle_timeout
+        self.max_slots = max(1, slots)
+        self.stop_requested = False
+        self.last_request = time.time()
+        self._slots = []
+        self._idle = []
+        self._active = 0
+        self._lock = threading.Condition()
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+
+    def acquire(self, scene=None):
+        """An idle slot (preferring one holding `scene`), a new one, or wait for one."""
+        with self._lock:
+            while True:
+                self._idle = [slot for slot in self._idle if slot.alive()]
+                self._slots = [slot for slot in self._slots if slot.alive()]
+                if self._idle:
+                    slot = next((s for s in self._idle if scene in s.scenes), self._idle[-1])
+                    self._idle.remove(slot)
+                    return slot
+                if len(self._slots) < self.max_slots:
+                    slot = _Slot()
+                    self._slots.append(slot)
+                    return slot
+                self._lock.wait()
+
+    def release(self, slot):
+        with self._lock:
+            if slot.alive():
+                self._idle.append(slot)
+            self._lock.notify()
+
+    def dispatch(self, handler, request):
+        """(result, usage) of a request; usage is None for requests no slot served."""
+        self.last_request = time.time()
+        op = request.get("op")
+        if op == "ping":
+            return {"pid": os.getpid(), "cwd": os.getcwd()}, None
+        if op == "stats":
+            # Idle slots report their scenes; busy ones are left alone
+            with self._lock:
+                slots, busy = len(self._slots), len(self._slots) - len(self._idle)
+                engines = [slot.request({"op": "stats"})[0] for slot in self._idle]
+            return {"slots": slots, "busy_slots": busy, "max_slots": self.max_slots,
+                    "resident_scenes": sum(e["resident_scenes"] for e in engines),
+                    "scene_evictions": sum(e["scene_evictions"] for e in engines),
+                    "cache": RenderCache().stats()}, None
+        if op == "shutdown":
+            self.stop_requested = True
+            return {"pid": os.getpid()}, None
+        if handler.slot is None:
+            handler.slot = self.acquire(_scene_key(request) if op == "scene" else None)
+        with self._lock:
+            self._active += 1
+        try:
+            response = handler.slot.request(request)
+        finally:
+            with self._lock:
+                self._active -= 1
+            self.last_request = time.time()
+        if op == "scene":
+            handler.slot.scenes.add(_scene_key(request))
+        return response
+
+    def serve(self):
+        self.timeout = 1.0
+        try:
+            while not self.stop_requested:
+                self.handle_request()
+                if not self._active and time.time() - self.last_request > self.idle_timeout:
+                    print(f"Render daemon idle for {self.idle_timeout}s, exiting")
+                    break
+        finally:
+            self.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.server_address)
+            for slot in self._slots:
+                slot.close()
+
+
+# ───────────────────────── client ─────────────────────────
+class _RemoteCmd:
+    """Forwards cmd.<name>(...) calls to the daemon's resident scene."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        def remote(*args, **kwargs):
+            return self._client.call(name, args, kwargs)
+        return remote
+
+
+class RenderClient:
+    """Connection to a running render daemon with the RenderEngine interface."""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, threads=None, usage_path=None):
+        self.threads = threads
+        self.usage_path = usage_path
+        self.usage = {"requests": 0, "cpu_time": 0.0, "max_rss": 0.0}
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(socket_path)
+        self._file = self._sock.makefile("rwb")
+        self.cmd = _RemoteCmd(self)
+
+    def request(self, op, **params):
+        params["op"] = op
+        self._file.write((json.dumps(params) + "\n").encode())
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Render daemon closed the connection")
+        response = json.loads(line)
+        if response.get("usage"):
+            self.usage["requests"] += 1
+            self.usage["cpu_time"] += response["usage"]["cpu_time"]
+            self.usage["max_rss"] = max(self.usage["max_rss"], response["usage"]["max_rss"])
+        if not response["ok"]:
+            raise RuntimeError(f"Render daemon error: {response['error']}")
+        return response["result"]
+
+    # Load filters, like the tier, come from the client's environment
+    def scene(self, structures, align=True):
+        return self.request("scene", structures=[[path, name, rest[0] if rest else load_filter(path)]
+                                                 for path, name, *rest in structures],
+                            align=align)
+
+    def call(self, name, args=(), kwargs=None):
+        return self.request("call", name=name, args=list(args), kwargs=kwargs or {})
+
+    # The quality tier and thread slot come from the client, not the daemon
+    def render(self, output, width, height, dpi=None, tier=None, threads=None):
+        return self.request("render", output=os.path.abspath(output), width=width,
+                            height=height, dpi=dpi, tier=render_quality.tier_name(tier),
+                            threads=threads or self.threads)
+
+    def render_frames(self, views, paths, width, height, workers=1, tier=None, threads=None):
+        return self.request("render_frames", views=[list(v) for v in views],
+                            paths=[os.path.abspath(p) for p in paths],
+                            width=width, height=height, workers=workers,
+                            tier=render_quality.tier_name(tier), threads=threads or self.threads)
+
+    def render_movie(self, views, outputs, width, height, workers=1, frames_dir=None,
+                     duration=100, quality=80, queue_size=DEFAULT_QUEUE_SIZE, tier=None,
+                     threads=None):
+        return self.request("render_movie", views=[list(v) for v in views],
+                            outputs=[os.path.abspath(p) for p in outputs],
+                            width=width, height=height, workers=workers,
+                            frames_dir=os.path.abspath(frames_dir) if frames_dir else None,
+                            duration=duration, quality=quality, queue_size=queue_size,
+                            tier=render_quality.tier_name(tier), threads=threads or self.threads)
+
+    def stats(self):
+        return self.request("stats")
+
+    def write_usage(self):
+        """Write the daemon's CPU time and peak RSS for this client to usage_path."""
+        if not self.usage_path or not self.usage["requests"]:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.usage_path)), exist_ok=True)
+        tmp = f"{self.usage_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({key: round(value, 3) for key, value in self.usage.items()}, f)
+        os.replace(tmp, self.usage_path)
+
+    def close(self):
+        self.write_usage()
+        self._file.close()
+        self._sock.close()
+
+
+def _spawn_daemon(socket_path, threads=None, usage_path=None):
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(socket_path)
+    # Double fork: the daemon must not stay a child of the job that starts it,
+    # or that job's benchmark is charged for the renders of every other job
+    pid = os.fork()
+    if pid == 0:
+        try:
+            with open(f"{socket_path}.log", "a") as log:
+                subprocess.Popen(
+                    [sys.executable, os.path.abspath(__file__), "serve", "--socket", socket_path],
+                    stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                    start_new_session=True,
+                )
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        with contextlib.suppress(OSError):
+            return RenderClient(socket_path, threads, usage_path)
+        time.sleep(0.2)
+    raise OSError(f"Render daemon did not start; see {socket_path}.log")
+
+
+def connect(socket_path=None, threads=None, usage=None):
+    """
+    Return a renderer for the current script.
+
+    Uses the daemon at socket_path (or $RENDER_DAEMON_SOCKET), starting it
+    if necessary; without a socket, or if the daemon cannot be reached,
+    falls back to an in-process RenderEngine. Renders use `threads`
+    ray-tracing threads (the job's slot; default: PyMOL's own setting).
+    With `usage`, the daemon's CPU time and peak RSS for this client are
+    written to that JSON file on close (nothing is written in-process, where
+    the job measures its renders itself).
+    """
+    if usage:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(usage)
+    socket_path = socket_path or os.environ.get("RENDER_DAEMON_SOCKET")
+    if not socket_path:
+        return RenderEngine(threads=threads)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        with open(f"{socket_path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                client = RenderClient(socket_path, threads, usage)
+            except OSError:
+                client = _spawn_daemon(socket_path, threads, usage)
+        if client.request("ping")["cwd"] != os.getcwd():
+            client.close()
+            raise OSError("render daemon runs in a different working directory")
+        return client
+    except OSError as exc:
+        print(f"Render daemon unavailable ({exc}); rendering in-process")
+        return RenderEngine(threads=threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PyMOL render daemon")
+    parser.add_argument("action", choices=["serve", "status", "stop"])
+    parser.add_argument("--socket", default=os.environ.get("RENDER_DAEMON_SOCKET", DEFAULT_SOCKET))
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help="exit after this many seconds without requests")
+    parser.add_argument("--slots", type=int,
+                        default=int(os.environ.get("RENDER_DAEMON_SLOTS", DEFAULT_SLOTS)),
+                        help="engine processes, i.e. render jobs served in parallel")
+    args = parser.parse_args()
+
+    if args.action == "serve":
+        server = RenderServer(args.socket, args.idle_timeout, args.slots)
+        print(f"Render daemon {os.getpid()} listening on {args.socket} ({server.max_slots} slots)")
+        server.serve()
+        return
+
+    try:
+        client = RenderClient(args.socket)
+    except OSError:
+        print(f"No render daemon on {args.socket}")
+        return
+    if args.action == "status":
+        print(json.dumps(client.stats(), indent=2))
+    else:
+        pid = client.request("shutdown")["pid"]
+        print(f"Stopped render daemon {pid}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,21 @@
 """
 Enhanced PyMOL rendering - standalone version
 Works directly with TM-align output
+
+Thin client of the render daemon when one is configured (RENDER_DAEMON_SOCKET);
+otherwise renders in-process.
 """
-from pymol import cmd
 import sys
+from render_daemon import connect
 
 # Get input/output from command line or use defaults
 pdb_file = sys.argv[1] if len(sys.argv) > 1 else "results/struct/Fn_overlay.pdb"
 output_base = sys.argv[2] if len(sys.argv) > 2 else "results/pymol/enhanced"
 
-# Initialize PyMOL
-cmd.reinitialize()
-
-# Load the structure
-cmd.load(pdb_file, "overlay")
+# Initialize PyMOL and load the structure (kept resident by the daemon)
+renderer = connect()
+cmd = renderer.cmd
+renderer.scene([(pdb_file, "overlay")], align=False)
 
 # Check if we have multiple models/chains
 all_chains = cmd.get_chains("overlay")
@@ -57,19 +59,16 @@ cmd.set("ray_shadows", 0)
 # View 1: Overview
 cmd.orient()
 cmd.zoom("all", buffer=5)
-cmd.ray(1600, 1200)
-cmd.png(f"{output_base}_overview.png", dpi=300)
+renderer.render(f"{output_base}_overview.png", 1600, 1200, dpi=300)
 
 # View 2: Side view
 cmd.turn("y", 90)
-cmd.ray(1600, 1200)
-cmd.png(f"{output_base}_side.png", dpi=300)
+renderer.render(f"{output_base}_side.png", 1600, 1200, dpi=300)
 
 # View 3: Top view
 cmd.turn("y", -90)
 cmd.turn("x", 90)
-cmd.ray(1600, 1200)
-cmd.png(f"{output_base}_top.png", dpi=300)
+renderer.render(f"{output_base}_top.png", 1600, 1200, dpi=300)
 
 # Save session
 cmd.save(f"{output_base}.pse")
@@ -78,4 +77,5 @@ print(f"Created visualizations:")
 print(f"  - {output_base}_overview.png")
 print(f"  - {output_base}_side.png")
 print(f"  - {output_base}_top.png")
-print(f"  - {output_base}.pse")
\ No newline at end of file
+print(f"  - {output_base}.pse")
+renderer.close()
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Create multiple views of a structure-pair overlay with annotations.
+Generates publication-quality figures with domain labels.
+
+One Snakemake job per view (params.view, see VIEWS): every view starts from
+the aligned scene and sets up its own colours and camera, so the views are
+independent outputs that Snakemake schedules, caches and rebuilds separately.
+
+Thin client of the render daemon: the aligned scene stays resident there and
+is restored, not reloaded, for each view.
+"""
+import os
+from render_daemon import connect
+from residue_deviation import inject, residue_deviations, show_deviation
+
+output = snakemake.output[0]
+view = snakemake.params.view
+label_1, label_2 = snakemake.params.labels
+settings = snakemake.params.settings
+os.makedirs(os.path.dirname(output), exist_ok=True)
+
+# Ray-trace with the threads Snakemake granted this job; the daemon's CPU
+# time and memory for it go next to the job's benchmark file
+renderer = connect(threads=snakemake.threads, usage=snakemake.params.usage)
+cmd = renderer.cmd
+
+
+# ───────────────────────── views ─────────────────────────
+def overview():
+    """Whole-overlay orientation shared by the views."""
+    cmd.orient()
+    cmd.zoom("all", buffer=5)
+
+
+def pair_colors():
+    cmd.color("firebrick", label_1)
+    cmd.color("marine", label_2)
+
+
+def front_view():
+    pair_colors()
+    overview()
+
+
+def side_view():
+    pair_colors()
+    overview()
+    cmd.turn("y", 90)
+
+
+def top_view():
+    pair_colors()
+    overview()
+    cmd.turn("x", 90)
+
+
+def select_domains():
+    """Define domains from config/config.yaml and color the REC/NUC lobes."""
+    domain_colors = [{"REC": "salmon", "NUC": "tv_red"}, {"REC": "lightblue", "NUC": "tv_blue"}]
+    for label, protein, colors in zip((label_1, label_2), settings["proteins"], domain_colors):
+        for domain, residues in protein.get("domains", {}).items():
+            cmd.select(f"{label}_{domain}", f"{label} and resi {residues}")
+            if domain in colors:
+                cmd.color(colors[domain], f"{label}_{domain}")
+
+
+def select_catalytic():
+    """Known catalytic residues (approximate, from config/config.yaml)."""
+    protein_1, protein_2 = settings["proteins"]
+    cmd.select("catalytic_1", f"{label_1} and resi {protein_1.get('catalytic', '0')}")
+    cmd.select("catalytic_2", f"{label_2} and resi {protein_2.get('catalytic', '0')}")
+
+
+def domains_colored():
+    pair_colors()
+    overview()
+    select_domains()
+
+
+def active_site_zoom():
+    pair_colors()
+    select_catalytic()
+    cmd.zoom("catalytic_1 or catalytic_2", buffer=15)
+    cmd.show("sticks", "catalytic_1 or catalytic_2")
+    cmd.color("yellow", "catalytic_1 and elem C")
+    cmd.color("cyan", "catalytic_2 and elem C")
+
+
+def structural_flexibility():
+    """Putty sized and coloured by per-residue deviation of the TM-align
+    superposition, written into the B-factors."""
+    deviation = settings["deviation"]
+    overview()
+    records = residue_deviations(snakemake.input.stats, deviation["window"],
+                                 (snakemake.input.pdb1, snakemake.input.pdb2))
+    for label, record in zip((label_1, label_2), records):
+        inject(cmd, label, record, deviation["measure"])
+    show_deviation(cmd, "all", deviation["max"])
+    cmd.set("cartoon_putty_scale_min", 0.5)
+    cmd.set("cartoon_putty_scale_max", 2.0)
+    cmd.set("cartoon_putty_radius", 0.3)
+
+
+def main_overview():
+    """Main output: overview with a slight rotation for a better 3D effect."""
+    pair_colors()
+    overview()
+    cmd.turn("y", 15)
+
+
+def session():
+    """PyMOL session with the pair colours and the domain and catalytic selections."""
+    pair_colors()
+    overview()
+    select_domains()
+    select_catalytic()
+
+
+VIEWS = {
+    "front_view": front_view,
+    "side_view": side_view,
+    "top_view": top_view,
+    "domains_colored": domains_colored,
+    "active_site_zoom": active_site_zoom,
+    "structural_flexibility": structural_flexibility,
+    "overview": main_overview,
+    "session": session,
+}
+if view not in VIEWS:
+    raise ValueError(f"Unknown view {view!r} (expected one of {', '.join(VIEWS)})")
+
+# Restore the aligned scene (loaded and aligned once per daemon)
+scene = renderer.scene([(snakemake.input.pdb1, label_1), (snakemake.input.pdb2, label_2)])
+alignment = scene["alignment"][0]
+print(f"Alignment RMSD: {alignment[0]:.2f} Å over {alignment[1]} atoms")
+
+# Basic display settings
+cmd.hide("everything")
+cmd.show("cartoon")
+cmd.set("cartoon_fancy_helices", 1)
+cmd.set("cartoon_transparency", 0.0)
+cmd.bg_color("white")
+cmd.set("ray_shadows", 0)
+cmd.set("ambient", 0.4)
+cmd.set("specular", 0.2)
+
+VIEWS[view]()
+if view == "session":
+    cmd.save(os.path.abspath(output))
+    print(f"PyMOL session: {output}")
+else:
+    result = renderer.render(output, 1600, 1200, dpi=300)
+    print(f"{view}: {output}{' (cached)' if result['cache_hit'] else ''}")
+renderer.close()
@@ -0,0 +1,39 @@
+"""
+Render an overlay PNG from original PDB files with proper coloring.
+Creates a high-quality structural comparison visualization.
+
+Thin client of the render daemon: the aligned scene stays resident there.
+"""
+from render_daemon import connect
+
+label_1, label_2 = snakemake.params.labels
+
+# Ray-trace with the threads Snakemake granted this job; the daemon's CPU
+# time and memory for it go next to the job's benchmark file
+renderer = connect(threads=snakemake.threads, usage=snakemake.params.usage)
+cmd = renderer.cmd
+
+# Load original PDB files and align the second structure onto the first (once per daemon)
+renderer.scene([(snakemake.input.pdb1, label_1), (snakemake.input.pdb2, label_2)])
+
+# Apply distinct colors
+cmd.color("firebrick", label_1)
+cmd.color("marine", label_2)
+
+# Display settings
+cmd.hide("everything")
+cmd.show("cartoon")
+cmd.set("cartoon_fancy_helices", 1)
+cmd.set("cartoon_transparency", 0.0)
+cmd.bg_color("white")
+cmd.set("ray_shadows", 0)
+cmd.set("ambient", 0.4)
+cmd.set("specular", 0.2)
+
+# Orient and zoom
+cmd.orient()
+cmd.zoom("all", buffer=5)
+
+# Render high quality image (reused from the render cache when unchanged)
+renderer.render(snakemake.output[0], 1600, 1200, dpi=300)
+renderer.close()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Render quality tiers shared by every PyMOL script.
+
+  draft        40% of the requested size at screen resolution, drawn with
+               OpenGL instead of ray-traced, without antialiasing and with
+               coarse cartoon, stick and sphere geometry: for checking
+               colours, orientation and figure layout
+  standard     the requested size and dpi, ray-traced with PyMOL's default
+               geometry quality
+  publication  the requested size and dpi, ray-traced with 2x antialiasing
+               and finer cartoon, stick and sphere geometry
+
+Scripts keep asking for their full size (e.g. 1600x1200 at 300 dpi); the
+render engine and render cache map each request through the active tier.
+Tier settings are applied right before every render, so they are part of
+the render-cache key and a draft image never stands in for a standard one.
+Without an OpenGL context PyMOL ray-traces even draft images, which then
+still benefit from the smaller size and coarser geometry.
+
+Environment:
+  RENDER_QUALITY   draft | standard | publication (default: standard;
+                   the Snakefile sets it from render_quality in the config)
+
+Usage:
+  python workflow/scripts/render_quality.py   # list the tiers
+"""
+import os
+
+DEFAULT_TIER = "standard"
+
+# PyMOL defaults of the geometry settings the tiers change
+_DEFAULTS = {
+    "antialias": 1, "cartoon_sampling": -1, "cartoon_loop_quality": 6,
+    "cartoon_oval_quality": 10, "cartoon_tube_quality": 9,
+    "sphere_quality": 1, "stick_quality": 8,
+}
+
+TIERS = {
+    "draft": {
+        "scale": 0.4, "keep_dpi": False, "ray": False, "figure_dpi": 100,
+        "settings": {**_DEFAULTS, "antialias": 0, "cartoon_sampling": 1,
+                     "cartoon_fancy_helices": 0, "cartoon_loop_quality": 3,
+                     "cartoon_oval_quality": 3, "cartoon_tube_quality": 3,
+                     "sphere_quality": 0, "stick_quality": 4},
+    },
+    "standard": {
+        "scale": 1.0, "keep_dpi": True, "ray": True, "figure_dpi": 300,
+        "settings": dict(_DEFAULTS),
+    },
+    "publication": {
+        "scale": 1.0, "keep_dpi": True, "ray": True, "figure_dpi": 300,
+        "settings": {**_DEFAULTS, "antialias": 2, "cartoon_sampling": 14,
+                     "cartoon_loop_quality": 12, "cartoon_oval_quality": 20,
+                     "cartoon_tube_quality": 12, "sphere_quality": 3,
+                     "stick_quality": 16},
+    },
+}
+
+
+def tier_name(name=None):
+    """Validated tier name: name, else $RENDER_QUALITY, else the default."""
+    name = name or os.environ.get("RENDER_QUALITY") or DEFAULT_TIER
+    if name not in TIERS:
+        raise ValueError(f"Unknown render quality {name!r} (expected one of {', '.join(TIERS)})")
+    return name
+
+
+def output_size(name, width, height, dpi=None):
+    """(width, height, dpi) actually rendered for a request of width x height at dpi."""
+    tier = TIERS[tier_name(name)]
+    scale = tier["scale"]
+    return (max(1, round(width * scale)), max(1, round(height * scale)),
+            dpi if tier["keep_dpi"] else None)
+
+
+def apply(cmd, name=None):
+    """Set the tier's PyMOL settings on the current scene."""
+    for setting, value in TIERS[tier_name(name)]["settings"].items():
+        cmd.set(setting, value)
+
+
+def capture(cmd, name, width, height):
+    """Produce the image the next cmd.png writes: ray-traced, or drawn for draft."""
+    if TIERS[tier_name(name)]["ray"]:
+        cmd.ray(width, height)
+    else:
+        cmd.draw(width, height, antialias=0)
+
+
+def figure_dpi(name=None):
+    """Resolution for matplotlib figures built from the renders."""
+    return TIERS[tier_name(name)]["figure_dpi"]
+
+
+if __name__ == "__main__":
+    active = tier_name()
+    for name, tier in TIERS.items():
+        width, height, dpi = output_size(name, 1600, 1200, 300)
+        mode = "ray-traced" if tier["ray"] else "OpenGL draw"
+        print(f"{'*' if name == active else ' '} {name:<12} 1600x1200@300 -> "
+              f"{width}x{height}@{dpi or 'screen'}, {mode}")
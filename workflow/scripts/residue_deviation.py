@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Per-residue structural deviation of a superposed structure pair.
+
+The TM-align residue alignment (tmalign_stats.txt) gives the aligned CA
+pairs and structure_metrics.tm_score the superposition TM-align reports.
+Two per-residue measures are computed for every aligned residue of both
+chains, entirely as array operations:
+
+  distance  CA-CA distance of the pair under the global superposition
+  local     RMSD of the `window` aligned pairs centred on the residue after
+            fitting them on their own (all windows are fitted together as
+            one stacked Kabsch), so a domain that moved as a rigid body
+            does not count as locally deviating
+
+inject() writes one measure into a PyMOL property (the B-factor by default)
+with a single cmd.alter call over the whole object. Putty cartoons and
+spectrum colouring then show real structural deviation instead of
+crystallographic B-factors. Residues without an aligned partner get
+NO_PARTNER.
+
+Usage:
+  python workflow/scripts/residue_deviation.py results/struct/tmalign_stats.txt
+      [--structures PDB1 PDB2] [--window 9] [-o deviation.tsv]
+"""
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+from structure_cache import cached_structure
+from structure_metrics import (CLOSE_PAIR_CUTOFF, aligned_pairs, kabsch, pair_distances,
+                               read_alignment, tm_score)
+
+DEFAULT_WINDOW = 9
+MEASURES = ("distance", "local")
+# Property value of residues without an aligned partner
+NO_PARTNER = -1.0
+# Top of the colour scale: pairs closer than this count as close in structure_metrics
+DEVIATION_MAX = CLOSE_PAIR_CUTOFF
+
+
+def _first_chain(pdb_path):
+    """Chain ID, residue numbers and CA coordinates of the chain TM-align reads."""
+    data = cached_structure(pdb_path, "protein", "ca")
+    first = data["chain"] == data["chain"][0]
+    return (data["chain"][0].decode(), data["resi"][first],
+            data["coords"][first].astype(np.float64))
+
+
+def local_rmsd(P, Q, window=DEFAULT_WINDOW):
+    """RMSD of every window of consecutive pairs after its own superposition."""
+    n = len(P)
+    window = max(3, min(window, n))
+    positions = np.arange(n)
+    # Windows centred on each pair, shifted inwards at the chain ends
+    starts = np.clip(positions - window // 2, 0, n - window)[:, None]
+    masks = (positions >= starts) & (positions < starts + window)
+    R, t = kabsch(P, Q, masks)
+    dist = pair_distances(P, Q, R, t)
+    return np.sqrt((dist ** 2 * masks).sum(axis=1) / window)
+
+
+def residue_deviations(stats_path, window=DEFAULT_WINDOW, structures=None):
+    """
+    Per-chain deviation records from a TM-align report:
+    [{"chain", "resi", "partner", "distance", "local"}, ...] for chain 1 and
+    chain 2, each with one entry per aligned residue (numpy arrays).
+    structures are the (chain 1, chain 2) files that were aligned (default:
+    the paths named in the report).
+    """
+    info = read_alignment(stats_path, structures)
+    chain1, resi1, xyz1 = _first_chain(info["chain_1"])
+    chain2, resi2, xyz2 = _first_chain(info["chain_2"])
+    i, j = aligned_pairs(info["seq1"], info["markers"], info["seq2"])
+    if len(i) < 3:
+        raise ValueError(f"Fewer than three aligned pairs in {stats_path}")
+    if i.max() >= len(xyz1) or j.max() >= len(xyz2):
+        raise ValueError(f"Alignment in {stats_path} does not match the CA atoms of the PDB files")
+
+    P, Q = xyz1[i], xyz2[j]
+    _, R, t = tm_score(P, Q, info["length_2"])
+    distance = pair_distances(P, Q, R, t)
+    local = local_rmsd(P, Q, window)
+    return [
+        {"chain": chain1, "resi": resi1[i], "partner": resi2[j], "distance": distance, "local": local},
+        {"chain": chain2, "resi": resi2[j], "partner": resi1[i], "distance": distance, "local": local},
+    ]
+
+
+def inject(cmd, selection, record, measure="distance", prop="b", by_chain=True):
+    """
+    Set `prop` of every atom in selection to its residue's deviation in one
+    cmd.alter call (NO_PARTNER for residues without an aligned partner).
+    by_chain=False matches residue numbers only, for objects whose chain IDs
+    differ from the PDB file (e.g. TM-align superposition output).
+    """
+    if measure not in MEASURES:
+        raise ValueError(f"Unknown deviation measure {measure!r} (expected one of {', '.join(MEASURES)})")
+    prefix = f"{record['chain']}/" if by_chain else ""
+    table = {f"{prefix}{resi}": round(value, 3)
+             for resi, value in zip(record["resi"].tolist(), record[measure].tolist())}
+    key = "chain + '/' + str(resv)" if by_chain else "str(resv)"
+    cmd.alter(selection, f"{prop} = deviation.get({key}, {NO_PARTNER})",
+              space={"deviation": table})
+
+
+def show_deviation(cmd, selection, maximum=DEVIATION_MAX):
+    """Putty cartoon coloured blue-white-red by the injected B-factor deviation."""
+    cmd.cartoon("putty", selection)
+    cmd.spectrum("b", "blue_white_red", f"({selection}) and not b < 0",
+                 minimum=0, maximum=maximum)
+    cmd.color("grey70", f"({selection}) and b < 0")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-residue deviation of a TM-align superposition")
+    parser.add_argument("stats", nargs="?", default="results/struct/tmalign_stats.txt")
+    parser.add_argument("--structures", nargs=2, metavar=("PDB1", "PDB2"),
+                        help="chain 1 and chain 2 structure files (default: the paths in the report)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW,
+                        help="Aligned pairs per local superposition")
+    parser.add_argument("-o", "--output", help="TSV output (default: stdout)")
+    args = parser.parse_args()
+
+    chain_1, chain_2 = residue_deviations(args.stats, args.window, args.structures)
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.writer(out, delimiter="\t", lineterminator="\n")
+    writer.writerow(["chain_1", "resi_1", "chain_2", "resi_2", "distance", "local_rmsd"])
+    for row in zip(chain_1["resi"].tolist(), chain_1["partner"].tolist(),
+                   chain_1["distance"].tolist(), chain_1["local"].tolist()):
+        writer.writerow([chain_1["chain"], row[0], chain_2["chain"], row[1],
+                         f"{row[2]:.3f}", f"{row[3]:.3f}"])
+    if args.output:
+        out.close()
+        print(f"Wrote {len(chain_1['resi'])} aligned pairs to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Aggregate the per-job Snakemake benchmark files of a run into one report.
+
+Every rule writes benchmarks/<rule>/<wildcards>.tsv: wall seconds, peak
+RSS/VMS/USS/PSS, I/O and CPU time of the job. This script collects the jobs
+of one run (benchmark files written since --since) and places each one on a
+timeline. A benchmark file is written when its job ends, so the job started
+`s` seconds before the file's mtime.
+
+Render jobs ray-trace in the render daemon, outside their own process tree.
+The daemon reports its CPU time and peak RSS for each job in
+<rule>/<wildcards>.daemon.json next to the benchmark file; both are added to
+the job's cpu_time and max_rss. The report contains:
+
+  rules          jobs, wall time (total / max), CPU time, peak RSS, I/O and
+                 share of the run's busy time, per rule
+  critical path  the longest chain of dependent jobs. A job's predecessor is
+                 the latest-finishing earlier job of an upstream rule (from
+                 the --rulegraph DOT file; any rule without one), preferring
+                 jobs with the same wildcards
+  efficiency     CPU seconds used / (cores x makespan)
+
+The report is written as JSON and Markdown under <benchmarks>/reports/
+(run-<timestamp>.* plus latest.json). Per-rule changes are printed against
+the previous latest.json or the report given with --compare.
+
+Usage:
+  python workflow/scripts/run_report.py benchmarks [--since EPOCH] [--cores 8]
+      [--rulegraph benchmarks/rulegraph.dot] [--compare old.json]
+"""
+import argparse
+import csv
+import datetime
+import glob
+import json
+import os
+import re
+import shutil
+
+# Snakemake benchmark columns kept in the report (NA when not measured)
+COLUMNS = ["s", "max_rss", "max_vms", "max_uss", "max_pss", "io_in", "io_out", "mean_load", "cpu_time"]
+# A predecessor may end this long after its successor's recorded start
+# (benchmark files are written a moment after the job ends)
+_SLACK = 1.0
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_jobs(bench_dir, since=0.0):
+    """One record per benchmark file written at or after `since`."""
+    jobs = []
+    for path in sorted(glob.glob(os.path.join(bench_dir, "*", "*.tsv")) +
+                       glob.glob(os.path.join(bench_dir, "*.tsv"))):
+        end = os.path.getmtime(path)
+        if end < since:
+            continue
+        with open(path) as f:
+            rows = list(csv.DictReader(f, delimiter="\t"))
+        if not rows:
+            continue
+        row = rows[-1]   # repeated benchmarks: the last run
+        rel = os.path.relpath(path, bench_dir)
+        rule, _, key = os.path.splitext(rel)[0].partition(os.sep)
+        job = {"rule": rule, "key": key or None, "end": end}
+        job.update({column: _number(row.get(column)) for column in COLUMNS})
+        job["s"] = job["s"] or 0.0
+        job["start"] = end - job["s"]
+        job["daemon"] = _merge_daemon_usage(job, os.path.splitext(path)[0] + ".daemon.json")
+        jobs.append(job)
+    return jobs
+
+
+def _merge_daemon_usage(job, path):
+    """Add the render daemon's CPU time and peak RSS for the job; True if there were any."""
+    try:
+        if os.path.getmtime(path) < job["start"] - _SLACK:   # left by an earlier run
+            return False
+        with open(path) as f:
+            usage = json.load(f)
+    except (OSError, ValueError):
+        return False
+    job["cpu_time"] = (job["cpu_time"] or 0.0) + usage["cpu_time"]
+    # The client and its daemon slot run at the same time
+    job["max_rss"] = (job["max_rss"] or 0.0) + usage["max_rss"]
+    return True
+
+
+def read_rulegraph(path):
+    """{rule: set of rules it (transitively) depends on} from `snakemake --rulegraph`."""
+    with open(path) as f:
+        text = f.read()
+    names = dict(re.findall(r'(\d+)\s*\[\s*label\s*=\s*"([^"]+)"', text))
+    direct = {}
+    for u, v in re.findall(r"(\d+)\s*->\s*(\d+)", text):
+        direct.setdefault(names[v], set()).add(names[u])
+
+    def ancestors(rule, seen):
+        for parent in direct.get(rule, ()):
+            if parent not in seen:
+                seen.add(parent)
+                ancestors(parent, seen)
+        return seen
+
+    return {rule: ancestors(rule, set()) for rule in names.values()}
+
+
+# ───────────────────────── analysis ─────────────────────────
+def critical_path(jobs, upstream=None):
+    """(length in seconds, [jobs]) of the longest chain of dependent jobs."""
+    jobs = sorted(jobs, key=lambda j: j["end"])
+    best = {}   # index -> (chain length, predecessor index)
+    for i, job in enumerate(jobs):
+        candidates = [k for k in range(i) if jobs[k]["end"] <= job["start"] + _SLACK
+                      and (upstream is None or jobs[k]["rule"] in upstream.get(job["rule"], ()))]
+        same = [k for k in candidates if jobs[k]["key"] == job["key"]]
+        pred = max(same or candidates, key=lambda k: jobs[k]["end"], default=None)
+        best[i] = (job["s"] + (best[pred][0] if pred is not None else 0.0), pred)
+    if not best:
+        return 0.0, []
+    i = max(best, key=lambda k: best[k][0])
+    length, chain = best[i][0], []
+    while i is not None:
+        chain.append(jobs[i])
+        i = best[i][1]
+    return length, chain[::-1]
+
+
+def per_rule(jobs):
+    busy = sum(job["s"] for job in jobs) or 1.0
+    rules = {}
+    for job in jobs:
+        r = rules.setdefault(job["rule"], {"jobs": 0, "wall_s": 0.0, "max_wall_s": 0.0,
+                                           "cpu_s": 0.0, "max_rss_mb": 0.0,
+                                           "io_in_mb": 0.0, "io_out_mb": 0.0, "daemon_jobs": 0})
+        r["jobs"] += 1
+        r["daemon_jobs"] += bool(job.get("daemon"))
+        r["wall_s"] += job["s"]
+        r["max_wall_s"] = max(r["max_wall_s"], job["s"])
+        r["cpu_s"] += job["cpu_time"] or 0.0
+        r["max_rss_mb"] = max(r["max_rss_mb"], job["max_rss"] or 0.0)
+        r["io_in_mb"] += job["io_in"] or 0.0
+        r["io_out_mb"] += job["io_out"] or 0.0
+    for r in rules.values():
+        r["share"] = r["wall_s"] / busy
+        for field, value in r.items():
+            if isinstance(value, float):
+                r[field] = round(value, 3)
+    return dict(sorted(rules.items(), key=lambda item: -item[1]["wall_s"]))
+
+
+def build_report(jobs, cores, upstream=None):
+    makespan = (max(j["end"] for j in jobs) - min(j["start"] for j in jobs)) if jobs else 0.0
+    cpu = sum(job["cpu_time"] or 0.0 for job in jobs)
+    length, chain = critical_path(jobs, upstream)
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "cores": cores,
+        "jobs": len(jobs),
+        "makespan_s": round(makespan, 3),
+        "busy_s": round(sum(job["s"] for job in jobs), 3),
+        "cpu_s": round(cpu, 3),
+        "parallel_efficiency": round(cpu / (cores * makespan), 4) if cores and makespan else None,
+        "critical_path": {
+            "length_s": round(length, 3),
+            "jobs": [{"rule": j["rule"], "key": j["key"], "s": round(j["s"], 3)} for j in chain],
+        },
+        "rules": per_rule(jobs),
+    }
+
+
+def compare(report, previous):
+    """Per-rule wall-time changes against an earlier report, largest first."""
+    changes = []
+    for rule, r in report["rules"].items():
+        old = previous.get("rules", {}).get(rule)
+        if old:
+            changes.append((rule, old["wall_s"], r["wall_s"]))
+    return sorted(changes, key=lambda c: -abs(c[2] - c[1]))
+
+
+# ───────────────────────── output ─────────────────────────
+def markdown(report, changes=None):
+    eff = report["parallel_efficiency"]
+    lines = [
+        f"# Run report {report['date']}",
+        "",
+        f"- Jobs: {report['jobs']}, makespan {report['makespan_s']:.1f} s, "
+        f"busy {report['busy_s']:.1f} s, CPU {report['cpu_s']:.1f} s",
+        f"- Parallel efficiency: {eff:.1%} of {report['cores']} cores" if eff is not None
+        else "- Parallel efficiency: n/a (cores unknown)",
+        f"- Critical path: {report['critical_path']['length_s']:.1f} s",
+        "",
+        "| rule | jobs | wall s | max wall s | CPU s | peak RSS MB | I/O in MB | I/O out MB | share |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for rule, r in report["rules"].items():
+        label = f"{rule} *" if r.get("daemon_jobs") else rule
+        lines.append(f"| {label} | {r['jobs']} | {r['wall_s']:.1f} | {r['max_wall_s']:.1f} | "
+                     f"{r['cpu_s']:.1f} | {r['max_rss_mb']:.0f} | {r['io_in_mb']:.1f} | "
+                     f"{r['io_out_mb']:.1f} | {r['share']:.0%} |")
+    if any(r.get("daemon_jobs") for r in report["rules"].values()):
+        lines += ["", "\\* CPU time and peak RSS include the render daemon's share."]
+    lines += ["", "## Critical path", ""]
+    for job in report["critical_path"]["jobs"]:
+        label = f"{job['rule']} ({job['key']})" if job["key"] else job["rule"]
+        lines.append(f"1. {label}: {job['s']:.1f} s")
+    if changes:
+        lines += ["", "## Change against the previous run", "",
+                  "| rule | before s | now s | change |", "|---|---:|---:|---:|"]
+        for rule, old, new in changes:
+            pct = f"{(new / old - 1):+.0%}" if old else "n/a"
+            lines.append(f"| {rule} | {old:.1f} | {new:.1f} | {pct} |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate Snakemake benchmark files into a run report")
+    parser.add_argument("benchmarks", help="Benchmark directory (benchmarks/<rule>/<wildcards>.tsv)")
+    parser.add_argument("--since", type=float, default=0.0,
+                        help="Only jobs whose benchmark file is newer (epoch seconds)")
+    parser.add_argument("--cores", type=int, default=os.cpu_count(), help="Cores available to the run")
+    parser.add_argument("--rulegraph", help="`snakemake --rulegraph` DOT output")
+    parser.add_argument("--compare", help="Earlier JSON report (default: the previous latest.json)")
+    args = parser.parse_args()
+
+    jobs = read_jobs(args.benchmarks, args.since)
+    if not jobs:
+        print(f"No benchmark files in {args.benchmarks} since {args.since:.0f}")
+        return
+    upstream = None
+    if args.rulegraph and os.path.exists(args.rulegraph) and os.path.getsize(args.rulegraph):
+        upstream = read_rulegraph(args.rulegraph)
+    report = build_report(jobs, args.cores, upstream)
+
+    reports = os.path.join(args.benchmarks, "reports")
+    os.makedirs(reports, exist_ok=True)
+    latest = os.path.join(reports, "latest.json")
+    previous_path = args.compare or (latest if os.path.exists(latest) else None)
+    changes = None
+    if previous_path:
+        with open(previous_path) as f:
+            changes = compare(report, json.load(f))
+
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(reports, f"run-{stamp}")
+    with open(f"{base}.json", "w") as f:
+        json.dump(report, f, indent=1)
+    with open(f"{base}.md", "w") as f:
+        f.write(markdown(report, changes))
+    shutil.copyfile(f"{base}.json", latest)
+
+    eff = report["parallel_efficiency"]
+    print(f"Run report: {base}.md")
+    print(f"  {report['jobs']} jobs, makespan {report['makespan_s']:.1f} s, critical path "
+          f"{report['critical_path']['length_s']:.1f} s, parallel efficiency "
+          f"{f'{eff:.1%}' if eff is not None else 'n/a'}")
+    for rule, r in list(report["rules"].items())[:5]:
+        print(f"  {rule:<24} {r['wall_s']:8.1f} s ({r['share']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Compact binary cache of PDB structures.
+
+A PDB file is parsed once (vectorized over fixed-width columns) into an
+uncompressed .npz of flat arrays: float32 coordinates plus chain, residue
+number, insertion code, residue name, atom name, element, B-factor,
+HETATM flag, secondary-structure code (H/S/L from HELIX/SHEET records) and
+the index of the atom's record in the file.
+Chain and atom-subset filters are applied at conversion time, so numeric
+analysis and PyMOL loading read only the atoms they need instead of
+re-parsing a multi-megabyte text file. Alternate locations are reduced to
+the first one.
+
+Render scenes load each structure through a load filter (chains, polymer
+types, hydrogens; see load_filter), applied to the cached arrays before any
+atom reaches PyMOL. PyMOL then reads only the original records of the kept
+atoms (load_into_pymol), so every PDB column (occupancy, segment ID, ...)
+arrives unchanged and PyMOL's own parser builds the object. Creating the
+atoms one by one through chempy took about four times as long as cmd.load
+for the ~13-16k atoms of the store's entries.
+
+Environment:
+  LOAD_FILTER   JSON {"default": {...}, "<PDB ID>": {...}} of load filters
+                (the Snakefile sets it from load_filter in the config)
+
+Usage:
+  python workflow/scripts/structure_cache.py store/pdb/5B2O.pdb [--chains protein|A,B|all]
+      [--subset all|backbone|ca] [-o out.npz]
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from render_cache import file_digest
+
+DEFAULT_CACHE_DIR = ".cache/struct"
+
+AMINO_ACIDS = {
+    b"ALA", b"ARG", b"ASN", b"ASP", b"CYS", b"GLN", b"GLU", b"GLY", b"HIS", b"ILE",
+    b"LEU", b"LYS", b"MET", b"PHE", b"PRO", b"SER", b"THR", b"TRP", b"TYR", b"VAL",
+    b"MSE", b"SEC", b"PYL",
+}
+BACKBONE_ATOMS = {b"N", b"CA", b"C", b"O"}
+RNA_BASES = {b"A", b"C", b"G", b"U", b"I"}
+DNA_BASES = {b"DA", b"DC", b"DG", b"DT", b"DI", b"DU"}
+WATERS = {b"HOH", b"WAT", b"DOD", b"H2O"}
+
+# Polymer types a load filter can keep; the default keeps every atom
+POLYMERS = ("protein", "nucleic", "ligand", "water")
+DEFAULT_FILTER = {"chains": "all", "polymer": list(POLYMERS), "hydrogens": True}
+
+FIELDS = ("coords", "chain", "resi", "icode", "resn", "name", "element", "b", "hetatm", "ss",
+          "record")
+# Part of the cache key: bump when FIELDS or their meaning change
+CACHE_FORMAT = 2
+
+
+def _columns(lines, start, stop):
+    """Stripped fixed-width PDB columns start..stop (1-based, inclusive) of all lines."""
+    chars = lines.view("S1")[:, start - 1:stop].copy()
+    return np.char.strip(chars.view(f"S{stop - start + 1}")[:, 0])
+
+
+def _assign_ss(data, text):
+    """Per-atom secondary structure codes from HELIX/SHEET records."""
+    ss = np.full(len(data["resi"]), b"L", dtype="S1")
+    for line in text.splitlines():
+        if line.startswith(b"HELIX "):
+            chain, start, end, code = line[19:20], line[21:25], line[33:37], b"H"
+        elif line.startswith(b"SHEET "):
+            chain, start, end, code = line[21:22], line[22:26], line[33:37], b"S"
+        else:
+            continue
+        mask = ((data["chain"] == chain) & (data["resi"] >= int(start))
+                & (data["resi"] <= int(end)) & ~data["hetatm"])
+        ss[mask] = code
+    return ss
+
+
+def _atom_records(text):
+    """ATOM/HETATM lines of the first model."""
+    end_model = text.find(b"\nENDMDL")
+    atom_text = text if end_model < 0 else text[:end_model]
+    return [line for line in atom_text.splitlines()
+            if line.startswith(b"ATOM  ") or line.startswith(b"HETATM")]
+
+
+def parse_pdb(path, chains=None, subset="all"):
+    """
+    Parse ATOM/HETATM records of the first model into a dict of flat arrays.
+
+    chains: None/"all" keeps every chain, "protein" keeps chains made of
+    standard amino acids, or give an iterable of chain IDs.
+    subset: "all", "backbone" (N, CA, C, O) or "ca".
+    """
+    with open(path, "rb") as f:
+        text = f.read()
+    records = _atom_records(text)
+    if not records:
+        raise ValueError(f"No ATOM/HETATM records in {path}")
+    lines = np.array([line.ljust(80)[:80] for line in records], dtype="S80")[:, None]
+
+    data = {
+        "hetatm": _columns(lines, 1, 6) == b"HETATM",
+        "name": _columns(lines, 13, 16),
+        "altloc": _columns(lines, 17, 17),
+        "resn": _columns(lines, 18, 20),
+        "chain": _columns(lines, 22, 22),
+        "resi": _columns(lines, 23, 26).astype(np.int32),
+        "icode": _columns(lines, 27, 27),
+        "coords": np.stack([_columns(lines, 31, 38), _columns(lines, 39, 46),
+                            _columns(lines, 47, 54)], axis=1).astype(np.float32),
+        "b": np.where(_columns(lines, 61, 66) == b"", b"0", _columns(lines, 61, 66)).astype(np.float32),
+        "element": _columns(lines, 77, 78),
+        "record": np.arange(len(records), dtype=np.int32),
+    }
+    data["ss"] = _assign_ss(data, text)
+
+    # Keep the first alternate location only
+    keep = (data["altloc"] == b"") | (data["altloc"] == b"A")
+
+    if chains in (None, "all"):
+        pass
+    elif chains == "protein":
+        is_aa = np.isin(data["resn"], list(AMINO_ACIDS)) & ~data["hetatm"]
+        protein_chains = np.unique(data["chain"][is_aa])
+        keep &= np.isin(data["chain"], protein_chains) & is_aa
+    else:
+        keep &= np.isin(data["chain"], [c.encode() if isinstance(c, str) else c for c in chains])
+
+    if subset == "ca":
+        keep &= (data["name"] == b"CA") & ~data["hetatm"]
+    elif subset == "backbone":
+        keep &= np.isin(data["name"], list(BACKBONE_ATOMS)) & ~data["hetatm"]
+    elif subset != "all":
+        raise ValueError(f"Unknown atom subset: {subset}")
+
+    return {field: data[field][keep] for field in FIELDS}
+
+
+def convert(pdb_path, out_path, chains=None, subset="all"):
+    """Write the filtered structure arrays of pdb_path to an .npz file."""
+    data = parse_pdb(pdb_path, chains, subset)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp = f"{out_path}.{os.getpid()}.tmp.npz"  # store is shared across runs
+    np.savez(tmp, **data)
+    os.replace(tmp, out_path)
+    return out_path
+
+
+def load(npz_path):
+    """Load cached structure arrays as a dict."""
+    with np.load(npz_path, allow_pickle=False) as npz:
+        return {field: npz[field] for field in npz.files}
+
+
+def _chains_label(chains):
+    if chains in (None, "all"):
+        return "all"
+    if chains == "protein":
+        return "protein"
+    return "".join(sorted(chains))
+
+
+def cache_path(pdb_path, chains=None, subset="all", cache_dir=None):
+    """Content-addressed cache location for a PDB file and filter combination."""
+    cache_dir = cache_dir or os.environ.get("STRUCT_CACHE_DIR", DEFAULT_CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(pdb_path))[0]
+    key = hashlib.sha256(
+        f"{file_digest(pdb_path)}:{_chains_label(chains)}:{subset}:{CACHE_FORMAT}".encode()
+    ).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{stem}-{_chains_label(chains)}-{subset}-{key}.npz")
+
+
+def cached_structure(pdb_path, chains=None, subset="all", cache_dir=None):
+    """Return structure arrays, converting the PDB into the cache on first use."""
+    path = cache_path(pdb_path, chains, subset, cache_dir)
+    if not os.path.exists(path):
+        convert(pdb_path, path, chains, subset)
+    return load(path)
+
+
+def ca_coords(pdb_path, chains="protein"):
+    """CA coordinates and residue numbers of the protein chain(s) as arrays."""
+    data = cached_structure(pdb_path, chains, "ca")
+    return data["coords"], data["resi"]
+
+
+# ───────────────────────── load filters ─────────────────────────
+def polymer_types(data):
+    """Per-atom index into POLYMERS."""
+    kind = np.full(len(data["resn"]), POLYMERS.index("ligand"), dtype=np.int8)
+    kind[np.isin(data["resn"], list(AMINO_ACIDS)) & ~data["hetatm"]] = POLYMERS.index("protein")
+    kind[np.isin(data["resn"], list(RNA_BASES | DNA_BASES))] = POLYMERS.index("nucleic")
+    kind[np.isin(data["resn"], list(WATERS))] = POLYMERS.index("water")
+    return kind
+
+
+def load_filter(pdb_path, filters=None):
+    """
+    Load filter of a structure: DEFAULT_FILTER updated with the "default"
+    entry and then the entry of its PDB ID (file stem) in filters, or in
+    $LOAD_FILTER when filters is None.
+    """
+    if filters is None:
+        filters = json.loads(os.environ.get("LOAD_FILTER") or "{}")
+    stem = os.path.splitext(os.path.basename(pdb_path))[0]
+    spec = {**DEFAULT_FILTER, **(filters.get("default") or {}), **(filters.get(stem) or {})}
+    unknown = set(spec["polymer"]) - set(POLYMERS)
+    if unknown:
+        raise ValueError(f"Unknown polymer type(s) in the load filter of {stem}: {', '.join(sorted(unknown))}")
+    return spec
+
+
+def filter_atoms(data, chains="all", polymer=POLYMERS, hydrogens=True):
+    """
+    Structure arrays restricted to a load filter. chains: "all", "protein"
+    (chains containing amino acids) or a list of chain IDs; polymer: the
+    POLYMERS to keep; hydrogens: keep H/D atoms.
+    """
+    kind = polymer_types(data)
+    keep = np.isin(kind, [POLYMERS.index(p) for p in polymer])
+    if chains == "protein":
+        keep &= np.isin(data["chain"], np.unique(data["chain"][kind == POLYMERS.index("protein")]))
+    elif chains not in (None, "all"):
+        chains = chains.split(",") if isinstance(chains, str) else chains
+        keep &= np.isin(data["chain"], [c.encode() for c in chains])
+    if not hydrogens:
+        keep &= ~np.isin(data["element"], [b"H", b"D"])
+    if keep.all():
+        return data
+    return {field: values[keep] for field, values in data.items()}
+
+
+def filter_selection(spec):
+    """PyMOL selection of the atoms a load filter drops, for scenes loaded with cmd.load."""
+    polymer = {"protein": "polymer.protein", "nucleic": "polymer.nucleic",
+               "ligand": "(organic or inorganic)", "water": "solvent"}
+    dropped = [polymer[p] for p in POLYMERS if p not in spec["polymer"]]
+    if spec["chains"] == "protein":
+        dropped.append("not bychain polymer.protein")
+    elif spec["chains"] not in (None, "all"):
+        chains = spec["chains"].split(",") if isinstance(spec["chains"], str) else spec["chains"]
+        dropped.append(f"not chain {'+'.join(chains)}")
+    if not spec["hydrogens"]:
+        dropped.append("hydro")
+    return " or ".join(dropped) or "none"
+
+
+def load_into_pymol(cmd, data, name, pdb_path):
+    """
+    Create a PyMOL object from the atoms in data (cached arrays of pdb_path,
+    e.g. after filter_atoms): PyMOL reads just their records, plus the
+    HELIX/SHEET/CONECT records, from the original file.
+    """
+    with open(pdb_path, "rb") as f:
+        text = f.read()
+    records = _atom_records(text)
+    lines = text.splitlines()
+    header = [line for line in lines if line.startswith((b"HELIX ", b"SHEET "))]
+    conect = [line for line in lines if line.startswith(b"CONECT")]
+    atoms = [records[i] for i in data["record"].tolist()]
+    cmd.read_pdbstr(b"\n".join(header + atoms + conect + [b"END", b""]).decode("latin-1"), name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert PDB files to the binary structure cache")
+    parser.add_argument("pdb", nargs="+")
+    parser.add_argument("--chains", default="all",
+                        help="'all', 'protein' or a comma-separated list of chain IDs")
+    parser.add_argument("--subset", default="all", choices=["all", "backbone", "ca"])
+    parser.add_argument("-o", "--output", help="output .npz (single input only)")
+    args = parser.parse_args()
+
+    chains = args.chains if args.chains in ("all", "protein") else args.chains.split(",")
+    for pdb in args.pdb:
+        out = args.output or cache_path(pdb, chains, args.subset)
+        convert(pdb, out, chains, args.subset)
+        n_atoms = len(load(out)["resi"])
+        print(f"{pdb} -> {out} ({n_atoms} atoms, {os.path.getsize(out) / 2**20:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
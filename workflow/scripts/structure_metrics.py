@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+NumPy RMSD / TM-score engine driven by the TM-align residue alignment.
+
+TM-align is run once by the `tmalign` rule. Its residue-level alignment
+(the three-line block in tmalign_stats.txt) is turned into index pairs on
+the CA arrays of the structure cache, after which Kabsch superposition,
+RMSD, TM-score under any length normalization or d0 and the d < 5 A pair
+count are recomputed in-process, e.g. for a domain subset.
+
+TM-score follows TM-align's superposition search: Kabsch fits seeded on
+every alignment fragment of length L, L/2, ..., L/16 and 4, each refined by
+refitting on the pairs within d0_search. All seeds are fitted together as
+matrix products and identical pair sets are only refitted once.
+
+The CA coordinates are read from the structures given with --structures
+(or `structures`), falling back to the chain paths named in the report.
+
+Usage:
+  python scripts/structure_metrics.py results/struct/tmalign_stats.txt
+      [--structures PDB1 PDB2] [--resi1 START-END] [--resi2 START-END] [--d0 D0]
+"""
+import argparse
+import os
+
+import numpy as np
+
+from structure_cache import cached_structure
+from tmalign_result import load as load_result
+
+CLOSE_PAIR_CUTOFF = 5.0
+_N_ITER = 20
+_MIN_FRAGMENT = 4
+_N_LEVELS = 6
+
+
+# ───────────────────────── TM-align alignment ─────────────────────────
+def read_alignment(stats_path, structures=None):
+    """
+    Return chain paths, lengths and the three alignment lines from TM-align
+    output. structures, the (chain 1, chain 2) files that were aligned,
+    replace the chain paths named in the report.
+    """
+    info = load_result(stats_path, structures)._asdict()
+    for key in ("chain_1", "chain_2"):
+        if not os.path.exists(info[key]):
+            raise FileNotFoundError(f"{info[key]} ({key} of {stats_path}) not found; "
+                                    f"pass the aligned structures explicitly")
+    return info
+
+
+def aligned_pairs(seq1, markers, seq2):
+    """Residue index pairs (0-based) of the aligned positions TM-align scored."""
+    a = np.frombuffer(seq1.encode(), dtype="S1")
+    b = np.frombuffer(seq2.encode(), dtype="S1")
+    m = np.frombuffer(markers.encode(), dtype="S1")
+    idx1 = np.cumsum(a != b"-") - 1
+    idx2 = np.cumsum(b != b"-") - 1
+    scored = (m != b" ") & (a != b"-") & (b != b"-")
+    return idx1[scored], idx2[scored]
+
+
+# ───────────────────────── superposition ─────────────────────────
+def kabsch(P, Q, weights=None):
+    """
+    Rotation R and translation t minimising |P @ R.T + t - Q| for point
+    pairs P, Q (n x 3). `weights` may be a length-n vector or an (S, n)
+    stack, in which case S superpositions are fitted at once.
+    """
+    weights = np.ones(len(P)) if weights is None else np.asarray(weights, dtype=float)
+    W = np.atleast_2d(weights)
+    total = W.sum(axis=1)[:, None]
+    p_mean = W @ P / total
+    q_mean = W @ Q / total
+    # Weighted covariance from per-pair outer products: one (S, n) x (n, 9) product
+    outer = (P[:, :, None] * Q[:, None, :]).reshape(len(P), 9)
+    H = (W @ outer).reshape(-1, 3, 3) - total[:, :, None] * p_mean[:, :, None] * q_mean[:, None, :]
+    U, _, Vt = np.linalg.svd(H)
+    V = np.swapaxes(Vt, -1, -2)
+    Ut = np.swapaxes(U, -1, -2)
+    D = np.zeros(H.shape)
+    D[:, 0, 0] = D[:, 1, 1] = 1.0
+    D[:, 2, 2] = np.sign(np.linalg.det(V @ Ut))
+    R = V @ D @ Ut
+    t = q_mean - np.einsum("sij,sj->si", R, p_mean)
+    if weights.ndim == 1:
+        return R[0], t[0]
+    return R, t
+
+
+def pair_distances(P, Q, R, t):
+    """Distances |R p + t - q| for every pair under one (R, t) or an (S, 3, 3) stack."""
+    if R.ndim == 2:
+        return np.linalg.norm(P @ R.T + t - Q, axis=-1)
+    # Expand |Rp + t - q|^2 so every term is a matrix product over the S fits
+    qp = (Q[:, :, None] * P[:, None, :]).reshape(len(P), 9)
+    Rt_t = np.einsum("sji,sj->si", R, t)
+    sq = ((P ** 2).sum(axis=1) + (Q ** 2).sum(axis=1))[None, :] + (t ** 2).sum(axis=1)[:, None]
+    sq += 2.0 * (Rt_t @ P.T) - 2.0 * (R.reshape(-1, 9) @ qp.T) - 2.0 * (t @ Q.T)
+    return np.sqrt(np.maximum(sq, 0.0))
+
+
+def rmsd(P, Q):
+    """RMSD of P onto Q after optimal (Kabsch) superposition."""
+    R, t = kabsch(P, Q)
+    return float(np.sqrt((pair_distances(P, Q, R, t) ** 2).mean()))
+
+
+def tm_d0(length):
+    """TM-score distance scale for a normalization length."""
+    if length <= 21:
+        return 0.5
+    return 1.24 * (length - 15) ** (1.0 / 3.0) - 1.8
+
+
+def _fragment_seeds(n):
+    """
+    Boolean (n_seeds, n) masks of every contiguous fragment of length
+    n, n/2, n/4, n/8, n/16 and 4 (TM-align's initial superpositions).
+    """
+    lengths = [n >> k for k in range(_N_LEVELS - 1) if n >> k > _MIN_FRAGMENT]
+    lengths.append(min(n, _MIN_FRAGMENT))
+    positions = np.arange(n)
+    seeds = []
+    for frag in lengths:
+        starts = np.arange(n - frag + 1)[:, None]
+        seeds.append((positions >= starts) & (positions < starts + frag))
+    return np.concatenate(seeds)
+
+
+def _cutoff_mask(dist, cutoff):
+    """Pairs within cutoff, widened per seed so at least three pairs remain."""
+    k = min(2, dist.shape[1] - 1)
+    third = np.partition(dist, k, axis=1)[:, k]
+    return dist <= np.maximum(cutoff, third)[:, None]
+
+
+def _unique_rows(mask):
+    """Drop duplicate rows of a boolean matrix (compared as packed bytes)."""
+    packed = np.ascontiguousarray(np.packbits(mask, axis=1))
+    _, first = np.unique(packed.view(f"V{packed.shape[1]}").ravel(), return_index=True)
+    return mask[np.sort(first)]
+
+
+def tm_score(P, Q, length, d0=None):
+    """
+    TM-score of aligned CA pairs P -> Q normalized by `length`.
+
+    Returns (score, R, t) for the best superposition found.
+    """
+    d0 = tm_d0(length) if d0 is None else d0
+    d0_search = min(max(d0, 4.5), 8.0)
+    mask = _fragment_seeds(len(P))
+    best = (-1.0, None, None)
+    for it in range(_N_ITER):
+        R, t = kabsch(P, Q, mask)
+        dist = pair_distances(P, Q, R, t)
+        scores = (1.0 / (1.0 + (dist / d0) ** 2)).sum(axis=1) / length
+        i = int(np.argmax(scores))
+        if scores[i] > best[0]:
+            best = (float(scores[i]), R[i], t[i])
+        new_mask = _cutoff_mask(dist, d0_search - 1.0 if it == 0 else d0_search + 1.0)
+        # Only seeds whose pair set changed need refitting; identical sets are fitted once
+        changed = np.any(new_mask != mask, axis=1)
+        if not changed.any():
+            break
+        mask = _unique_rows(new_mask[changed])
+    return best
+
+
+# ───────────────────────── comparison ─────────────────────────
+def _chain_ca(pdb_path):
+    """CA coordinates and residue numbers of the first protein chain (as TM-align reads it)."""
+    data = cached_structure(pdb_path, "protein", "ca")
+    first = data["chain"] == data["chain"][0]
+    return data["coords"][first].astype(np.float64), data["resi"][first]
+
+
+def _in_range(resi, span):
+    if span is None:
+        return np.ones(len(resi), dtype=bool)
+    start, stop = span
+    return (resi >= start) & (resi <= stop)
+
+
+def compare(stats_path, resi1=None, resi2=None, d0=None, structures=None):
+    """
+    Recompute alignment metrics from tmalign_stats.txt.
+
+    resi1/resi2 restrict the aligned pairs to (start, end) residue-number
+    ranges of chain 1/chain 2; d0 overrides the length-dependent scale;
+    structures are the (chain 1, chain 2) files that were aligned.
+    """
+    info = read_alignment(stats_path, structures)
+    xyz1, resi_1 = _chain_ca(info["chain_1"])
+    xyz2, resi_2 = _chain_ca(info["chain_2"])
+    i, j = aligned_pairs(info["seq1"], info["markers"], info["seq2"])
+    if i.max() >= len(xyz1) or j.max() >= len(xyz2):
+        raise ValueError(f"Alignment in {stats_path} does not match the CA atoms of the PDB files")
+
+    keep = _in_range(resi_1[i], resi1) & _in_range(resi_2[j], resi2)
+    P, Q = xyz1[i[keep]], xyz2[j[keep]]
+    if len(P) < 3:
+        raise ValueError("Fewer than three aligned pairs in the selected ranges")
+
+    len1 = info["length_1"] if resi1 is None else int(_in_range(resi_1, resi1).sum())
+    len2 = info["length_2"] if resi2 is None else int(_in_range(resi_2, resi2).sum())
+    tm1, _, _ = tm_score(P, Q, len1, d0)
+    tm2, R, t = tm_score(P, Q, len2, d0)
+    dist = pair_distances(P, Q, R, t)
+
+    seq1 = np.frombuffer(info["seq1"].encode(), dtype="S1")
+    seq2 = np.frombuffer(info["seq2"].encode(), dtype="S1")
+    scored = (np.frombuffer(info["markers"].encode(), dtype="S1") != b" ") & (seq1 != b"-") & (seq2 != b"-")
+    identical = int((seq1[scored] == seq2[scored])[keep].sum())
+
+    return {
+        "aligned_length": int(len(P)),
+        "rmsd": rmsd(P, Q),
+        "seq_id": identical / len(P),
+        "tm_score_chain1": tm1,
+        "tm_score_chain2": tm2,
+        "length_chain1": len1,
+        "length_chain2": len2,
+        "d0_chain1": d0 or tm_d0(len1),
+        "d0_chain2": d0 or tm_d0(len2),
+        "close_pairs": int((dist < CLOSE_PAIR_CUTOFF).sum()),
+    }
+
+
+def _span(text):
+    start, stop = text.split("-")
+    return int(start), int(stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute RMSD/TM-score from a TM-align alignment")
+    parser.add_argument("stats", nargs="?", default="results/struct/tmalign_stats.txt")
+    parser.add_argument("--structures", nargs=2, metavar=("PDB1", "PDB2"),
+                        help="chain 1 and chain 2 structure files (default: the paths in the report)")
+    parser.add_argument("--resi1", type=_span, help="chain 1 residue range, e.g. 100-400")
+    parser.add_argument("--resi2", type=_span, help="chain 2 residue range")
+    parser.add_argument("--d0", type=float, help="fixed TM-score distance scale")
+    args = parser.parse_args()
+
+    m = compare(args.stats, args.resi1, args.resi2, args.d0, args.structures)
+    print(f"Aligned length: {m['aligned_length']}")
+    print(f"RMSD:           {m['rmsd']:.2f} Å")
+    print(f"Seq identity:   {m['seq_id']:.3f}")
+    print(f"TM-score:       {m['tm_score_chain1']:.5f} (chain 1, L={m['length_chain1']}, d0={m['d0_chain1']:.2f})")
+    print(f"TM-score:       {m['tm_score_chain2']:.5f} (chain 2, L={m['length_chain2']}, d0={m['d0_chain2']:.2f})")
+    print(f"Pairs < {CLOSE_PAIR_CUTOFF:.0f} Å:     {m['close_pairs']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Structured TM-align results.
+
+TM-align writes a text report (results/struct/tmalign_stats.txt). This module
+parses it once into a TMAlignResult record - chain names and lengths,
+aligned length, RMSD, Seq_ID, both TM-scores with their d0 and the
+three-line residue alignment - and stores the record as JSON next to the
+report (tmalign_stats.json). The JSON carries the SHA-256 of the report it
+was parsed from, so `load` re-parses only when the report has changed.
+Figure scripts and cross-comparison reports read these small files instead
+of scanning the text output.
+
+The chain names in the report are the paths TM-align was given, relative
+to wherever it ran. Callers that read the structures pass their own paths
+(`structures`, --structures) instead of relying on them.
+
+Usage:
+  python workflow/scripts/tmalign_result.py results/struct/tmalign_stats.txt
+      [-o tmalign_stats.json] [--summary] [--structures PDB1 PDB2]
+"""
+import argparse
+import collections
+import hashlib
+import json
+import os
+import re
+
+SCHEMA_VERSION = 1
+
+FIELDS = [
+    "chain_1", "chain_2", "length_1", "length_2",
+    "aligned_length", "rmsd", "seq_id",
+    "tm_score_1", "tm_score_2", "d0_1", "d0_2",
+    "seq1", "markers", "seq2",
+]
+TMAlignResult = collections.namedtuple("TMAlignResult", FIELDS)
+
+_PATTERNS = {
+    "chain_1": (r"Name of Chain_1:\s*(\S+)", str),
+    "chain_2": (r"Name of Chain_2:\s*(\S+)", str),
+    "length_1": (r"Length of Chain_1:\s*(\d+)", int),
+    "length_2": (r"Length of Chain_2:\s*(\d+)", int),
+    "aligned_length": (r"Aligned length=\s*(\d+)", int),
+    "rmsd": (r"RMSD=\s*([\d.]+)", float),
+    "seq_id": (r"Seq_ID=n_identical/n_aligned=\s*([\d.]+)", float),
+    "tm_score_1": (r"TM-score=\s*([\d.]+) \(if normalized by length of Chain_1", float),
+    "tm_score_2": (r"TM-score=\s*([\d.]+) \(if normalized by length of Chain_2", float),
+    "d0_1": (r"length of Chain_1.*?d0=\s*([\d.]+)", float),
+    "d0_2": (r"length of Chain_2.*?d0=\s*([\d.]+)", float),
+}
+_ALIGNMENT_HEADER = '(":" denotes'
+
+
+def parse(text, source="TM-align output"):
+    """Parse TM-align text output into a TMAlignResult."""
+    values = {}
+    for field, (pattern, cast) in _PATTERNS.items():
+        found = re.search(pattern, text)
+        if not found:
+            raise ValueError(f"No {field} in {source}")
+        values[field] = cast(found.group(1))
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith(_ALIGNMENT_HEADER):
+            seq1, markers, seq2 = lines[i + 1:i + 4]
+            break
+    else:
+        raise ValueError(f"No residue alignment found in {source}")
+    # TM-align strips trailing blanks from the marker line
+    return TMAlignResult(seq1=seq1, markers=markers.ljust(len(seq1)), seq2=seq2, **values)
+
+
+def record_path(stats_path):
+    """tmalign_stats.txt -> tmalign_stats.json"""
+    return os.path.splitext(stats_path)[0] + ".json"
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def write(result, path, source_text=None):
+    """Store a record as JSON (atomically), tagged with the report's digest."""
+    payload = {"schema": SCHEMA_VERSION, **result._asdict()}
+    if source_text is not None:
+        payload["source_sha256"] = _digest(source_text)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=1)
+    os.replace(tmp, path)
+
+
+def read(path):
+    """Load a JSON record written by `write`."""
+    with open(path) as f:
+        payload = json.load(f)
+    if payload.get("schema") != SCHEMA_VERSION:
+        raise ValueError(f"{path}: unsupported record schema {payload.get('schema')!r}")
+    return TMAlignResult(**{field: payload[field] for field in FIELDS})
+
+
+def with_structures(result, structures=None):
+    """result with chain_1/chain_2 set to the (pdb1, pdb2) paths in structures, if given."""
+    if not structures:
+        return result
+    chain_1, chain_2 = structures
+    return result._replace(chain_1=chain_1, chain_2=chain_2)
+
+
+def load(path, structures=None):
+    """
+    Record for a TM-align report or JSON record path. For a report, the JSON
+    next to it is used when it matches the report's contents; otherwise the
+    report is parsed and the JSON (re)written. structures, the (chain 1,
+    chain 2) files that were aligned, replace the paths named in the report.
+    """
+    if path.endswith(".json"):
+        return with_structures(read(path), structures)
+    with open(path) as f:
+        text = f.read()
+    cached = record_path(path)
+    try:
+        with open(cached) as f:
+            payload = json.load(f)
+        if (payload.get("schema") == SCHEMA_VERSION
+                and payload.get("source_sha256") == _digest(text)):
+            return with_structures(TMAlignResult(**{field: payload[field] for field in FIELDS}),
+                                   structures)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    result = parse(text, path)
+    try:
+        write(result, cached, text)
+    except OSError:
+        pass  # read-only results directory: serve the parsed record uncached
+    return with_structures(result, structures)
+
+
+def summary(result):
+    """The three headline lines of the TM-align report."""
+    return (f"Aligned length= {result.aligned_length}, RMSD= {result.rmsd:6.2f}, "
+            f"Seq_ID= {result.seq_id:.3f}\n"
+            f"TM-score= {result.tm_score_1:.5f} (normalized by Chain_1, L={result.length_1})\n"
+            f"TM-score= {result.tm_score_2:.5f} (normalized by Chain_2, L={result.length_2})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse TM-align output into a JSON record")
+    parser.add_argument("stats", help="TM-align text output")
+    parser.add_argument("-o", "--output", help="JSON path (default: next to the report)")
+    parser.add_argument("--summary", action="store_true", help="Print the headline metrics")
+    parser.add_argument("--structures", nargs=2, metavar=("PDB1", "PDB2"),
+                        help="Record these chain 1/chain 2 files instead of the names in the report")
+    args = parser.parse_args()
+
+    with open(args.stats) as f:
+        text = f.read()
+    result = with_structures(parse(text, args.stats), args.structures)
+    write(result, args.output or record_path(args.stats), text)
+    if args.summary:
+        print(summary(result))
+
+
+if __name__ == "__main__":
+    main()